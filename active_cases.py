@@ -0,0 +1,186 @@
+"""
+Materialized active-case listing for JEC System
+
+processos_ativos_mv (migration 0007) is a pre-joined copy of the
+processos_ativos view plus the columns needed for role scoping, with a
+unique index so it can be refreshed CONCURRENTLY without blocking readers.
+
+Each statement writing processos, partes, partes_processo or
+categorias_causas adds a row to processos_ativos_mv_pendencias (migration
+0011); a refresh deletes the rows it covers. ActiveCasesRefresher polls
+that table and mv_refresh_state, and refreshes when changes are pending
+(no more often than `min_gap`), or when the data is older than `max_age`
+regardless. A transaction advisory lock makes sure only one process
+refreshes at a time.
+
+Listings read the view only while it is being kept fresh (the refresher
+runs here, or the last refresh is younger than max_age); otherwise they
+fall back to the live processos_ativos view.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from database import db_manager
+from case_access import case_access
+
+VIEW_NAME = "processos_ativos_mv"
+PENDING_TABLE = "processos_ativos_mv_pendencias"
+DEFAULT_MAX_AGE = 600.0
+
+
+class ActiveCasesView:
+    """Read side: scoped listing plus freshness of the materialized view"""
+
+    def __init__(self, refresher: Optional["ActiveCasesRefresher"] = None):
+        self.refresher = refresher
+        self._exists: Optional[bool] = None
+
+    @property
+    def exists(self) -> bool:
+        """Whether the materialized view exists (detected once)"""
+        if self._exists is None:
+            try:
+                rows = db_manager.execute_query(
+                    "SELECT to_regclass(%s) IS NOT NULL AS available",
+                    (VIEW_NAME,),
+                    return_results=True,
+                )
+                self._exists = bool(rows and rows[0]["available"])
+            except Exception as exc:
+                logging.warning("Materialized view detection failed: %s", str(exc))
+                self._exists = False
+        return self._exists
+
+    @property
+    def available(self) -> bool:
+        """Whether listings should read the view instead of processos_ativos
+
+        Only while something keeps it fresh: this process's refresher, or
+        another process whose last refresh is younger than max_age.
+        """
+        if not self.exists:
+            return False
+        if self.refresher is not None and self.refresher.running:
+            return True
+        max_age = self.refresher.max_age if self.refresher else DEFAULT_MAX_AGE
+        try:
+            rows = db_manager.execute_query(
+                """SELECT EXTRACT(EPOCH FROM now() - atualizada_em) AS idade
+                FROM mv_refresh_state WHERE nome = %s""",
+                (VIEW_NAME,),
+                return_results=True,
+            )
+        except Exception as exc:
+            logging.warning("%s freshness check failed: %s", VIEW_NAME, str(exc))
+            return False
+        idade = rows[0]["idade"] if rows else None
+        return idade is not None and float(idade) < max_age
+
+    def query(self, user: Optional[Dict]) -> Tuple[str, tuple]:
+        """SQL listing the user's active cases with the view's refresh time"""
+        where, params = case_access.scope(user, "a")
+        sql = f"""SELECT a.*, s.atualizada_em AS _atualizada_em,
+                EXISTS (SELECT 1 FROM {PENDING_TABLE}) AS _pendente
+            FROM {VIEW_NAME} a
+            CROSS JOIN mv_refresh_state s
+            WHERE s.nome = '{VIEW_NAME}' AND {where}
+            ORDER BY a.data_distribuicao DESC"""
+        return sql, params
+
+    @staticmethod
+    def staleness(rows: List[Dict]) -> Optional[str]:
+        """Human readable data age taken from the first listed row"""
+        if not rows or rows[0].get("_atualizada_em") is None:
+            return None
+        refreshed = rows[0]["_atualizada_em"]
+        age = max(0, int((datetime.now() - refreshed).total_seconds()))
+        note = f"Data as of {refreshed:%H:%M:%S} ({age}s ago)"
+        if rows[0].get("_pendente"):
+            note += " - newer changes pending refresh"
+        return note
+
+
+class ActiveCasesRefresher:
+    """Background thread keeping processos_ativos_mv fresh"""
+
+    def __init__(
+        self,
+        poll_interval: float = 5.0,
+        min_gap: float = 30.0,
+        max_age: float = DEFAULT_MAX_AGE,
+    ):
+        self.poll_interval = poll_interval
+        self.min_gap = min_gap
+        self.max_age = max_age
+        self._last_refresh = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return (
+            self._thread is not None
+            and self._thread.is_alive()
+            and not self._stop.is_set()
+        )
+
+    def due(self) -> bool:
+        """Decide from the pending changes and the data's age whether to refresh"""
+        rows = db_manager.execute_query(
+            f"""SELECT EXISTS (SELECT 1 FROM {PENDING_TABLE}) AS pendente,
+                EXTRACT(EPOCH FROM now() - atualizada_em) AS idade
+            FROM mv_refresh_state WHERE nome = %s""",
+            (VIEW_NAME,),
+            return_results=True,
+        )
+        if not rows:
+            return False
+        state = rows[0]
+        if state["idade"] is not None and float(state["idade"]) >= self.max_age:
+            return True
+        return bool(state["pendente"]) and (
+            time.monotonic() - self._last_refresh >= self.min_gap
+        )
+
+    def refresh(self) -> bool:
+        """Refresh now; False when another process holds the refresh lock"""
+        started = time.perf_counter()
+        rows = db_manager.execute_query(
+            "SELECT jec_refresh_processos_ativos_mv() AS refreshed",
+            return_results=True,
+        )
+        refreshed = bool(rows and rows[0]["refreshed"])
+        self._last_refresh = time.monotonic()
+        if refreshed:
+            logging.info(
+                "%s refreshed in %.2fs", VIEW_NAME, time.perf_counter() - started
+            )
+        return refreshed
+
+    def run_once(self):
+        try:
+            if self.due():
+                self.refresh()
+        except Exception as exc:
+            logging.error("%s refresh failed: %s", VIEW_NAME, str(exc))
+
+    def start(self) -> threading.Thread:
+        def loop():
+            while not self._stop.wait(self.poll_interval):
+                self.run_once()
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=loop, name="mv-refresh", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        self._stop.set()
+
+
+# Singleton instances
+active_cases_refresher = ActiveCasesRefresher()
+active_cases = ActiveCasesView(active_cases_refresher)
@@ -0,0 +1,203 @@
+"""
+Workload-aware case assignment for JEC System
+
+Judges (processos.juiz_id) and clerks (processos.servidor_id) are assigned
+to the least-loaded staff member of the matching role. Open-case counts are
+loaded once with a single grouped query and then kept in a min-heap that is
+updated incrementally as cases are assigned, so picking the next staff member
+is O(log n) and never recounts processos.
+
+The heap uses lazy deletion: a count change pushes a fresh entry, and
+entries whose count no longer matches the current one are skipped when
+popped.
+
+Plans are written with one set-based UPDATE ... FROM unnest(...) per batch.
+Only still-unassigned rows are updated, so a case someone else assigned in
+the meantime is left alone and its planned count is handed back.
+
+Run `python assignment.py` to assign every open unassigned case.
+"""
+
+import heapq
+import logging
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from case_access import STAFF_COLUMNS, case_access
+from database import db_manager
+
+BATCH_SIZE = 5000
+
+# processos_ativos repeats a case once per matching party row, so open
+# cases are tested with EXISTS rather than joined
+_OPEN = "EXISTS (SELECT 1 FROM processos_ativos a WHERE a.id = p.id)"
+
+_LOAD_QUERY = f"""SELECT u.id, u.tipo, COALESCE(c.abertos, 0) AS abertos
+FROM usuarios u
+LEFT JOIN (
+    SELECT p.juiz_id AS staff_id, 'juiz' AS tipo, COUNT(*) AS abertos
+    FROM processos p
+    WHERE p.juiz_id IS NOT NULL AND {_OPEN} GROUP BY p.juiz_id
+    UNION ALL
+    SELECT p.servidor_id, 'servidor', COUNT(*)
+    FROM processos p
+    WHERE p.servidor_id IS NOT NULL AND {_OPEN} GROUP BY p.servidor_id
+) c ON c.staff_id = u.id AND c.tipo = u.tipo
+WHERE u.tipo IN ('juiz', 'servidor')"""
+
+
+class WorkloadHeap:
+    """Min-heap of staff members keyed by open-case count"""
+
+    def __init__(self, counts: Optional[Dict[object, int]] = None):
+        self.counts: Dict[object, int] = {}
+        self._heap: List[Tuple[int, str, object]] = []
+        for staff_id, count in (counts or {}).items():
+            self.set(staff_id, count)
+
+    def __len__(self):
+        return len(self.counts)
+
+    def set(self, staff_id, count: int):
+        self.counts[staff_id] = count
+        heapq.heappush(self._heap, (count, str(staff_id), staff_id))
+
+    def adjust(self, staff_id, delta: int):
+        if staff_id in self.counts:
+            self.set(staff_id, max(0, self.counts[staff_id] + delta))
+
+    def remove(self, staff_id):
+        self.counts.pop(staff_id, None)
+
+    def take(self):
+        """Least-loaded staff member, charged with one more case"""
+        while self._heap:
+            count, _, staff_id = self._heap[0]
+            if self.counts.get(staff_id) == count:
+                self.set(staff_id, count + 1)
+                return staff_id
+            heapq.heappop(self._heap)  # stale entry
+        return None
+
+
+class AssignmentService:
+    """Assign cases to the least-loaded judge or clerk"""
+
+    def __init__(self, resync_interval: float = 600.0):
+        self.resync_interval = resync_interval
+        self._heaps: Dict[str, WorkloadHeap] = {}
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Rebuild the heaps from one grouped count per role"""
+        rows = db_manager.execute_query(_LOAD_QUERY, return_results=True)
+        heaps = {role: WorkloadHeap() for role in STAFF_COLUMNS}
+        for row in rows:
+            heaps[row["tipo"]].set(row["id"], int(row["abertos"]))
+        with self._lock:
+            self._heaps = heaps
+            self._loaded_at = time.monotonic()
+        logging.info(
+            "Workloads loaded: %s",
+            ", ".join(f"{len(heap)} {role}" for role, heap in heaps.items()),
+        )
+
+    def ensure_loaded(self):
+        """Load on first use and resync now and then (closed cases, new staff)"""
+        if (
+            not self._heaps
+            or time.monotonic() - self._loaded_at >= self.resync_interval
+        ):
+            self.load()
+
+    def workloads(self, role: str) -> Dict[object, int]:
+        self.ensure_loaded()
+        with self._lock:
+            return dict(self._heaps[role].counts)
+
+    def plan(self, case_ids: Iterable, role: str) -> List[Tuple[object, object]]:
+        """Pair each case with a staff member, charging their counts
+
+        A case listed more than once is planned (and charged) once.
+        """
+        self.ensure_loaded()
+        plan = []
+        planned = set()
+        with self._lock:
+            heap = self._heaps[role]
+            for case_id in case_ids:
+                if str(case_id) in planned:
+                    continue
+                planned.add(str(case_id))
+                staff_id = heap.take()
+                if staff_id is None:
+                    break
+                plan.append((case_id, staff_id))
+        return plan
+
+    def assign(self, case_ids: Iterable, role: str) -> Dict[object, object]:
+        """Assign the given unassigned cases; return {case_id: staff_id}"""
+        if role not in STAFF_COLUMNS:
+            raise ValueError(f"Unknown staff role: {role}")
+        column = STAFF_COLUMNS[role]
+        plan = self.plan(case_ids, role)
+        if not plan:
+            return {}
+
+        rows = db_manager.execute_query(
+            f"""UPDATE processos p SET {column} = v.staff_id
+            FROM unnest(%s::uuid[], %s::uuid[]) AS v(processo_id, staff_id)
+            WHERE p.id = v.processo_id AND p.{column} IS NULL
+            RETURNING p.id, v.staff_id""",
+            ([str(c) for c, _ in plan], [str(s) for _, s in plan]),
+            return_results=True,
+        )
+        assigned = {row["id"]: row["staff_id"] for row in rows}
+
+        # Give back counts for cases assigned concurrently by someone else
+        done = {str(case_id) for case_id in assigned}
+        with self._lock:
+            for case_id, staff_id in plan:
+                if str(case_id) not in done:
+                    self._heaps[role].adjust(staff_id, -1)
+        for staff_id in set(assigned.values()):
+            case_access.invalidate(staff_id)
+        return assigned
+
+    def assign_unassigned(self, role: str, batch_size: int = BATCH_SIZE) -> int:
+        """Assign every open case missing a staff member of `role`"""
+        column = STAFF_COLUMNS[role]
+        total = 0
+        while True:
+            rows = db_manager.execute_query(
+                f"""SELECT p.id FROM processos p
+                WHERE p.{column} IS NULL AND {_OPEN}
+                ORDER BY p.data_distribuicao
+                LIMIT %s""",
+                (batch_size,),
+                return_results=True,
+            )
+            if not rows:
+                return total
+            assigned = self.assign([row["id"] for row in rows], role)
+            if not assigned:
+                return total  # no staff of this role
+            total += len(assigned)
+
+    def case_closed(self, staff_id, role: str):
+        """Record that one of the staff member's cases left the open set"""
+        with self._lock:
+            if role in self._heaps:
+                self._heaps[role].adjust(staff_id, -1)
+
+
+# Singleton instance
+assignment_service = AssignmentService()
+
+
+if __name__ == "__main__":
+    for staff_role in STAFF_COLUMNS:
+        print(
+            f"{staff_role}: {assignment_service.assign_unassigned(staff_role)} assigned"
+        )
@@ -2,6 +2,7 @@ import logging
 import re
 import secrets
 import hashlib
+from contextvars import ContextVar
 from typing import Optional, Dict
 from database import db_manager
 
@@ -10,7 +11,19 @@ class AuthManager:
     """Handles user authentication, password hashing, and session management"""
 
     def __init__(self):
-        self.current_user: Optional[Dict] = None
+        # Each thread or asyncio task started with its own context (e.g. a
+        # session_server session) sees its own logged-in user
+        self._current_user: ContextVar[Optional[Dict]] = ContextVar(
+            "current_user", default=None
+        )
+
+    @property
+    def current_user(self) -> Optional[Dict]:
+        return self._current_user.get()
+
+    @current_user.setter
+    def current_user(self, user: Optional[Dict]):
+        self._current_user.set(user)
 
     def hash_password(self, password: str, salt: Optional[str] = None) -> str:
         """Hash password with PBKDF2-HMAC-SHA256"""
@@ -56,8 +69,8 @@ class AuthManager:
             return False, "Password must contain at least one special character"
         return True, ""
 
-    def login(self, email: str, senha: str) -> bool:
-        """Authenticate user and establish session"""
+    def authenticate(self, email: str, senha: str) -> Optional[Dict]:
+        """Check credentials and return the user row; no session is changed"""
         try:
             user = db_manager.execute_query(
                 "SELECT * FROM usuarios WHERE email = %s", (email,), return_results=True
@@ -69,17 +82,20 @@ class AuthManager:
                         "UPDATE usuarios SET senha = %s WHERE id = %s",
                         (new_hash, user[0]["id"]),
                     )
+                    user[0]["senha"] = new_hash
 
-                self.current_user = user[0]
                 logging.info("User %s logged in successfully", email)
-                return True
-            else:
-                self.current_user = None  # Ensure session is cleared on failure
-                return False
+                return user[0]
+            return None
         except Exception as e:
             logging.error("Login failed: %s", str(e))
-            self.current_user = None  # Ensure session is cleared on exceptions
-            return False
+            return None
+
+    def login(self, email: str, senha: str) -> bool:
+        """Authenticate user and establish session for the current context"""
+        # Cleared on failure and on exceptions as well
+        self.current_user = self.authenticate(email, senha)
+        return self.current_user is not None
 
     def logout(self):
         """Terminate current session"""
@@ -92,5 +108,33 @@ class AuthManager:
         return self.current_user
 
 
+class AuthSession:
+    """Logged-in user of one CLI session
+
+    CommandContext carries one of these, so sessions running side by side in
+    one process (threads, asyncio tasks) each keep their own login. Logging
+    in or out also sets auth_manager.current_user for the current context,
+    for code that still reads the global.
+    """
+
+    def __init__(self, user: Optional[Dict] = None):
+        self.user = user
+
+    @property
+    def authenticated(self) -> bool:
+        return self.user is not None
+
+    def login(self, email: str, senha: str) -> bool:
+        self.user = auth_manager.authenticate(email, senha)
+        auth_manager.current_user = self.user
+        return self.user is not None
+
+    def logout(self):
+        if self.user:
+            logging.info("User %s logged out", self.user["email"])
+        self.user = None
+        auth_manager.current_user = None
+
+
 # Singleton instance
 auth_manager = AuthManager()
@@ -0,0 +1,83 @@
+"""
+Role-scoped case visibility for JEC System
+
+Every case query is narrowed in SQL according to the logged-in user's role:
+- juiz / servidor see the cases assigned to them (processos.juiz_id / servidor_id)
+- advogado sees cases where they represent a party (partes.advogado_id)
+- parte sees cases they take part in (partes_processo, matched by CPF/CNPJ)
+Any other role, or no user at all, sees nothing.
+"""
+
+import logging
+from typing import Dict, FrozenSet, Optional, Tuple
+from cache import TTLCache
+from database import db_manager
+from normalization import digits_only, sql_digits_only
+
+STAFF_COLUMNS = {"juiz": "juiz_id", "servidor": "servidor_id"}
+
+# Predicates are built on a caller supplied alias for the processos row
+_LAWYER_PREDICATE = """EXISTS (
+    SELECT 1 FROM partes_processo acc_pp
+    JOIN partes acc_pa ON acc_pa.id = acc_pp.parte_id
+    WHERE acc_pp.processo_id = {alias}.id AND acc_pa.advogado_id = %s)"""
+
+_PARTY_PREDICATE = """EXISTS (
+    SELECT 1 FROM partes_processo acc_pp
+    JOIN partes acc_pa ON acc_pa.id = acc_pp.parte_id
+    WHERE acc_pp.processo_id = {alias}.id AND {document} = %s)"""
+
+
+class CaseAccessPolicy:
+    """Translate a user into SQL predicates and cached visible-case sets"""
+
+    def __init__(self, ttl: float = 300.0):
+        self._case_sets = TTLCache(ttl=ttl, maxsize=256)
+
+    def scope(self, user: Optional[Dict], alias: str = "p") -> Tuple[str, tuple]:
+        """Return (predicate, params) restricting `alias` to the user's cases"""
+        if not user:
+            return "FALSE", ()
+
+        role = user.get("tipo")
+        if role in STAFF_COLUMNS:
+            return f"{alias}.{STAFF_COLUMNS[role]} = %s", (user["id"],)
+        if role == "advogado":
+            return _LAWYER_PREDICATE.format(alias=alias), (user["id"],)
+        if role == "parte":
+            document = digits_only(user.get("cpf"))
+            if not document:
+                return "FALSE", ()
+            predicate = _PARTY_PREDICATE.format(
+                alias=alias, document=sql_digits_only("acc_pa.cpf_cnpj")
+            )
+            return predicate, (document,)
+        return "FALSE", ()
+
+    def visible_case_ids(self, user: Optional[Dict]) -> FrozenSet:
+        """IDs of every case the user may see, cached per user"""
+        if not user:
+            return frozenset()
+        return self._case_sets.get_or_load(user["id"], lambda: self._load(user))
+
+    def can_view(self, user: Optional[Dict], case_id) -> bool:
+        """Check visibility of one case against the cached case set"""
+        return case_id in self.visible_case_ids(user)
+
+    def invalidate(self, user_id=None):
+        """Forget cached case sets after assignments or party changes"""
+        self._case_sets.invalidate(user_id)
+
+    def _load(self, user: Dict) -> FrozenSet:
+        where, params = self.scope(user, "p")
+        rows = db_manager.execute_query(
+            f"SELECT p.id FROM processos p WHERE {where}",
+            params,
+            return_results=True,
+        )
+        logging.debug("Loaded %d visible cases for user %s", len(rows), user["id"])
+        return frozenset(row["id"] for row in rows)
+
+
+# Singleton instance
+case_access = CaseAccessPolicy()
@@ -0,0 +1,106 @@
+"""
+Case detail loading for JEC System
+
+A case is opened with a single round trip: parties (with their lawyers),
+documents, assigned staff and the full category path are aggregated
+server-side with json_agg and a recursive CTE.
+
+Details are cached per case and keyed by processos.data_atualizacao. The
+query receives the cached timestamp and only builds the JSON document when
+the row has changed, so reopening an unchanged case transfers one small row.
+"""
+
+from typing import Dict, Optional
+from cache import TTLCache
+from case_access import case_access
+from database import db_manager
+from normalization import digits_only, sql_digits_only
+
+_DETAIL_QUERY = """SELECT p.id, p.data_atualizacao,
+    CASE WHEN %s OR p.data_atualizacao IS DISTINCT FROM %s THEN json_build_object(
+        'numero_processo', p.numero_processo,
+        'titulo', p.titulo,
+        'descricao', p.descricao,
+        'status', p.status,
+        'valor_causa', p.valor_causa,
+        'data_distribuicao', p.data_distribuicao,
+        'juiz', (SELECT u.nome_completo FROM usuarios u WHERE u.id = p.juiz_id),
+        'servidor', (SELECT u.nome_completo FROM usuarios u WHERE u.id = p.servidor_id),
+        'categoria', (
+            WITH RECURSIVE caminho AS (
+                SELECT c.id, c.nome, c.categoria_pai_id, 0 AS nivel
+                FROM categorias_causas c WHERE c.id = p.categoria_id
+                UNION ALL
+                SELECT c.id, c.nome, c.categoria_pai_id, caminho.nivel + 1
+                FROM categorias_causas c
+                JOIN caminho ON c.id = caminho.categoria_pai_id
+                WHERE caminho.nivel < 20)
+            SELECT json_agg(nome ORDER BY nivel DESC) FROM caminho),
+        'subcategoria', (
+            SELECT c.nome FROM categorias_causas c WHERE c.id = p.subcategoria_id),
+        'partes', (
+            SELECT json_agg(json_build_object(
+                'nome', pa.nome,
+                'tipo', pp.tipo,
+                'cpf_cnpj', pa.cpf_cnpj,
+                'principal', pp.principal,
+                'advogado', adv.nome_completo)
+                ORDER BY pp.principal DESC, pa.nome)
+            FROM partes_processo pp
+            JOIN partes pa ON pa.id = pp.parte_id
+            LEFT JOIN usuarios adv ON adv.id = pa.advogado_id
+            WHERE pp.processo_id = p.id),
+        'documentos', (
+            SELECT json_agg(json_build_object(
+                'tipo', d.tipo,
+                'nome_arquivo', d.nome_arquivo,
+                'data_envio', d.data_envio,
+                'obrigatorio', d.obrigatorio)
+                ORDER BY d.data_envio)
+            FROM documentos d WHERE d.processo_id = p.id)
+    ) END AS detalhe
+FROM processos p
+WHERE {match} AND {scope}"""
+
+
+class CaseDetailService:
+    """Load case details in one query, reusing cached copies when unchanged"""
+
+    def __init__(self, ttl: float = 900.0):
+        self._cache = TTLCache(ttl=ttl, maxsize=512)
+
+    def load(self, numero_processo: str, user: Optional[Dict]) -> Optional[Dict]:
+        """Return the detail document for a case number, or None if not visible"""
+        key = digits_only(numero_processo)
+        if not key:
+            return None
+        cached = self._cache.get(key)
+        stamp = cached[0] if cached else None
+
+        where, scope_params = case_access.scope(user, "p")
+        sql = _DETAIL_QUERY.format(
+            match=f"{sql_digits_only('p.numero_processo')} = %s", scope=where
+        )
+        rows = db_manager.execute_query(
+            sql, (cached is None, stamp, key, *scope_params), return_results=True
+        )
+        if not rows:
+            return None
+
+        row = rows[0]
+        if row["detalhe"] is None and cached is not None:
+            return cached[1]  # unchanged since it was cached
+        detail = dict(row["detalhe"], id=row["id"])
+        self._cache.set(key, (row["data_atualizacao"], detail))
+        return detail
+
+    def configure(self, ttl: float, maxsize: int):
+        self._cache.configure(ttl=ttl, maxsize=maxsize)
+
+    def invalidate(self, numero_processo: Optional[str] = None):
+        """Drop one cached case, or all of them"""
+        self._cache.invalidate(digits_only(numero_processo) if numero_processo else None)
+
+
+# Singleton instance
+case_details = CaseDetailService()
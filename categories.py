@@ -0,0 +1,176 @@
+"""
+Category hierarchy service for JEC System
+
+categorias_causas is a self-referencing tree (categoria_pai_id). The whole
+table is loaded once and laid out in Euler-tour (pre-order) order, so each
+category owns a contiguous [entrada, saida) interval of that order:
+- "all descendants of X" is the slice order[entrada[X]:saida[X]]
+- "is A under B" is an O(1) interval comparison
+Case filters then use categoria_id = ANY(...) against an index instead of
+a recursive CTE per query.
+
+A statement trigger bumps categorias_versao on every change (migration
+0006); the tree checks that version at most every `check_interval` seconds
+and rebuilds when it moved.
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, FrozenSet, List, Optional, Tuple
+from database import db_manager
+
+
+class CategoryTree:
+    """In-memory category hierarchy with interval-based subtree queries"""
+
+    def __init__(self, check_interval: float = 60.0):
+        self.check_interval = check_interval
+        self._nodes: Dict[object, Dict] = {}
+        self._children: Dict[object, List] = {}
+        self._order: List = []
+        self._entrada: Dict[object, int] = {}
+        self._saida: Dict[object, int] = {}
+        self._depth: Dict[object, int] = {}
+        self._subtrees: Dict[object, FrozenSet] = {}
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.RLock()
+        self.loaded = False
+
+    def build(self, rows: List[Dict], version=None):
+        """Lay out the tree from categorias_causas rows"""
+        nodes = {row["id"]: row for row in rows}
+        children: Dict[object, List] = {cid: [] for cid in nodes}
+        roots = []
+        for row in sorted(rows, key=lambda r: r["nome"]):
+            parent = row.get("categoria_pai_id")
+            if parent in nodes and parent != row["id"]:
+                children[parent].append(row["id"])
+            else:
+                roots.append(row["id"])
+
+        order, entrada, saida, depth = [], {}, {}, {}
+        pending = [(root, 0) for root in reversed(roots)]
+        visited = set()
+        while pending or len(visited) < len(nodes):
+            if not pending:
+                # Rows caught in a parent cycle are never reached from a root
+                stray = next(cid for cid in nodes if cid not in visited)
+                logging.warning("Category %s is part of a cycle; treating as root", stray)
+                pending.append((stray, 0))
+            node, level = pending.pop()
+            if node in visited:
+                # Second visit closes the interval opened on the first one
+                saida[node] = len(order)
+                continue
+            visited.add(node)
+            entrada[node] = len(order)
+            depth[node] = level
+            order.append(node)
+            pending.append((node, -1))  # marker popped after all children
+            for child in reversed(children[node]):
+                if child not in visited:
+                    pending.append((child, level + 1))
+
+        with self._lock:
+            self._nodes, self._children, self._order = nodes, children, order
+            self._entrada, self._saida, self._depth = entrada, saida, depth
+            self._subtrees = {}
+            self._version = version
+            self._checked_at = time.monotonic()
+            self.loaded = True
+
+    def load(self):
+        """(Re)load the whole table and its version stamp"""
+        rows = db_manager.execute_query(
+            "SELECT id, categoria_pai_id, nome, descricao, valor_maximo "
+            "FROM categorias_causas",
+            return_results=True,
+        )
+        self.build(rows, self._fetch_version())
+        logging.info("Category tree loaded: %d categories", len(rows))
+
+    def ensure_current(self):
+        """Load on first use and rebuild when the categories changed"""
+        if not self.loaded:
+            self.load()
+            return
+        if time.monotonic() - self._checked_at < self.check_interval:
+            return
+        self._checked_at = time.monotonic()
+        version = self._fetch_version()
+        # Without the version table (migration 0006) reload on every check
+        if version is None or version != self._version:
+            self.load()
+
+    def invalidate(self):
+        """Force a reload on next use"""
+        with self._lock:
+            self.loaded = False
+
+    def get(self, category_id) -> Optional[Dict]:
+        self.ensure_current()
+        return self._nodes.get(category_id)
+
+    def descendants(self, category_id, include_self: bool = True) -> FrozenSet:
+        """IDs in the subtree rooted at category_id"""
+        self.ensure_current()
+        with self._lock:
+            if category_id not in self._entrada:
+                return frozenset()
+            subtree = self._subtrees.get(category_id)
+            if subtree is None:
+                start, end = self._entrada[category_id], self._saida[category_id]
+                subtree = frozenset(self._order[start:end])
+                self._subtrees[category_id] = subtree
+        return subtree if include_self else subtree - {category_id}
+
+    def is_descendant(self, category_id, ancestor_id) -> bool:
+        """True when category_id lies in ancestor_id's subtree (inclusive)"""
+        self.ensure_current()
+        entrada, saida = self._entrada, self._saida
+        if category_id not in entrada or ancestor_id not in entrada:
+            return False
+        return entrada[ancestor_id] <= entrada[category_id] < saida[ancestor_id]
+
+    def path(self, category_id) -> List[Dict]:
+        """Categories from the root down to category_id"""
+        self.ensure_current()
+        path, seen = [], set()
+        node = self._nodes.get(category_id)
+        while node is not None and node["id"] not in seen:
+            seen.add(node["id"])
+            path.append(node)
+            node = self._nodes.get(node.get("categoria_pai_id"))
+        return list(reversed(path))
+
+    def walk(self) -> List[Tuple[Dict, int]]:
+        """Every category with its depth, in display (pre-order) order"""
+        self.ensure_current()
+        return [(self._nodes[cid], self._depth[cid]) for cid in self._order]
+
+    def case_filter(self, category_id, alias: str = "p") -> Tuple[str, tuple]:
+        """Predicate matching cases filed under category_id or any descendant"""
+        ids = [str(cid) for cid in self.descendants(category_id)]
+        if not ids:
+            return "FALSE", ()
+        return (
+            f"({alias}.categoria_id = ANY(%s::uuid[])"
+            f" OR {alias}.subcategoria_id = ANY(%s::uuid[]))",
+            (ids, ids),
+        )
+
+    def _fetch_version(self):
+        try:
+            rows = db_manager.execute_query(
+                "SELECT versao FROM categorias_versao", return_results=True
+            )
+        except Exception as exc:
+            logging.debug("Category version unavailable: %s", str(exc))
+            return None
+        return rows[0]["versao"] if rows else None
+
+
+# Singleton instance, loaded on first use
+category_tree = CategoryTree()
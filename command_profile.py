@@ -0,0 +1,202 @@
+"""
+Per-command profiling for JEC System
+
+`python main.py --profile [DIR]` runs every command's execute() under
+CommandProfiler. For each invocation it records:
+- cProfile statistics of the command
+- wall time, split into database time (QueryTimer), time spent waiting at
+  a prompt for the user, and render time, i.e. everything else: building
+  tables, printing, Python work
+- peak memory allocated while the command ran (tracemalloc)
+
+Each invocation writes a text report to the profile directory (default
+profiles/) with those figures and the functions with the highest
+cumulative time, plus the raw .prof file for tools such as snakeviz. The
+"Profile Report" menu entry shows the hottest functions across the session.
+
+cProfile and tracemalloc slow the code they watch, so compare timings
+taken in this mode with each other rather than with normal runs.
+"""
+
+import cProfile
+import logging
+import os
+import pstats
+import re
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+from rich.console import Console
+from database import QueryTimer
+
+
+@contextmanager
+def _timed_prompts(waits: List[float], profile: cProfile.Profile):
+    """Time Console.input (every Prompt.ask) into waits, outside the profile
+
+    Left in, a user thinking at a prompt would make input() the hottest
+    function of every report.
+    """
+    original = Console.input
+
+    def timed_input(console, *args, **kwargs):
+        profile.disable()
+        started = time.perf_counter()
+        try:
+            return original(console, *args, **kwargs)
+        finally:
+            waits.append(time.perf_counter() - started)
+            profile.enable()
+
+    Console.input = timed_input
+    try:
+        yield
+    finally:
+        Console.input = original
+
+
+class CommandProfiler:
+    """Profiles command invocations and keeps session-wide statistics"""
+
+    def __init__(self):
+        self.enabled = False
+        self.directory = "profiles"
+        self.records: List[Dict] = []
+        self.session_stats: Optional[pstats.Stats] = None
+
+    def start(self, directory: str = "profiles"):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.enabled = True
+
+    def wrap(self, name: str, execute):
+        """execute, profiled under the given command name"""
+
+        def profiled(*args, **kwargs):
+            return self.run(name, execute, *args, **kwargs)
+
+        return profiled
+
+    def run(self, name: str, func, *args, **kwargs):
+        profile = cProfile.Profile()
+        timer = QueryTimer()
+        waits: List[float] = []
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        began = datetime.now()
+        started = time.perf_counter()
+        try:
+            with timer.activate(), _timed_prompts(waits, profile):
+                profile.enable()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    profile.disable()
+        finally:
+            wall = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1] - baseline if tracing else 0
+            record = {
+                "command": name,
+                "started": began,
+                "wall": wall,
+                "db": timer.seconds,
+                "queries": timer.count,
+                "input": sum(waits),
+                "render": max(wall - timer.seconds - sum(waits), 0.0),
+                "peak_bytes": peak,
+            }
+            self._save(record, profile)
+
+    def _save(self, record: Dict, profile: cProfile.Profile):
+        stats = pstats.Stats(profile)
+        if self.session_stats is None:
+            self.session_stats = pstats.Stats(profile)
+        else:
+            self.session_stats.add(profile)
+
+        safe_name = re.sub(r"[^A-Za-z0-9_-]", "_", record["command"])
+        base = os.path.join(
+            self.directory,
+            f"{record['started']:%Y%m%d-%H%M%S}-{len(self.records) + 1:03d}-{safe_name}",
+        )
+        record["report"] = base + ".txt"
+        self.records.append(record)
+        try:
+            stats.dump_stats(base + ".prof")
+            with open(record["report"], "w", encoding="utf-8") as report:
+                report.write(self.format_record(record))
+                report.write("\n")
+                stats.stream = report
+                stats.sort_stats("cumulative").print_stats(30)
+        except OSError as error:
+            logging.error("Could not write profile report: %s", str(error))
+
+    @staticmethod
+    def format_record(record: Dict) -> str:
+        return "\n".join(
+            [
+                f"Command:     {record['command']}",
+                f"Started:     {record['started']:%Y-%m-%d %H:%M:%S}",
+                f"Wall time:   {record['wall'] * 1000:9.1f} ms",
+                f"  Database:  {record['db'] * 1000:9.1f} ms"
+                f" ({record['queries']} queries)",
+                f"  Input:     {record['input'] * 1000:9.1f} ms",
+                f"  Render:    {record['render'] * 1000:9.1f} ms",
+                f"Peak memory: {record['peak_bytes'] / 1024:9.1f} KiB",
+            ]
+        )
+
+    def command_summary(self) -> List[Dict]:
+        """Per-command totals over the session, slowest total wall time first"""
+        totals: Dict[str, Dict] = {}
+        for record in self.records:
+            total = totals.setdefault(
+                record["command"],
+                {
+                    "command": record["command"],
+                    "runs": 0,
+                    "wall": 0.0,
+                    "db": 0.0,
+                    "input": 0.0,
+                    "render": 0.0,
+                    "peak_bytes": 0,
+                },
+            )
+            total["runs"] += 1
+            for field in ("wall", "db", "input", "render"):
+                total[field] += record[field]
+            total["peak_bytes"] = max(total["peak_bytes"], record["peak_bytes"])
+        return sorted(totals.values(), key=lambda t: t["wall"], reverse=True)
+
+    def hottest(self, limit: int = 15) -> List[Dict]:
+        """Functions with the most own time across the session"""
+        if self.session_stats is None:
+            return []
+        rows = []
+        for key, entry in self.session_stats.stats.items():
+            filename, line, function = key
+            _, calls, own, cumulative, _ = entry
+            if filename == "~":  # built-in function
+                label = function
+            else:
+                label = f"{function} ({os.path.basename(filename)}:{line})"
+            rows.append(
+                {
+                    "function": label,
+                    "calls": calls,
+                    "own": own,
+                    "cumulative": cumulative,
+                }
+            )
+        rows.sort(key=lambda row: row["own"], reverse=True)
+        return rows[:limit]
+
+
+# Singleton instance
+command_profiler = CommandProfiler()
@@ -5,19 +5,36 @@ from rich.table import Table
 from rich.prompt import Prompt, Confirm
 from rich import box
 from database import db_manager
+from case_access import case_access
+from active_cases import active_cases
+from local_mirror import local_mirror
+from prefetch import prefetcher
+from search import case_search
+from live_search import LiveCaseSearch
+from case_detail import case_details
+from categories import category_tree
+from court_stats import court_statistics
 import auth
 
 console = Console()
 
 
 class CommandContext:
-    def __init__(self):
+    def __init__(self, session=None):
         self.running = True
-        self.current_user = None
+        self.auth = session if session is not None else auth.AuthSession()
         self.current_menu = "main"
 
+    @property
+    def current_user(self):
+        return self.auth.user
+
+    @current_user.setter
+    def current_user(self, user):
+        self.auth.user = user
+
     def refresh_user(self):
-        """Update user data from auth system"""
+        """Adopt a login made through the global auth_manager (legacy callers)"""
         from auth import auth_manager
 
         self.current_user = auth_manager.get_current_user()
@@ -44,8 +61,7 @@ class LoginCommand(BaseCommand):
         email = Prompt.ask("Email")
         password = Prompt.ask("Password", password=True)
 
-        if auth.auth_manager.login(email, password):
-            context.current_user = auth.auth_manager.get_current_user()
+        if context.auth.login(email, password):
             console.print("\n[bold green]Login successful![/bold green]")
         else:
             console.print("\n[bold red]Invalid credentials[/bold red]")
@@ -59,12 +75,35 @@ class ExitCommand(BaseCommand):
 
 
 class ListProcessesCommand(BaseCommand):
+    prefetch_job = "cases"
+
+    @staticmethod
+    def fetch(user):
+        """Active cases for the user and a note on how current they are"""
+        if local_mirror.ready:
+            return local_mirror.active_cases(user), local_mirror.freshness()
+        if active_cases.available:
+            query, params = active_cases.query(user)
+        else:
+            where, params = case_access.scope(user, "p")
+            query = f"""SELECT a.* FROM processos_ativos a
+            JOIN processos p ON p.id = a.id
+            WHERE {where}
+            ORDER BY a.data_distribuicao DESC"""
+        processes = db_manager.execute_query(query, params, return_results=True)
+        return processes, active_cases.staleness(processes)
+
     def execute(self, context):
+        if not context.current_user:
+            console.print("\n[bold red]Not authenticated[/bold red]")
+            return
+
         try:
-            processes = db_manager.execute_query(
-                "SELECT * FROM processos_ativos ORDER BY data_distribuicao DESC",
-                return_results=True,
-            )
+            prefetched = prefetcher.get("cases", context.current_user)
+            if prefetched is not None:
+                processes, staleness = prefetched
+            else:
+                processes, staleness = self.fetch(context.current_user)
 
             if not processes:
                 console.print("\n[italic]No processes found[/italic]")
@@ -88,6 +127,8 @@ class ListProcessesCommand(BaseCommand):
                 )
 
             console.print(table)
+            if staleness:
+                console.print(f"[dim]{staleness}[/dim]")
         except Exception as e:
             logging.error("Process list error: %s", str(e))  # Fixed logging
             console.print("\n[bold red]Error loading processes[/bold red]")
@@ -95,19 +136,18 @@ class ListProcessesCommand(BaseCommand):
 
 class SearchCasesCommand(BaseCommand):
     def execute(self, context):
+        if not context.current_user:
+            console.print("\n[bold red]Not authenticated[/bold red]")
+            return
+
         self.display_header("Case Search")
         term = Prompt.ask("Enter case number/title/party")
 
         try:
-            results = db_manager.execute_query(
-                """SELECT p.* FROM processos p
-                LEFT JOIN partes_processo pp ON p.id = pp.processo_id
-                LEFT JOIN partes pa ON pp.parte_id = pa.id
-                WHERE p.numero_processo ILIKE %s OR p.titulo ILIKE %s OR pa.nome ILIKE %s
-                ORDER BY p.data_distribuicao DESC""",
-                (f"%{term}%", f"%{term}%", f"%{term}%"),
-                return_results=True,
-            )
+            if local_mirror.ready:
+                results = local_mirror.search(term, context.current_user)
+            else:
+                results = case_search.search(term, context.current_user)
 
             if not results:
                 console.print("\n[italic]No matches found[/italic]")
@@ -126,17 +166,239 @@ class SearchCasesCommand(BaseCommand):
                 )
 
             console.print(table)
+            if results.total > len(results):
+                approx = "~" if results.estimated else ""
+                console.print(
+                    f"[dim]Showing {len(results)} of {approx}{results.total} matches"
+                    " - refine the search to narrow them down[/dim]"
+                )
+            if local_mirror.ready:
+                console.print(f"[dim]{local_mirror.freshness()}[/dim]")
         except Exception as e:
             logging.error("Search error: %s", str(e))  # Fixed logging
             console.print("\n[bold red]Search failed[/bold red]")
 
 
+class LiveSearchCommand(BaseCommand):
+    """Search-as-you-type variant of SearchCasesCommand"""
+
+    # Draws with its own Live region and raw key input
+    owns_terminal = True
+
+    def execute(self, context):
+        if not context.current_user:
+            console.print("\n[bold red]Not authenticated[/bold red]")
+            return
+
+        self.display_header("Live Case Search")
+        try:
+            LiveCaseSearch(context.current_user, console=console).run()
+        except Exception as e:
+            logging.error("Live search error: %s", str(e))
+            console.print("\n[bold red]Search failed[/bold red]")
+
+
+class CasesByCategoryCommand(BaseCommand):
+    """List the user's cases filed under a category or any of its subcategories"""
+
+    def execute(self, context):
+        if not context.current_user:
+            console.print("\n[bold red]Not authenticated[/bold red]")
+            return
+
+        self.display_header("Cases by Category")
+        try:
+            categories = category_tree.walk()
+        except Exception as e:
+            logging.error("Category load error: %s", str(e))
+            console.print("\n[bold red]Error loading categories[/bold red]")
+            return
+
+        if not categories:
+            console.print("\n[italic]No categories registered[/italic]")
+            return
+
+        choices = {}
+        for number, (category, depth) in enumerate(categories, start=1):
+            choices[str(number)] = category["id"]
+            console.print(f"{'  ' * depth}[green]{number}[/green]. {category['nome']}")
+        choice = Prompt.ask("\nCategory", choices=list(choices.keys()))
+
+        category_sql, category_params = category_tree.case_filter(choices[choice], "p")
+        where, params = case_access.scope(context.current_user, "p")
+        try:
+            processes = db_manager.execute_query(
+                f"""SELECT p.numero_processo, p.titulo, p.status, p.data_distribuicao
+                FROM processos p
+                WHERE {category_sql} AND {where}
+                ORDER BY p.data_distribuicao DESC""",
+                (*category_params, *params),
+                return_results=True,
+            )
+        except Exception as e:
+            logging.error("Category case list error: %s", str(e))
+            console.print("\n[bold red]Error loading processes[/bold red]")
+            return
+
+        if not processes:
+            console.print("\n[italic]No processes found[/italic]")
+            return
+
+        table = self.build_table(
+            ("Case #", "cyan"), ("Title", "magenta"), ("Status", ""), ("Filed", "")
+        )
+        for p in processes:
+            table.add_row(
+                p["numero_processo"], p["titulo"], p["status"], str(p["data_distribuicao"])
+            )
+        console.print(table)
+
+
+class StatisticsDashboardCommand(BaseCommand):
+    """Case statistics rendered from one cached aggregate query"""
+
+    MONTHS_SHOWN = 12
+
+    def execute(self, context):
+        if not context.current_user:
+            console.print("\n[bold red]Not authenticated[/bold red]")
+            return
+
+        try:
+            stats = court_statistics.load(context.current_user)
+        except Exception as e:
+            logging.error("Statistics error: %s", str(e))
+            console.print("\n[bold red]Error loading statistics[/bold red]")
+            return
+
+        # Live/Layout machinery is only needed here; keep it out of startup
+        from from_rich3 import RichDashboard
+
+        dashboard = RichDashboard(title="JEC System - Statistics", console=console)
+        months = list(stats["por_mes"].items())[-self.MONTHS_SHOWN :]
+        console.print(dashboard.show_header())
+        overview = {
+            "Cases": str(stats["total"]),
+            "Total Claim Value": f"R$ {stats['valor_total']:,.2f}",
+            "Statuses": str(len(stats["por_status"])),
+        }
+        if months:
+            month, filed = months[-1]
+            overview[f"Filed {month:%Y-%m}"] = str(filed)
+        console.print(dashboard.show_stats(overview, title="Overview"))
+        console.print(
+            dashboard.show_panels(
+                [
+                    {
+                        "title": "By Status",
+                        "content": self._lines(stats["por_status"]),
+                        "type": "info",
+                        "icon": "",
+                    },
+                    {
+                        "title": "By Category",
+                        "content": self._lines(stats["por_categoria"]),
+                        "type": "success",
+                        "icon": "",
+                    },
+                ],
+                title="Case Counts",
+            )
+        )
+        for title, column, counts in (
+            ("Cases per Judge", "Judge", stats["por_juiz"]),
+            ("Filings per Month", "Month", {f"{m:%Y-%m}": n for m, n in months}),
+        ):
+            # show_table falls back to demo rows when given no data
+            if counts:
+                rows = [{column: key, "Cases": str(n)} for key, n in counts.items()]
+                console.print(dashboard.show_table(rows, title=title))
+
+    @staticmethod
+    def _lines(counts):
+        if not counts:
+            return "-"
+        ranked = sorted(counts.items(), key=lambda item: item[1], reverse=True)
+        return "\n".join(f"▶ {name}: {total}" for name, total in ranked)
+
+
+class CaseDetailCommand(BaseCommand):
+    def execute(self, context):
+        if not context.current_user:
+            console.print("\n[bold red]Not authenticated[/bold red]")
+            return
+
+        self.display_header("Case Details")
+        numero = Prompt.ask("Case number")
+
+        try:
+            case = case_details.load(numero, context.current_user)
+        except Exception as e:
+            logging.error("Case detail error: %s", str(e))
+            console.print("\n[bold red]Error loading case[/bold red]")
+            return
+
+        if not case:
+            console.print("\n[italic]Case not found[/italic]")
+            return
+
+        summary = self.build_table(("Field", "cyan"), ("Value", "magenta"))
+        category = " > ".join(case.get("categoria") or [])
+        if case.get("subcategoria"):
+            category = f"{category} > {case['subcategoria']}"
+        for label, value in (
+            ("Case #", case["numero_processo"]),
+            ("Title", case["titulo"]),
+            ("Status", case["status"]),
+            ("Category", category),
+            ("Claim Value", case["valor_causa"]),
+            ("Filed On", case["data_distribuicao"]),
+            ("Judge", case.get("juiz") or "-"),
+            ("Clerk", case.get("servidor") or "-"),
+            ("Description", case.get("descricao") or ""),
+        ):
+            summary.add_row(label, str(value))
+        console.print(summary)
+
+        parties = self.build_table(
+            ("Party", "cyan"), ("Role", ""), ("CPF/CNPJ", ""), ("Lawyer", "magenta")
+        )
+        for party in case.get("partes") or []:
+            role = party["tipo"] + (" (principal)" if party.get("principal") else "")
+            parties.add_row(
+                party["nome"], role, party["cpf_cnpj"], party.get("advogado") or "-"
+            )
+        console.print(parties)
+
+        documents = case.get("documentos") or []
+        if documents:
+            table = self.build_table(
+                ("Document", "cyan"), ("Type", ""), ("Sent", ""), ("Required", "")
+            )
+            for doc in documents:
+                table.add_row(
+                    doc["nome_arquivo"],
+                    doc["tipo"],
+                    str(doc.get("data_envio") or ""),
+                    "Yes" if doc.get("obrigatorio") else "No",
+                )
+            console.print(table)
+        else:
+            console.print("[italic]No documents[/italic]")
+
+
 class UserProfileCommand(BaseCommand):
+    prefetch_job = "profile"
+
     def execute(self, context):
-        user = auth.auth_manager.get_current_user()
+        user = context.current_user
         if not user:
             console.print("\n[bold red]Not authenticated[/bold red]")
             return
+        # A prefetched row includes changes made elsewhere, e.g. a new password
+        fresh = prefetcher.get("profile", user)
+        if fresh:
+            context.current_user = user = fresh
 
         table = self.build_table(("Field", "cyan"), ("Value", "magenta"))
 
@@ -174,7 +436,61 @@ class UserProfileCommand(BaseCommand):
                 "UPDATE usuarios SET senha = %s WHERE id = %s",
                 (new_hash, user["id"]),
             )
+            user["senha"] = new_hash  # the session's copy checks the next change
             console.print("\n[bold green]Password changed successfully![/bold green]")
         except Exception as error:
             logging.error("Password change failed: %s", str(error))
             console.print("\n[bold red]Failed to change password[/bold red]")
+
+
+class ProfileReportCommand(BaseCommand):
+    """Session summary of --profile mode: slowest commands, hottest functions"""
+
+    # Viewing the report is not itself worth profiling
+    profiled = False
+
+    def execute(self, context):
+        from command_profile import command_profiler
+
+        self.display_header("Profile Report")
+        summary = command_profiler.command_summary()
+        if not summary:
+            console.print("\n[italic]No commands profiled yet[/italic]")
+            return
+
+        table = self.build_table(
+            ("Command", "cyan"),
+            ("Runs", ""),
+            ("Wall ms", "magenta"),
+            ("DB ms", ""),
+            ("Input ms", ""),
+            ("Render ms", ""),
+            ("Peak KiB", ""),
+        )
+        for row in summary:
+            runs = row["runs"]
+            table.add_row(
+                row["command"],
+                str(runs),
+                f"{row['wall'] * 1000 / runs:.1f}",
+                f"{row['db'] * 1000 / runs:.1f}",
+                f"{row['input'] * 1000 / runs:.1f}",
+                f"{row['render'] * 1000 / runs:.1f}",
+                f"{row['peak_bytes'] / 1024:.1f}",
+            )
+        console.print("\n[bold]Average per run[/bold]")
+        console.print(table)
+
+        table = self.build_table(
+            ("Function", "cyan"), ("Calls", ""), ("Own ms", "magenta"), ("Cum ms", "")
+        )
+        for row in command_profiler.hottest():
+            table.add_row(
+                row["function"],
+                str(row["calls"]),
+                f"{row['own'] * 1000:.1f}",
+                f"{row['cumulative'] * 1000:.1f}",
+            )
+        console.print("\n[bold]Hottest functions this session[/bold]")
+        console.print(table)
+        console.print(f"[dim]Per-run reports in {command_profiler.directory}[/dim]")
@@ -7,21 +7,79 @@ This module handles all system configuration including:
 - Environment variable loading and validation
 - Default value management
 - Configuration state management
+- Typed, immutable snapshots (Settings) pushed to subscribers on reload()
 """
 
 import os
 import logging
-from typing import Dict, Any, Optional
-from dotenv import load_dotenv
+from dataclasses import dataclass, field, fields
+from typing import Callable, Dict, Any, List, Optional
+from dotenv import dotenv_values, load_dotenv
 from pathlib import Path
 
 
+def _flag(name: str, default: bool = False) -> bool:
+    """Boolean environment variable: 1, true or yes turn it on"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes")
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Typed snapshot of the configuration; field names are the keys, lowercased"""
+
+    db_host: str = "localhost"
+    db_port: str = "5432"
+    db_usuario: Optional[str] = None
+    db_senha: Optional[str] = field(default=None, repr=False)
+    db_nome: str = "jec_system"
+    db_schema: str = "jec"
+    db_min_connections: int = 1
+    db_max_connections: int = 5
+    db_checkout_timeout: float = 30.0
+    db_pool_autosize: bool = False
+    db_pool_wait_target_ms: int = 50
+    db_pool_idle_cooldown: int = 300
+    db_pool_autosize_interval: int = 10
+    log_level: str = "INFO"
+    log_file: str = "jec_system.log"
+    max_log_size: int = 1048576
+    log_backup_count: int = 3
+    session_timeout: int = 1800
+    password_reset_timeout: int = 3600
+    search_index_enabled: bool = False
+    mv_refresh_enabled: bool = False
+    mv_refresh_min_gap: int = 30
+    mv_refresh_max_age: int = 600
+    local_mirror_enabled: bool = False
+    local_mirror_path: str = "jec_mirror.db"
+    local_mirror_interval: int = 30
+    prefetch_enabled: bool = False
+    prefetch_ttl: int = 15
+    case_detail_cache_ttl: int = 900
+    case_detail_cache_size: int = 512
+    stats_cache_ttl: int = 300
+
+    @classmethod
+    def from_mapping(cls, values: Dict[str, Any]) -> "Settings":
+        known = {f.name: values[f.name.upper()] for f in fields(cls)}
+        return cls(**known)
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        """Snapshot of the current environment, without validation"""
+        return cls.from_mapping(ConfigManager._read_environment())
+
+
 class ConfigManager:
     """Centralized configuration management for the application"""
 
     _instance = None
     _config: Dict[str, Any] = {}
     _initialized = False  # Move this to class level
+    _process_keys = None  # environment variables not set by .env
 
     def __new__(cls):
         """Implement singleton pattern"""
@@ -36,48 +94,96 @@ class ConfigManager:
             return
 
         self.__class__._initialized = True  # Set class-level attribute
+        self._listeners: List[Callable[[Settings], None]] = []
         self._load_configuration()
         self._validate_configuration()
 
     def _load_configuration(self):
         """Load configuration from environment variables"""
+        self._load_environment_files()
+        self._config.update(self._read_environment())
+        self._settings = Settings.from_mapping(self._config)
+
+    @staticmethod
+    def _env_path() -> Optional[Path]:
         # Try to load from .env file in project root
         env_path = Path(__file__).parent.parent / ".env"
-        if env_path.exists():
+        return env_path if env_path.exists() else None
+
+    def _load_environment_files(self):
+        if self.__class__._process_keys is None:
+            self.__class__._process_keys = frozenset(os.environ)
+        env_path = self._env_path()
+        if env_path:
             load_dotenv(env_path)
         else:
             load_dotenv()
 
+    def _reload_environment_files(self):
+        """Re-read .env, letting edits replace the values it set earlier
+
+        Variables that came from the process environment still win.
+        """
+        for key, value in dotenv_values(self._env_path()).items():
+            if value is not None and key not in (self._process_keys or ()):
+                os.environ[key] = value
+
+    @staticmethod
+    def _read_environment() -> Dict[str, Any]:
+        """Typed values of every setting from the environment"""
         # Database configuration
-        self._config.update(
-            {
-                "DB_HOST": os.getenv("DB_HOST", "localhost"),
-                "DB_PORT": os.getenv("DB_PORT", "5432"),
-                "DB_USUARIO": os.getenv("DB_USUARIO"),
-                "DB_SENHA": os.getenv("DB_SENHA"),
-                "DB_NOME": os.getenv("DB_NOME", "jec_system"),
-                "DB_SCHEMA": os.getenv("DB_SCHEMA", "jec"),
-                "DB_MIN_CONNECTIONS": int(os.getenv("DB_MIN_CONNECTIONS", "1")),
-                "DB_MAX_CONNECTIONS": int(os.getenv("DB_MAX_CONNECTIONS", "5")),
-                # Application configuration
-                "LOG_LEVEL": os.getenv("LOG_LEVEL", "INFO"),
-                "LOG_FILE": os.getenv("LOG_FILE", "jec_system.log"),
-                "MAX_LOG_SIZE": int(os.getenv("MAX_LOG_SIZE", "1048576")),  # 1MB
-                "LOG_BACKUP_COUNT": int(os.getenv("LOG_BACKUP_COUNT", "3")),
-                # Security configuration
-                "SESSION_TIMEOUT": int(
-                    os.getenv("SESSION_TIMEOUT", "1800")
-                ),  # 30 minutes
-                "PASSWORD_RESET_TIMEOUT": int(
-                    os.getenv("PASSWORD_RESET_TIMEOUT", "3600")
-                ),  # 1 hour
-            }
-        )
-
-    def _validate_configuration(self):
+        return {
+            "DB_HOST": os.getenv("DB_HOST", "localhost"),
+            "DB_PORT": os.getenv("DB_PORT", "5432"),
+            "DB_USUARIO": os.getenv("DB_USUARIO"),
+            "DB_SENHA": os.getenv("DB_SENHA"),
+            "DB_NOME": os.getenv("DB_NOME", "jec_system"),
+            "DB_SCHEMA": os.getenv("DB_SCHEMA", "jec"),
+            "DB_MIN_CONNECTIONS": int(os.getenv("DB_MIN_CONNECTIONS", "1")),
+            "DB_MAX_CONNECTIONS": int(os.getenv("DB_MAX_CONNECTIONS", "5")),
+            # Seconds a query waits for a free pooled connection
+            "DB_CHECKOUT_TIMEOUT": float(os.getenv("DB_CHECKOUT_TIMEOUT", "30")),
+            # Adaptive pool size between DB_MIN_CONNECTIONS and DB_MAX_CONNECTIONS
+            "DB_POOL_AUTOSIZE": _flag("DB_POOL_AUTOSIZE"),
+            "DB_POOL_WAIT_TARGET_MS": int(os.getenv("DB_POOL_WAIT_TARGET_MS", "50")),
+            "DB_POOL_IDLE_COOLDOWN": int(os.getenv("DB_POOL_IDLE_COOLDOWN", "300")),
+            "DB_POOL_AUTOSIZE_INTERVAL": int(
+                os.getenv("DB_POOL_AUTOSIZE_INTERVAL", "10")
+            ),
+            # Application configuration
+            "LOG_LEVEL": os.getenv("LOG_LEVEL", "INFO"),
+            "LOG_FILE": os.getenv("LOG_FILE", "jec_system.log"),
+            "MAX_LOG_SIZE": int(os.getenv("MAX_LOG_SIZE", "1048576")),  # 1MB
+            "LOG_BACKUP_COUNT": int(os.getenv("LOG_BACKUP_COUNT", "3")),
+            # Security configuration
+            "SESSION_TIMEOUT": int(os.getenv("SESSION_TIMEOUT", "1800")),  # 30 minutes
+            "PASSWORD_RESET_TIMEOUT": int(
+                os.getenv("PASSWORD_RESET_TIMEOUT", "3600")
+            ),  # 1 hour
+            # Search configuration
+            "SEARCH_INDEX_ENABLED": _flag("SEARCH_INDEX_ENABLED"),
+            # Materialized active-case list (migration 0007)
+            "MV_REFRESH_ENABLED": _flag("MV_REFRESH_ENABLED"),
+            "MV_REFRESH_MIN_GAP": int(os.getenv("MV_REFRESH_MIN_GAP", "30")),
+            "MV_REFRESH_MAX_AGE": int(os.getenv("MV_REFRESH_MAX_AGE", "600")),
+            # Local read-only SQLite mirror for slow networks
+            "LOCAL_MIRROR_ENABLED": _flag("LOCAL_MIRROR_ENABLED"),
+            "LOCAL_MIRROR_PATH": os.getenv("LOCAL_MIRROR_PATH", "jec_mirror.db"),
+            "LOCAL_MIRROR_INTERVAL": int(os.getenv("LOCAL_MIRROR_INTERVAL", "30")),
+            # Idle-time prefetch of the next screens while at the menu
+            "PREFETCH_ENABLED": _flag("PREFETCH_ENABLED"),
+            "PREFETCH_TTL": int(os.getenv("PREFETCH_TTL", "15")),
+            # Cache sizes and lifetimes
+            "CASE_DETAIL_CACHE_TTL": int(os.getenv("CASE_DETAIL_CACHE_TTL", "900")),
+            "CASE_DETAIL_CACHE_SIZE": int(os.getenv("CASE_DETAIL_CACHE_SIZE", "512")),
+            "STATS_CACHE_TTL": int(os.getenv("STATS_CACHE_TTL", "300")),
+        }
+
+    def _validate_configuration(self, values: Optional[Dict[str, Any]] = None):
         """Validate required configuration values"""
+        values = self._config if values is None else values
         required = ["DB_USUARIO", "DB_SENHA", "DB_NOME"]
-        missing = [var for var in required if not self._config.get(var)]
+        missing = [var for var in required if not values.get(var)]
 
         if missing:
             error_msg = (
@@ -93,12 +199,35 @@ class ConfigManager:
     def set(self, key: str, value: Any):
         """Set configuration value (for testing purposes)"""
         self._config[key] = value
+        if key.lower() in {f.name for f in fields(Settings)}:
+            self._settings = Settings.from_mapping(self._config)
+
+    @property
+    def settings(self) -> Settings:
+        """The current typed snapshot; replaced, never modified, by reload()"""
+        return self._settings
+
+    def subscribe(self, listener: Callable[[Settings], None]):
+        """Call listener(settings) with each snapshot reload() produces"""
+        self._listeners.append(listener)
 
     def reload(self):
-        """Reload configuration from environment"""
+        """Reload configuration from environment and notify subscribers
+
+        An invalid environment raises ValueError and leaves the current
+        configuration in place.
+        """
+        self._reload_environment_files()
+        values = self._read_environment()
+        self._validate_configuration(values)
         self._config.clear()
-        self._load_configuration()
-        self._validate_configuration()
+        self._config.update(values)
+        self._settings = Settings.from_mapping(values)
+        for listener in list(self._listeners):
+            try:
+                listener(self._settings)
+            except Exception as error:
+                logging.error("Applying reloaded configuration failed: %s", str(error))
 
 
 # Singleton instance
@@ -0,0 +1,95 @@
+"""
+Court statistics for JEC System
+
+Every dashboard figure comes from one GROUPING SETS query, i.e. a single
+pass over processos: case counts by status, category, judge and filing
+month, plus the overall count and total valor_causa. The GROUPING() flags
+tell which set each row belongs to. Results are cached with a TTL, so
+opening the dashboard repeatedly costs nothing until the cache expires.
+
+Judges and clerks see court-wide figures, which all of them share through
+one cache entry. Every other role only sees aggregates over its own cases.
+"""
+
+from decimal import Decimal
+from typing import Dict, Optional
+from cache import TTLCache
+from case_access import STAFF_COLUMNS, case_access
+from database import db_manager
+
+_STATS_QUERY = """SELECT
+    GROUPING(p.status) = 0 AS por_status,
+    GROUPING(c.nome) = 0 AS por_categoria,
+    GROUPING(p.juiz_id) = 0 AS por_juiz,
+    GROUPING(date_trunc('month', p.data_distribuicao)) = 0 AS por_mes,
+    p.status,
+    c.nome AS categoria,
+    p.juiz_id,
+    MAX(u.nome_completo) AS juiz,
+    date_trunc('month', p.data_distribuicao)::date AS mes,
+    COUNT(*) AS total,
+    COALESCE(SUM(p.valor_causa), 0) AS valor_total
+FROM processos p
+LEFT JOIN categorias_causas c ON c.id = p.categoria_id
+LEFT JOIN usuarios u ON u.id = p.juiz_id
+WHERE {scope}
+GROUP BY GROUPING SETS (
+    (p.status),
+    (c.nome),
+    (p.juiz_id),
+    (date_trunc('month', p.data_distribuicao)),
+    ()
+)"""
+
+
+class CourtStatistics:
+    """Cached case aggregates for the statistics dashboard"""
+
+    def __init__(self, ttl: float = 300.0):
+        self._cache = TTLCache(ttl=ttl, maxsize=64)
+
+    def load(self, user: Optional[Dict]) -> Dict:
+        """Aggregates visible to the user, computed at most once per TTL"""
+        if user and user.get("tipo") in STAFF_COLUMNS:
+            return self._cache.get_or_load("court", lambda: self._compute("TRUE", ()))
+        where, params = case_access.scope(user, "p")
+        key = user["id"] if user else None
+        return self._cache.get_or_load(key, lambda: self._compute(where, params))
+
+    def configure(self, ttl: float):
+        self._cache.configure(ttl=ttl)
+
+    def invalidate(self):
+        self._cache.invalidate()
+
+    @staticmethod
+    def _compute(where: str, params: tuple) -> Dict:
+        rows = db_manager.execute_query(
+            _STATS_QUERY.format(scope=where), params, return_results=True
+        )
+        stats = {
+            "total": 0,
+            "valor_total": Decimal(0),
+            "por_status": {},
+            "por_categoria": {},
+            "por_juiz": {},
+            "por_mes": {},
+        }
+        for row in rows:
+            if row["por_status"]:
+                stats["por_status"][row["status"]] = row["total"]
+            elif row["por_categoria"]:
+                stats["por_categoria"][row["categoria"] or "-"] = row["total"]
+            elif row["por_juiz"]:
+                stats["por_juiz"][row["juiz"] or "Unassigned"] = row["total"]
+            elif row["por_mes"]:
+                stats["por_mes"][row["mes"]] = row["total"]
+            else:
+                stats["total"] = row["total"]
+                stats["valor_total"] = row["valor_total"]
+        stats["por_mes"] = dict(sorted(stats["por_mes"].items()))
+        return stats
+
+
+# Singleton instance
+court_statistics = CourtStatistics()
@@ -1,15 +1,173 @@
 "mod docstring to be impl"
 
-import os
 import logging
-from typing import Optional, List, Dict, Any
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Optional, List, Dict, Any, Deque, Iterator, Tuple
 from psycopg2 import pool
 from psycopg2 import OperationalError, Error
-from dotenv import load_dotenv
+from psycopg2.extensions import QueryCanceledError
 
+if TYPE_CHECKING:
+    from config import Settings
 
-# Initialize environment variables
-load_dotenv()
+
+class PoolExhausted(pool.PoolError):
+    """No connection came back within DatabaseManager.checkout_timeout"""
+
+
+# Lowest possible id, paired with transaction 0 as the start of a change feed
+_NIL_UUID = "00000000-0000-0000-0000-000000000000"
+
+
+class CancelToken:
+    """Lets another thread abort the query a worker thread is running
+
+    The worker activates the token around its database calls; execute_query
+    binds the connection in use so cancel() can interrupt it server-side.
+    """
+
+    _local = threading.local()
+
+    def __init__(self):
+        self.cancelled = False
+        self._conn = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def current(cls) -> Optional["CancelToken"]:
+        return getattr(cls._local, "token", None)
+
+    @contextmanager
+    def activate(self):
+        previous = self.current()
+        self._local.token = self
+        try:
+            yield self
+        finally:
+            self._local.token = previous
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+            if self._conn is not None:
+                self._conn.cancel()
+
+    def bind(self, conn):
+        with self._lock:
+            if self.cancelled:
+                raise QueryCanceledError("canceling statement due to user request")
+            self._conn = conn
+
+    def unbind(self):
+        with self._lock:
+            self._conn = None
+
+
+class _Slots:
+    """Counting semaphore whose limit can change while slots are held
+
+    Also records, for PoolAutosizer, how long each acquire() waited and the
+    most slots held at once since the last take_stats().
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_use = 0
+        self.peak = 0
+        # Bounded: nobody drains it unless the autosizer runs
+        self._waits: Deque[float] = deque(maxlen=4096)
+        self._cond = threading.Condition()
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        started = time.perf_counter()
+        with self._cond:
+            acquired = self._cond.wait_for(lambda: self.in_use < self.limit, timeout)
+            self._waits.append(time.perf_counter() - started)
+            if not acquired:
+                return False
+            self.in_use += 1
+            self.peak = max(self.peak, self.in_use)
+            return True
+
+    def release(self):
+        with self._cond:
+            self.in_use -= 1
+            self._cond.notify()
+
+    def resize(self, limit: int):
+        with self._cond:
+            self.limit = limit
+            self._cond.notify_all()
+
+    def take_stats(self) -> Dict[str, Any]:
+        """Waits and peak use since the previous call, then start over"""
+        with self._cond:
+            stats = {
+                "limit": self.limit,
+                "in_use": self.in_use,
+                "peak": self.peak,
+                "waits": list(self._waits),
+            }
+            self._waits.clear()
+            self.peak = self.in_use
+            return stats
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def _server_params(settings) -> Tuple:
+    return (
+        settings.db_host,
+        settings.db_port,
+        settings.db_usuario,
+        settings.db_senha,
+        settings.db_nome,
+        settings.db_schema,
+    )
+
+
+class QueryTimer:
+    """Adds up the time the current thread spends in database calls
+
+    Activated around a unit of work (e.g. one command); execute_query and
+    iter_query report each call's elapsed time to the active timer, which
+    passes it on to any timer active outside it.
+    """
+
+    _local = threading.local()
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self._outer: Optional["QueryTimer"] = None
+
+    @classmethod
+    def current(cls) -> Optional["QueryTimer"]:
+        return getattr(cls._local, "timer", None)
+
+    @contextmanager
+    def activate(self):
+        previous = self.current()
+        self._outer, self._local.timer = previous, self
+        try:
+            yield self
+        finally:
+            self._outer, self._local.timer = None, previous
+
+    def add(self, seconds: float, queries: int = 1):
+        self.count += queries
+        self.seconds += seconds
+        if self._outer is not None:
+            self._outer.add(seconds, queries)
 
 
 class DatabaseManager:
@@ -17,38 +175,124 @@ class DatabaseManager:
 
     _connection_pool: pool.SimpleConnectionPool = None
     _reconnect_attempts = 3
+    checkout_timeout = 30.0
 
-    def __init__(self):
-        self._initialize_pool()
+    def __init__(self, lazy: bool = False, settings: Optional["Settings"] = None):
+        # config.Settings snapshot; read from the environment when not given
+        self.settings = settings
+        # SimpleConnectionPool is not thread-safe; background work shares it
+        self._pool_lock = threading.Lock()
+        # One slot per pooled connection: callers queue for a free slot
+        # instead of getting PoolError when every connection is in use
+        self._slots: Optional[_Slots] = None
+        # Pool each checked-out connection came from, and pools replaced by
+        # reconfigure() with the number of connections they are still owed
+        self._owners: Dict[int, Any] = {}
+        self._retired: Dict[Any, int] = {}
+        if not lazy:
+            self._initialize_pool()
 
     def _initialize_pool(self):
-        """Create connection pool using environment variables"""
+        """Create connection pool from the configuration snapshot"""
         if not self._connection_pool:
+            if self.settings is None:
+                # Importing config loads .env into the environment once per process
+                from config import Settings
+
+                self.settings = Settings.from_env()
+            self.checkout_timeout = self.settings.db_checkout_timeout
+
             try:
-                # Convert string env vars to int for connection settings
-                min_connections = int(os.getenv("DB_MIN_CONNECTIONS", "1"))
-                max_connections = int(os.getenv("DB_MAX_CONNECTIONS", "5"))
-
-                self._connection_pool = pool.SimpleConnectionPool(
-                    minconn=min_connections,
-                    maxconn=max_connections,
-                    host=os.getenv("DB_HOST"),
-                    port=os.getenv("DB_PORT"),
-                    user=os.getenv("DB_USUARIO"),
-                    password=os.getenv("DB_SENHA"),
-                    database=os.getenv("DB_NOME"),
-                    options=f"-c search_path={os.getenv('DB_SCHEMA', 'jec')}",
-                )
+                self._connection_pool = self._create_pool(self.settings)
+                self._slots = _Slots(self.settings.db_max_connections)
                 logging.info("Database connection pool initialized successfully")
             except Exception as exc:
                 logging.critical("Database connection failed: %s", str(exc))
                 raise
 
+    @staticmethod
+    def _create_pool(settings) -> pool.SimpleConnectionPool:
+        return pool.SimpleConnectionPool(
+            minconn=settings.db_min_connections,
+            maxconn=settings.db_max_connections,
+            host=settings.db_host,
+            port=settings.db_port,
+            user=settings.db_usuario,
+            password=settings.db_senha,
+            database=settings.db_nome,
+            options=f"-c search_path={settings.db_schema}",
+        )
+
+    def reconfigure(self, settings: "Settings"):
+        """Apply a new configuration snapshot without dropping queries in flight
+
+        A new size is applied to the running pool: with a smaller maximum,
+        new checkouts wait until enough connections have come back. A new
+        server, login or schema builds a new pool for new checkouts;
+        connections still out on the old one are closed as they come back.
+        """
+        previous, self.settings = self.settings, settings
+        self.checkout_timeout = settings.db_checkout_timeout
+        if self._connection_pool is None:
+            return  # the pool is created from these settings on first use
+
+        if previous is not None and _server_params(previous) == _server_params(
+            settings
+        ):
+            with self._pool_lock:
+                self._connection_pool.minconn = settings.db_min_connections
+                self._connection_pool.maxconn = settings.db_max_connections
+            self._slots.resize(settings.db_max_connections)
+            logging.info(
+                "Database pool resized to %d-%d connections",
+                settings.db_min_connections,
+                settings.db_max_connections,
+            )
+            return
+
+        try:
+            replacement = self._create_pool(settings)
+        except Exception as exc:
+            self.settings = previous
+            logging.error("Database pool rebuild failed: %s", str(exc))
+            raise
+        with self._pool_lock:
+            retired, self._connection_pool = self._connection_pool, replacement
+            owed = sum(1 for owner in self._owners.values() if owner is retired)
+            if owed:
+                self._retired[retired] = owed
+            else:
+                retired.closeall()
+        self._slots.resize(settings.db_max_connections)
+        logging.info("Database pool rebuilt for %s", settings.db_host)
+
+    def resize_pool(self, limit: int):
+        """Allow `limit` connections at once and keep up to that many idle
+
+        Connections idle beyond the new limit are closed now; with a lower
+        limit, new checkouts wait until enough busy ones have come back.
+        """
+        if self._connection_pool is None:
+            return
+        with self._pool_lock:
+            # psycopg2 keeps up to minconn returned connections open for reuse
+            self._connection_pool.minconn = limit
+            idle = self._connection_pool._pool  # its list of idle connections
+            while len(idle) > limit:
+                idle.pop(0).close()
+        self._slots.resize(limit)
+
     def _get_connection(self):
         """Get a connection from the pool with retry logic"""
         for attempt in range(self._reconnect_attempts):
             try:
-                return self._connection_pool.getconn()
+                with self._pool_lock:
+                    # Lazy managers connect on first use
+                    self._initialize_pool()
+                return self._checkout()
+            except PoolExhausted:
+                logging.error("No database connection freed up in time")
+                raise
             except (OperationalError, pool.PoolError):  # Removed unused exc variable
                 if attempt < self._reconnect_attempts - 1:
                     logging.warning(
@@ -58,38 +302,306 @@ class DatabaseManager:
                 logging.error("Maximum connection attempts reached")
                 raise
 
+    def _checkout(self):
+        """Take a connection, waiting for one to be returned if all are in use"""
+        if not self._slots.acquire(timeout=self.checkout_timeout):
+            raise PoolExhausted("Timed out waiting for a free database connection")
+        try:
+            with self._pool_lock:
+                conn = self._connection_pool.getconn()
+                self._owners[id(conn)] = self._connection_pool
+                return conn
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _put_connection(self, conn):
+        with self._pool_lock:
+            owner = self._owners.pop(id(conn), self._connection_pool)
+            if owner is self._connection_pool:
+                owner.putconn(conn)
+            else:
+                # Checked out before reconfigure() replaced its pool
+                owner.putconn(conn, close=True)
+                owed = self._retired.pop(owner, 1) - 1
+                if owed > 0:
+                    self._retired[owner] = owed
+                else:
+                    owner.closeall()
+        self._slots.release()
+
     def execute_query(
         self, query: str, params: Optional[tuple] = None, return_results: bool = False
     ) -> Optional[List[Dict[str, Any]]]:
         """Execute SQL query with parameters and optional result return"""
         conn = None
+        token = CancelToken.current()
+        timer = QueryTimer.current()
+        started = time.perf_counter()
         try:
             conn = self._get_connection()
+            if token:
+                token.bind(conn)
             with conn.cursor() as cur:
                 cur.execute(query, params)
 
+                results = None
                 if return_results:
                     columns = [desc[0] for desc in cur.description]
-                    return [dict(zip(columns, row)) for row in cur.fetchall()]
+                    results = [dict(zip(columns, row)) for row in cur.fetchall()]
 
+                # Commit reads too, so functions with side effects are kept
                 conn.commit()
-                return None
+                return results
 
+        except QueryCanceledError:
+            logging.debug("Query cancelled")
+            if conn:
+                conn.rollback()
+            raise
         except Error as exc:
             logging.error("Database error: %s", str(exc))
             if conn:
                 conn.rollback()
             raise
         finally:
+            if token:
+                token.unbind()
             if conn:
-                self._connection_pool.putconn(conn)
+                self._put_connection(conn)
+            if timer:
+                timer.add(time.perf_counter() - started)
+
+    def iter_query(
+        self, query: str, params: Optional[tuple] = None, batch_size: int = 2000
+    ) -> Iterator[Dict[str, Any]]:
+        """Stream rows through a server-side cursor, batch_size rows at a time"""
+        timer = QueryTimer.current()
+        started = time.perf_counter()
+        spent = 0.0  # time in this generator, not in the consumer
+        conn = self._get_connection()
+        try:
+            with conn.cursor(name=f"jec_stream_{uuid.uuid4().hex}") as cur:
+                cur.itersize = batch_size
+                cur.execute(query, params)
+                columns = None
+                for row in cur:
+                    if columns is None:
+                        columns = [desc[0] for desc in cur.description]
+                    spent += time.perf_counter() - started
+                    yield dict(zip(columns, row))
+                    started = time.perf_counter()
+            conn.commit()
+        except Error as exc:
+            logging.error("Database error: %s", str(exc))
+            conn.rollback()
+            raise
+        finally:
+            self._put_connection(conn)
+            if timer:
+                timer.add(spent + time.perf_counter() - started)
+
+    def fetch_changes(
+        self,
+        source: str = "processos",
+        watermark: Optional[Tuple] = None,
+        limit: int = 1000,
+    ) -> List[Dict[str, Any]]:
+        """Rows of `source` changed after `watermark`, in commit-safe order
+
+        `source` is a table or subquery exposing transacao (the id of the
+        transaction that last wrote the row, migration 0010) and id; the
+        (transacao, id) keyset is served by an index on both columns. Only
+        rows of transactions older than the snapshot's xmin are returned:
+        those have all finished, and any transaction still running has a
+        higher id, so its rows land after the watermark when it commits.
+        """
+        last_xact, last_id = watermark or (0, _NIL_UUID)
+        return self.execute_query(
+            f"""SELECT * FROM {source} feed
+            WHERE (feed.transacao, feed.id) > (%s, %s::uuid)
+            AND feed.transacao < txid_snapshot_xmin(txid_current_snapshot())
+            ORDER BY feed.transacao, feed.id
+            LIMIT %s""",
+            (last_xact, str(last_id), limit),
+            return_results=True,
+        )
+
+    def load_watermark(self, consumer: str) -> Optional[Tuple]:
+        """Last (transacao, id) stored for a feed consumer"""
+        rows = self.execute_query(
+            "SELECT transacao, id FROM feed_watermarks WHERE consumidor = %s",
+            (consumer,),
+            return_results=True,
+        )
+        return (rows[0]["transacao"], rows[0]["id"]) if rows else None
+
+    def save_watermark(self, consumer: str, watermark: Tuple):
+        self.execute_query(
+            """INSERT INTO feed_watermarks (consumidor, transacao, id)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (consumidor) DO UPDATE
+            SET transacao = EXCLUDED.transacao, id = EXCLUDED.id,
+                gravado_em = CURRENT_TIMESTAMP""",
+            (consumer, watermark[0], str(watermark[1])),
+        )
+
+    @contextmanager
+    def transaction(self):
+        """Hold one pooled connection for a multi-statement unit of work
+
+        Needed for session state such as temporary tables and COPY. Commits
+        on success and rolls back if the block raises.
+        """
+        conn = self._get_connection()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self._put_connection(conn)
 
     def close_all_connections(self):
         """Close all connections in the pool"""
+        for retired in list(self._retired):
+            retired.closeall()
+        self._retired.clear()
         if self._connection_pool:
             self._connection_pool.closeall()
             logging.info("All database connections closed")
 
 
-# Singleton instance for easy access
-db_manager = DatabaseManager()
+class ChangeFeed:
+    """One consumer's position in DatabaseManager.fetch_changes
+
+    Iterating batches() yields pages of changed rows. The watermark moves
+    past a page only once the consumer asks for the next one, so a consumer
+    that fails mid-page sees that page again (at-least-once delivery).
+    Persistent consumers keep their watermark in feed_watermarks; in-memory
+    ones (e.g. caches rebuilt at startup) start from the beginning.
+    """
+
+    def __init__(
+        self,
+        consumer: str,
+        source: str = "processos",
+        persist: bool = True,
+        batch_size: int = 1000,
+    ):
+        self.consumer = consumer
+        self.source = source
+        self.persist = persist
+        self.batch_size = batch_size
+        self.watermark: Optional[Tuple] = None
+        self._loaded = False
+
+    def reset(self, watermark: Optional[Tuple] = None):
+        self.watermark = watermark
+        self._loaded = True
+        if self.persist and watermark is not None:
+            db_manager.save_watermark(self.consumer, watermark)
+
+    def batches(self) -> Iterator[List[Dict[str, Any]]]:
+        """Pages of changes until caught up"""
+        if not self._loaded:
+            if self.persist:
+                self.watermark = db_manager.load_watermark(self.consumer)
+            self._loaded = True
+        while True:
+            rows = db_manager.fetch_changes(
+                self.source, self.watermark, self.batch_size
+            )
+            if not rows:
+                return
+            yield rows
+            last = rows[-1]
+            self.reset((last["transacao"], last["id"]))
+            if len(rows) < self.batch_size:
+                return
+
+
+class PoolAutosizer:
+    """Moves the pool's connection limit with observed demand
+
+    Every DB_POOL_AUTOSIZE_INTERVAL seconds it looks at the checkouts since
+    the previous look:
+    - grow: when the 95th-percentile wait for a connection was above
+      DB_POOL_WAIT_TARGET_MS, the limit rises by half (at least one)
+    - shrink: when for DB_POOL_IDLE_COOLDOWN seconds nobody waited and never
+      every connection was busy at once, the limit drops by one and the idle
+      connection it no longer allows is closed
+    The limit stays between DB_MIN_CONNECTIONS and DB_MAX_CONNECTIONS, read
+    from the manager's settings on every look, so reloads apply. Sizing
+    starts from (and a reload resets it to) DB_MAX_CONNECTIONS.
+    """
+
+    def __init__(self, db: DatabaseManager):
+        self.db = db
+        self._last_busy = time.monotonic()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def tick(self, now: Optional[float] = None) -> Optional[int]:
+        """Take one sizing decision; returns the limit in force afterwards"""
+        slots = self.db._slots
+        if slots is None or self.db.settings is None:
+            return None  # no pool yet
+        now = time.monotonic() if now is None else now
+        settings = self.db.settings
+        low, high = settings.db_min_connections, settings.db_max_connections
+        stats = slots.take_stats()
+        limit = stats["limit"]
+        p95 = _percentile(stats["waits"], 0.95)
+        waited = p95 > settings.db_pool_wait_target_ms / 1000
+
+        target = limit
+        if waited or stats["peak"] >= limit:
+            self._last_busy = now
+            if waited:
+                target = limit + max(1, limit // 2)
+        elif now - self._last_busy >= settings.db_pool_idle_cooldown:
+            self._last_busy = now  # next step down after another cooldown
+            target = limit - 1
+        target = max(low, min(high, target))
+
+        if target != limit:
+            self.db.resize_pool(target)
+            logging.info(
+                "Database pool limit %d -> %d (p95 wait %.1f ms, peak %d in use)",
+                limit,
+                target,
+                p95 * 1000,
+                stats["peak"],
+            )
+        return target
+
+    def run_once(self):
+        try:
+            self.tick()
+        except Exception as exc:
+            logging.error("Database pool autosize failed: %s", str(exc))
+
+    def start(self) -> threading.Thread:
+        def loop():
+            while not self._stop.wait(self._interval()):
+                self.run_once()
+
+        self._stop.clear()
+        self._last_busy = time.monotonic()
+        self._thread = threading.Thread(target=loop, name="pool-autosize", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def _interval(self) -> float:
+        settings = self.db.settings
+        return settings.db_pool_autosize_interval if settings else 10.0
+
+    def stop(self):
+        self._stop.set()
+
+
+# Singleton instance for easy access; connects on the first query
+db_manager = DatabaseManager(lazy=True)
+pool_autosizer = PoolAutosizer(db_manager)
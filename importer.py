@@ -0,0 +1,547 @@
+"""
+Bulk case import for JEC System (PJe / Esaj exports)
+
+Export files are read with streaming parsers, so their size never matters:
+- CSV: one row per case/party pair; consecutive rows of the same case are
+  grouped (party columns are prefixed with parte_)
+- JSON: an array of cases or JSON Lines, decoded object by object
+- XML: <processo> elements read with iterparse; each is cleared and
+  removed from its parent once handled
+
+Cases are normalized and validated in a process pool, in chunks. Each
+batch of cases is then loaded on a single connection:
+1. parties are resolved to partes.id by digits-only CPF/CNPJ through a
+   cache that survives across batches, with one query per batch for misses
+2. cases, new parties and case/party links are COPYed into temporary
+   staging tables
+3. cases breaking the valor_causa limits are rejected with one set-based
+   check (validation.ValorCausaValidator)
+4. a few INSERT ... SELECT statements merge staging into the real tables,
+   skipping cases that already exist, so re-running an import is safe
+
+Each batch commits on its own, so an overnight run keeps its progress.
+
+Run `python importer.py export.csv --workers 4` to import a file.
+"""
+
+import argparse
+import csv
+import io
+import json
+import logging
+import os
+import uuid
+import xml.etree.ElementTree as ElementTree
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from cache import TTLCache
+from categories import category_tree
+from database import db_manager
+from normalization import (
+    TERM_CNJ,
+    classify_term,
+    digits_only,
+    is_valid_cnpj,
+    is_valid_cpf,
+    sql_digits_only,
+)
+from search_index import fold
+from validation import valor_causa_validator
+
+BATCH_SIZE = 20000
+CHUNK_SIZE = 1000
+
+CASE_FIELDS = (
+    "numero_processo",
+    "titulo",
+    "descricao",
+    "categoria",
+    "subcategoria",
+    "valor_causa",
+    "data_distribuicao",
+    "status",
+)
+REQUIRED_FIELDS = ("numero_processo", "titulo", "categoria", "valor_causa", "status")
+PARTY_FIELDS = ("nome", "cpf_cnpj", "tipo", "papel", "principal")
+STAGED_CASE_COLUMNS = (
+    "id",
+    "numero_processo",
+    "numero_digitos",
+    "titulo",
+    "descricao",
+    "categoria_id",
+    "subcategoria_id",
+    "valor_causa",
+    "data_distribuicao",
+    "status",
+)
+
+_STAGING = """
+CREATE TEMP TABLE stg_processos (
+    id UUID, numero_processo VARCHAR(25), numero_digitos TEXT, titulo VARCHAR(100),
+    descricao TEXT, categoria_id UUID, subcategoria_id UUID, valor_causa NUMERIC,
+    data_distribuicao DATE, status VARCHAR(30)) ON COMMIT DROP;
+CREATE TEMP TABLE stg_partes (
+    id UUID, tipo VARCHAR(15), nome VARCHAR(100), cpf_cnpj VARCHAR(20)) ON COMMIT DROP;
+CREATE TEMP TABLE stg_vinculos (
+    processo_id UUID, parte_id UUID, tipo VARCHAR(15), principal BOOLEAN) ON COMMIT DROP;
+"""
+
+_MERGE_PROCESSOS = f"""
+DELETE FROM stg_processos s
+USING processos p
+WHERE {sql_digits_only('p.numero_processo')} = s.numero_digitos;
+
+INSERT INTO partes (id, tipo, nome, cpf_cnpj)
+SELECT s.id, s.tipo, s.nome, s.cpf_cnpj FROM stg_partes s
+WHERE EXISTS (
+    SELECT 1 FROM stg_vinculos v
+    JOIN stg_processos sp ON sp.id = v.processo_id
+    WHERE v.parte_id = s.id);
+
+INSERT INTO processos (id, numero_processo, titulo, descricao, categoria_id,
+    subcategoria_id, valor_causa, data_distribuicao, status)
+SELECT id, numero_processo, titulo, descricao, categoria_id, subcategoria_id,
+    valor_causa, data_distribuicao, status
+FROM stg_processos;
+
+INSERT INTO partes_processo (processo_id, parte_id, tipo, principal)
+SELECT v.processo_id, v.parte_id, v.tipo, v.principal
+FROM stg_vinculos v JOIN stg_processos s ON s.id = v.processo_id;
+"""
+
+
+# --- Streaming readers ---
+
+
+def _group_csv_rows(rows: Iterable[Dict]) -> Iterator[Dict]:
+    """Fold consecutive CSV rows of the same case into one case record"""
+    current = None
+    for row in rows:
+        numero = (row.get("numero_processo") or "").strip()
+        if current is None or numero != current["numero_processo"]:
+            if current is not None:
+                yield current
+            current = {field: row.get(field) for field in CASE_FIELDS}
+            current["numero_processo"] = numero
+            current["partes"] = []
+        party = {field: row.get(f"parte_{field}") for field in PARTY_FIELDS}
+        if party.get("nome"):
+            current["partes"].append(party)
+    if current is not None:
+        yield current
+
+
+def read_csv(stream) -> Iterator[Dict]:
+    return _group_csv_rows(csv.DictReader(stream))
+
+
+def read_json(stream, chunk_size: int = 65536) -> Iterator[Dict]:
+    """Decode a JSON array or JSON Lines one object at a time"""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    eof = False
+    while True:
+        buffer = buffer.lstrip(" \t\r\n,[")
+        if buffer.startswith("]"):
+            return
+        if buffer:
+            try:
+                record, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                buffer = buffer[end:]
+                yield record
+                continue
+        if eof:
+            return
+        chunk = stream.read(chunk_size)
+        eof = not chunk
+        buffer += chunk
+
+
+def read_xml(stream) -> Iterator[Dict]:
+    """Yield each <processo> element as a case record"""
+    # Open elements, so each handled <processo> can leave its actual parent
+    # (cleared elements stay attached, and memory would grow with the file)
+    open_elements: List = []
+    for event, element in ElementTree.iterparse(stream, events=("start", "end")):
+        if event == "start":
+            open_elements.append(element)
+            continue
+        open_elements.pop()
+        if element.tag != "processo":
+            continue
+        record = dict(element.attrib)
+        for child in element:
+            if child.tag != "partes":
+                record[child.tag] = (child.text or "").strip()
+        record["partes"] = [
+            {**party.attrib, **{c.tag: (c.text or "").strip() for c in party}}
+            for party in element.iter("parte")
+        ]
+        element.clear()
+        if open_elements:
+            open_elements[-1].remove(element)
+        yield record
+
+
+READERS = {"csv": read_csv, "json": read_json, "jsonl": read_json, "xml": read_xml}
+
+
+def read_records(path: str, file_format: Optional[str] = None) -> Iterator[Dict]:
+    """Stream case records from an export file"""
+    file_format = (file_format or os.path.splitext(path)[1].lstrip(".")).lower()
+    if file_format == "ndjson":
+        file_format = "jsonl"
+    if file_format not in READERS:
+        raise ValueError(f"Unsupported import format: {file_format}")
+    if file_format == "xml":
+        with open(path, "rb") as stream:
+            yield from read_xml(stream)
+    else:
+        with open(path, newline="", encoding="utf-8") as stream:
+            yield from READERS[file_format](stream)
+
+
+# --- Normalization (runs in worker processes) ---
+
+
+def parse_decimal(value) -> Decimal:
+    """Accept 1234.56, 1.234,56 and R$ prefixes"""
+    text = str(value).replace("R$", "").strip()
+    if "," in text:
+        text = text.replace(".", "").replace(",", ".")
+    try:
+        return Decimal(text)
+    except InvalidOperation:
+        raise ValueError(f"invalid valor_causa: {value}")
+
+
+def parse_date(value) -> date:
+    text = str(value).strip()[:10]
+    for pattern in ("%Y-%m-%d", "%d/%m/%Y"):
+        try:
+            return datetime.strptime(text, pattern).date()
+        except ValueError:
+            continue
+    raise ValueError(f"invalid data_distribuicao: {value}")
+
+
+def normalize_party(party: Dict) -> Dict:
+    document = digits_only(party.get("cpf_cnpj"))
+    if document and not (is_valid_cpf(document) or is_valid_cnpj(document)):
+        raise ValueError(f"invalid CPF/CNPJ: {party.get('cpf_cnpj')}")
+    tipo = (party.get("tipo") or "").strip().lower()
+    if not tipo:
+        tipo = "juridica" if len(document) == 14 else "fisica"
+    principal = str(party.get("principal") or "").strip().lower()
+    return {
+        "nome": " ".join(str(party["nome"]).split())[:100],
+        "documento": document,
+        "cpf_cnpj": (party.get("cpf_cnpj") or "").strip()[:20],
+        "tipo": tipo[:15],
+        "papel": (party.get("papel") or "parte").strip().lower()[:15],
+        "principal": principal in ("1", "true", "sim", "s", "yes"),
+    }
+
+
+def normalize_case(record: Dict) -> Dict:
+    """Validated, canonical form of one case record (raises ValueError)"""
+    missing = [f for f in REQUIRED_FIELDS if not str(record.get(f) or "").strip()]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+    kind, digits = classify_term(record["numero_processo"])
+    if kind != TERM_CNJ:
+        raise ValueError(f"invalid CNJ number: {record['numero_processo']}")
+    return {
+        "numero_processo": record["numero_processo"].strip()[:25],
+        "numero_digitos": digits,
+        "titulo": str(record["titulo"]).strip()[:100],
+        "descricao": (record.get("descricao") or "").strip() or None,
+        "categoria": fold(record["categoria"]).strip(),
+        "subcategoria": fold(record.get("subcategoria")).strip() or None,
+        "valor_causa": parse_decimal(record["valor_causa"]),
+        "data_distribuicao": (
+            parse_date(record["data_distribuicao"])
+            if record.get("data_distribuicao")
+            else date.today()
+        ),
+        "status": str(record["status"]).strip()[:30],
+        "partes": [normalize_party(p) for p in record.get("partes") or []],
+    }
+
+
+def normalize_chunk(records: List[Dict]) -> Tuple[List[Dict], List[Tuple[str, str]]]:
+    """Normalize a chunk; return (cases, [(numero_processo, reason), ...])"""
+    cases, rejects = [], []
+    for record in records:
+        try:
+            cases.append(normalize_case(record))
+        except (KeyError, TypeError, ValueError) as exc:
+            rejects.append((str(record.get("numero_processo") or "?"), str(exc)))
+    return cases, rejects
+
+
+# --- Loading ---
+
+
+class ImportReport:
+    """Counters for one import run"""
+
+    MAX_REJECTS = 1000
+
+    def __init__(self):
+        self.read = 0
+        self.imported = 0
+        self.existing = 0
+        self.parties_created = 0
+        self.rejected = 0
+        self.rejects: List[Tuple[str, str]] = []
+
+    def reject(self, numero: str, reason: str):
+        self.rejected += 1
+        if len(self.rejects) < self.MAX_REJECTS:
+            self.rejects.append((numero, reason))
+
+    def __str__(self):
+        return (
+            f"{self.read} read, {self.imported} imported, {self.existing} already"
+            f" present, {self.rejected} rejected, {self.parties_created} new parties"
+        )
+
+
+class PartyResolver:
+    """Map digits-only CPF/CNPJ to partes.id, remembering answers across batches"""
+
+    def __init__(self, maxsize: int = 500000):
+        self._cache = TTLCache(ttl=24 * 3600, maxsize=maxsize)
+
+    def resolve(self, cursor, documents: Iterable[str]) -> Dict[str, object]:
+        """IDs of existing parties for the given documents (one query for misses)"""
+        found, missing = {}, []
+        for document in set(documents):
+            party_id = self._cache.get(document)
+            if party_id is None:
+                missing.append(document)
+            else:
+                found[document] = party_id
+        if missing:
+            column = sql_digits_only("pa.cpf_cnpj")
+            cursor.execute(
+                f"""SELECT DISTINCT ON ({column}) {column}, pa.id
+                FROM partes pa WHERE {column} = ANY(%s)
+                ORDER BY {column}, pa.id""",
+                (missing,),
+            )
+            for document, party_id in cursor.fetchall():
+                found[document] = party_id
+                self._cache.set(document, party_id)
+        return found
+
+    def remember(self, created: Dict[str, object]):
+        """Cache parties created by a committed batch"""
+        for document, party_id in created.items():
+            self._cache.set(document, party_id)
+
+
+def _copy(cursor, table: str, columns: Tuple[str, ...], rows: Iterable[tuple]):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(["" if value is None else value for value in row])
+    buffer.seek(0)
+    cursor.copy_expert(
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer
+    )
+
+
+def _bounded_map(executor, function, chunks: Iterable, depth: int) -> Iterator:
+    """executor.map that keeps at most `depth` chunks in flight"""
+    pending = deque()
+    for chunk in chunks:
+        pending.append(executor.submit(function, chunk))
+        if len(pending) >= depth:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def _chunked(records: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    iterator = iter(records)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class CaseImporter:
+    """Stream, normalize and bulk-load case export files"""
+
+    def __init__(
+        self,
+        workers: int = 0,
+        batch_size: int = BATCH_SIZE,
+        chunk_size: int = CHUNK_SIZE,
+        resolver: Optional[PartyResolver] = None,
+    ):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+        self.resolver = resolver or PartyResolver()
+
+    def normalized(self, records: Iterable[Dict], report: ImportReport) -> Iterator:
+        """Normalized cases, in order, using the worker pool when configured"""
+        chunks = _chunked(records, self.chunk_size)
+        if self.workers:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                results = _bounded_map(
+                    executor, normalize_chunk, chunks, self.workers * 2
+                )
+                yield from self._unpack(results, report)
+        else:
+            yield from self._unpack(map(normalize_chunk, chunks), report)
+
+    @staticmethod
+    def _unpack(results, report: ImportReport) -> Iterator[Dict]:
+        for cases, rejects in results:
+            report.read += len(cases) + len(rejects)
+            for numero, reason in rejects:
+                report.reject(numero, reason)
+            yield from cases
+
+    def import_file(self, path: str, file_format: Optional[str] = None) -> ImportReport:
+        return self.import_records(read_records(path, file_format))
+
+    def import_records(self, records: Iterable[Dict]) -> ImportReport:
+        report = ImportReport()
+        categories = self._category_ids()
+        batch = []
+        for case in self.normalized(records, report):
+            batch.append(case)
+            if len(batch) >= self.batch_size:
+                self.load_batch(batch, categories, report)
+                batch = []
+        if batch:
+            self.load_batch(batch, categories, report)
+        logging.info("Import finished: %s", report)
+        return report
+
+    @staticmethod
+    def _category_ids() -> Dict[str, object]:
+        """Folded category name (and id) -> categorias_causas.id"""
+        ids = {}
+        for category, _ in category_tree.walk():
+            ids[fold(category["nome"]).strip()] = category["id"]
+            ids[str(category["id"])] = category["id"]
+        return ids
+
+    def load_batch(self, cases: List[Dict], categories: Dict, report: ImportReport):
+        """COPY one batch into staging and merge it, in one transaction"""
+        processos, seen = [], set()
+        for case in cases:
+            if case["numero_digitos"] in seen:
+                report.reject(case["numero_processo"], "duplicated in file")
+                continue
+            categoria_id = categories.get(case["categoria"])
+            subcategoria_id = categories.get(case["subcategoria"] or "")
+            if categoria_id is None or (case["subcategoria"] and not subcategoria_id):
+                report.reject(case["numero_processo"], "unknown category")
+                continue
+            seen.add(case["numero_digitos"])
+            case["id"], case["categoria_id"] = uuid.uuid4(), categoria_id
+            case["subcategoria_id"] = subcategoria_id
+            processos.append(case)
+        if not processos:
+            return
+
+        with db_manager.transaction() as conn, conn.cursor() as cur:
+            documents = [
+                party["documento"]
+                for case in processos
+                for party in case["partes"]
+                if party["documento"]
+            ]
+            known = self.resolver.resolve(cur, documents)
+            created, new_parties, links = {}, [], []
+            for case in processos:
+                for party in case["partes"]:
+                    document = party["documento"]
+                    party_id = known.get(document) or created.get(document)
+                    if party_id is None:
+                        party_id = uuid.uuid4()
+                        if document:
+                            created[document] = party_id
+                        new_parties.append(
+                            (party_id, party["tipo"], party["nome"], party["cpf_cnpj"])
+                        )
+                    links.append(
+                        (case["id"], party_id, party["papel"], party["principal"])
+                    )
+
+            cur.execute(_STAGING)
+            _copy(
+                cur,
+                "stg_processos",
+                STAGED_CASE_COLUMNS,
+                (
+                    [case[column] for column in STAGED_CASE_COLUMNS]
+                    for case in processos
+                ),
+            )
+            _copy(cur, "stg_partes", ("id", "tipo", "nome", "cpf_cnpj"), new_parties)
+            _copy(
+                cur,
+                "stg_vinculos",
+                ("processo_id", "parte_id", "tipo", "principal"),
+                links,
+            )
+
+            sql, params = valor_causa_validator.query("stg_processos")
+            if params[0]:
+                cur.execute(
+                    f"DELETE FROM stg_processos WHERE id IN (SELECT id FROM ({sql}) v)"
+                    " RETURNING numero_processo, valor_causa",
+                    params,
+                )
+                for numero, valor in cur.fetchall():
+                    report.reject(numero, f"valor_causa {valor} above category limit")
+
+            cur.execute("SELECT COUNT(*) FROM stg_processos")
+            staged = cur.fetchone()[0]
+            cur.execute(_MERGE_PROCESSOS)
+            cur.execute("SELECT COUNT(*) FROM stg_processos")
+            imported = cur.fetchone()[0]
+            # Parties of cases skipped as existing were not inserted
+            cur.execute("SELECT s.id FROM stg_partes s JOIN partes pa ON pa.id = s.id")
+            inserted = {row[0] for row in cur.fetchall()}
+
+        self.resolver.remember(
+            {doc: pid for doc, pid in created.items() if str(pid) in inserted}
+        )
+        report.existing += staged - imported
+        report.imported += imported
+        report.parties_created += len(inserted)
+        logging.info("Imported batch: %d cases (%s)", imported, report)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import PJe/Esaj case exports")
+    parser.add_argument("path", help="CSV, JSON, JSON Lines or XML export file")
+    parser.add_argument("--format", choices=sorted(READERS) + ["ndjson"])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    importer = CaseImporter(workers=args.workers, batch_size=args.batch_size)
+    result = importer.import_file(args.path, args.format)
+    print(result)
+    for numero_rejected, reason_rejected in result.rejects:
+        print(f"  {numero_rejected}: {reason_rejected}")
@@ -0,0 +1,309 @@
+"""
+Search-as-you-type for JEC System
+
+The interactive case search reads single keystrokes and re-renders only a
+Rich Live region holding the input line, the results table and a status
+line. Queries are:
+- debounced, so a burst of typing produces one query
+- cancelled server-side when a newer term supersedes them
+- refined locally when the new term extends a term whose complete result
+  set is already cached (substring matches of a longer term are always a
+  subset of the matches for its prefix); CNJ, CPF and CNPJ terms always
+  go to the server, which looks them up exactly
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+from psycopg2.extensions import QueryCanceledError
+from rich.console import Console, Group
+from rich.live import Live
+from rich.table import Table
+from rich.text import Text
+from rich import box
+from database import CancelToken
+from normalization import TERM_TEXT, classify_term, digits_only
+from search import SearchResult, case_search
+from search_index import fold
+
+DEBOUNCE_SECONDS = 0.25
+POLL_SECONDS = 0.05
+MIN_TERM_LENGTH = 2
+
+ENTER, ESCAPE, BACKSPACE = "ENTER", "ESCAPE", "BACKSPACE"
+
+
+class KeyReader:
+    """Read single keystrokes without echo, with a timeout
+
+    Uses msvcrt on Windows and cbreak mode on POSIX terminals.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdin
+        self._saved = None
+
+    def __enter__(self):
+        if os.name != "nt":
+            import termios
+            import tty
+
+            fd = self.stream.fileno()
+            self._saved = termios.tcgetattr(fd)
+            tty.setcbreak(fd)
+        return self
+
+    def __exit__(self, *exc):
+        if self._saved is not None:
+            import termios
+
+            termios.tcsetattr(self.stream.fileno(), termios.TCSADRAIN, self._saved)
+            self._saved = None
+
+    def read(self, timeout: float) -> Optional[str]:
+        """Return one key (char or ENTER/ESCAPE/BACKSPACE) or None on timeout"""
+        if os.name == "nt":
+            return self._read_windows(timeout)
+        return self._read_posix(timeout)
+
+    def _read_windows(self, timeout: float) -> Optional[str]:
+        import msvcrt
+
+        deadline = time.monotonic() + timeout
+        while not msvcrt.kbhit():
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(0.01)
+        char = msvcrt.getwch()
+        if char in ("\x00", "\xe0"):  # arrow/function key prefix
+            msvcrt.getwch()
+            return None
+        return self._translate(char)
+
+    def _read_posix(self, timeout: float) -> Optional[str]:
+        import select
+
+        fd = self.stream.fileno()
+        ready, _, _ = select.select([fd], [], [], timeout)
+        if not ready:
+            return None
+        char = os.read(fd, 1).decode("utf-8", errors="ignore")
+        if char == "\x1b":
+            # Swallow the rest of an escape sequence (arrow keys etc.)
+            if select.select([fd], [], [], 0.01)[0]:
+                os.read(fd, 8)
+                return None
+        return self._translate(char)
+
+    @staticmethod
+    def _translate(char: str) -> Optional[str]:
+        if char in ("\r", "\n"):
+            return ENTER
+        if char == "\x1b":
+            return ESCAPE
+        if char in ("\x08", "\x7f"):
+            return BACKSPACE
+        if char.isprintable():
+            return char
+        return None
+
+
+def row_matches(row: Dict, folded_term: str) -> bool:
+    """Substring test on the same fields the server matches on"""
+    fields = (
+        row.get("numero_processo"),
+        digits_only(row.get("numero_processo")),
+        row.get("titulo"),
+        row.get("partes"),
+    )
+    return any(folded_term in fold(field) for field in fields if field)
+
+
+class PrefixResultCache:
+    """Results per term, able to answer an extended term from a prefix"""
+
+    def __init__(self, maxsize: int = 64):
+        self.maxsize = maxsize
+        self._results: "OrderedDict[str, SearchResult]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    def store(self, term: str, result: SearchResult):
+        key = fold(term)
+        with self._lock:
+            self._results[key] = result
+            self._results.move_to_end(key)
+            while len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+
+    def lookup(self, term: str) -> Optional[SearchResult]:
+        """Exact hit, or a local refinement of the longest complete prefix
+
+        CNJ numbers and CPF/CNPJ values are never answered from the cache:
+        the server looks them up exactly, on fields row_matches cannot see.
+        """
+        if classify_term(term)[0] != TERM_TEXT:
+            return None
+        key = fold(term)
+        with self._lock:
+            if key in self._results:
+                return self._results[key]
+
+            best = None
+            for cached_term, result in self._results.items():
+                complete = not result.estimated and result.total == len(result.rows)
+                if complete and key.startswith(cached_term):
+                    if best is None or len(cached_term) > len(best[0]):
+                        best = (cached_term, result)
+            if best is None:
+                return None
+            rows = [row for row in best[1].rows if row_matches(row, key)]
+            refined = SearchResult(rows, len(rows))
+            self.store(term, refined)
+            return refined
+
+
+class LiveCaseSearch:
+    """Interactive search loop rendering into a Rich Live region"""
+
+    def __init__(
+        self,
+        user: Optional[Dict],
+        engine=case_search,
+        console: Optional[Console] = None,
+        debounce: float = DEBOUNCE_SECONDS,
+        key_reader: Callable[[], KeyReader] = KeyReader,
+    ):
+        self.user = user
+        self.engine = engine
+        self.console = console or Console()
+        self.debounce = debounce
+        self.key_reader = key_reader
+        self.cache = PrefixResultCache()
+        self.term = ""
+        self.result = SearchResult([], 0)
+        self.status = "Type to search - Enter to finish, Esc to cancel"
+        self._generation = 0
+        self._token: Optional[CancelToken] = None
+        self._lock = threading.Lock()
+        self._dirty = threading.Event()
+
+    def dispatch(self, term: str):
+        """Start answering `term`, superseding any query still running"""
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            if self._token is not None:
+                self._token.cancel()
+                self._token = None
+
+        if len(term.strip()) < MIN_TERM_LENGTH:
+            self._publish(generation, SearchResult([], 0), "Type to search")
+            return
+
+        cached = self.cache.lookup(term)
+        if cached is not None:
+            self._publish(generation, cached, "refined locally")
+            return
+
+        token = CancelToken()
+        with self._lock:
+            self._token = token
+        self.status = "searching..."
+        self._dirty.set()
+        threading.Thread(
+            target=self._run_query,
+            args=(term, generation, token),
+            name="live-search",
+            daemon=True,
+        ).start()
+
+    def _run_query(self, term: str, generation: int, token: CancelToken):
+        started = time.perf_counter()
+        try:
+            with token.activate():
+                result = self.engine.search(term, self.user, fulltext=False)
+        except QueryCanceledError:
+            return
+        except Exception as exc:
+            logging.error("Live search error: %s", str(exc))
+            self._publish(generation, self.result, "[red]search failed[/red]")
+            return
+        self.cache.store(term, result)
+        elapsed = (time.perf_counter() - started) * 1000
+        self._publish(generation, result, f"{elapsed:.0f} ms")
+
+    def _publish(self, generation: int, result: SearchResult, status: str):
+        with self._lock:
+            if generation != self._generation:
+                return  # superseded while running
+            self.result = result
+            self.status = status
+        self._dirty.set()
+
+    def render(self) -> Group:
+        table = Table(box=box.ROUNDED, expand=True)
+        for name, style in (
+            ("Case #", "cyan"),
+            ("Title", "magenta"),
+            ("Parties", ""),
+            ("Status", ""),
+            ("Filed", ""),
+        ):
+            table.add_column(name, style=style)
+        for case in self.result.rows:
+            table.add_row(
+                case["numero_processo"],
+                case["titulo"],
+                case.get("partes") or "",
+                case["status"],
+                str(case["data_distribuicao"]),
+            )
+        approx = "~" if self.result.estimated else ""
+        return Group(
+            Text.assemble(("Search: ", "bold"), self.term, ("_", "blink")),
+            table,
+            Text.from_markup(
+                f"[dim]{len(self.result)} of {approx}{self.result.total} matches"
+                f" - {self.status}[/dim]"
+            ),
+        )
+
+    def run(self) -> SearchResult:
+        """Run until Enter (keep results) or Esc (discard); return the results"""
+        pending_since = None
+        with self.key_reader() as keys, Live(
+            self.render(), console=self.console, auto_refresh=False
+        ) as live:
+            while True:
+                key = keys.read(POLL_SECONDS)
+                if key == ENTER:
+                    break
+                if key == ESCAPE:
+                    self.dispatch("")
+                    break
+                if key == BACKSPACE:
+                    self.term = self.term[:-1]
+                elif key:
+                    self.term += key
+                if key:
+                    pending_since = time.monotonic()
+                    self._dirty.set()
+
+                if (
+                    pending_since is not None
+                    and time.monotonic() - pending_since >= self.debounce
+                ):
+                    pending_since = None
+                    self.dispatch(self.term)
+
+                if self._dirty.is_set():
+                    self._dirty.clear()
+                    live.update(self.render(), refresh=True)
+        with self._lock:
+            if self._token is not None:
+                self._token.cancel()
+        return self.result
@@ -0,0 +1,425 @@
+"""
+Local read-only SQLite mirror for JEC System
+
+On a slow or congested LAN every case listing and search waits on the
+server. When LOCAL_MIRROR_ENABLED is set, a background thread copies
+processos, partes, partes_processo and categorias_causas into a SQLite file
+and keeps it current; ListProcessesCommand and SearchCasesCommand then read
+the local copy and show how old it is.
+
+Sync is incremental:
+- processos is read through the change feed (migration 0009). The feed
+  position is stored in the SQLite file itself, next to the data it
+  describes, so each workstation resumes where it stopped. Deleted cases
+  arrive as tombstones.
+- A party or link change touches its cases, so for each changed case the
+  partes_processo rows and linked partes are copied again. Parties left
+  without cases are pruned.
+- categorias_causas is small and copied whole when categorias_versao
+  (migration 0006) moves.
+
+Only the party columns needed to list, search and scope cases are copied;
+addresses and contact details stay on the server. Writes never go through
+the mirror.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+from case_access import STAFF_COLUMNS
+from database import ChangeFeed, db_manager
+from normalization import digits_only
+from search import DEFAULT_LIMIT, SearchResult
+from search_index import fold
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS processos (
+    id TEXT PRIMARY KEY, numero_processo TEXT, titulo TEXT, descricao TEXT,
+    categoria_id TEXT, subcategoria_id TEXT, valor_causa TEXT,
+    data_distribuicao TEXT, status TEXT, juiz_id TEXT, servidor_id TEXT,
+    data_atualizacao TEXT, ativo INTEGER NOT NULL DEFAULT 0, autor TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_processos_distribuicao
+    ON processos (data_distribuicao);
+CREATE INDEX IF NOT EXISTS idx_processos_juiz ON processos (juiz_id);
+CREATE INDEX IF NOT EXISTS idx_processos_servidor ON processos (servidor_id);
+CREATE TABLE IF NOT EXISTS partes (
+    id TEXT PRIMARY KEY, tipo TEXT, nome TEXT, cpf_cnpj TEXT, advogado_id TEXT
+);
+CREATE TABLE IF NOT EXISTS partes_processo (
+    id TEXT PRIMARY KEY, processo_id TEXT, parte_id TEXT, tipo TEXT,
+    principal INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_partes_processo_processo
+    ON partes_processo (processo_id);
+CREATE INDEX IF NOT EXISTS idx_partes_processo_parte
+    ON partes_processo (parte_id);
+CREATE TABLE IF NOT EXISTS categorias_causas (
+    id TEXT PRIMARY KEY, categoria_pai_id TEXT, nome TEXT, descricao TEXT,
+    valor_maximo TEXT
+);
+CREATE TABLE IF NOT EXISTS sync_state (chave TEXT PRIMARY KEY, valor TEXT);
+"""
+
+_CASE_COLUMNS = (
+    "id",
+    "numero_processo",
+    "titulo",
+    "descricao",
+    "categoria_id",
+    "subcategoria_id",
+    "valor_causa",
+    "data_distribuicao",
+    "status",
+    "juiz_id",
+    "servidor_id",
+    "data_atualizacao",
+    "ativo",
+    "autor",
+)
+
+# Change-feed source: cases with their processos_ativos membership and
+# author, plus tombstones of deleted cases
+_MIRROR_SOURCE = """(
+    SELECT p.id, p.transacao, p.data_atualizacao, FALSE AS removido,
+        p.numero_processo, p.titulo, p.descricao, p.categoria_id,
+        p.subcategoria_id, p.valor_causa, p.data_distribuicao, p.status,
+        p.juiz_id, p.servidor_id,
+        a.id IS NOT NULL AS ativo, a.autor
+    FROM processos p
+    LEFT JOIN processos_ativos a ON a.id = p.id
+    UNION ALL
+    SELECT r.id, r.transacao, r.data_atualizacao, TRUE, NULL, NULL, NULL, NULL,
+        NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL
+    FROM processos_removidos r
+)"""
+
+_LINKS_QUERY = """SELECT id, processo_id, parte_id, tipo, principal
+    FROM partes_processo WHERE processo_id = ANY(%s::uuid[])"""
+
+_PARTIES_QUERY = """SELECT pa.id, pa.tipo, pa.nome, pa.cpf_cnpj, pa.advogado_id
+    FROM partes pa
+    WHERE pa.id IN (SELECT parte_id FROM partes_processo
+                    WHERE processo_id = ANY(%s::uuid[]))"""
+
+_CATEGORIES_QUERY = """SELECT id, categoria_pai_id, nome, descricao, valor_maximo
+    FROM categorias_causas"""
+
+# SQLite counterparts of the case_access predicates
+_LAWYER_PREDICATE = """EXISTS (
+    SELECT 1 FROM partes_processo acc_pp
+    JOIN partes acc_pa ON acc_pa.id = acc_pp.parte_id
+    WHERE acc_pp.processo_id = {alias}.id AND acc_pa.advogado_id = ?)"""
+
+_PARTY_PREDICATE = """EXISTS (
+    SELECT 1 FROM partes_processo acc_pp
+    JOIN partes acc_pa ON acc_pa.id = acc_pp.parte_id
+    WHERE acc_pp.processo_id = {alias}.id AND digits(acc_pa.cpf_cnpj) = ?)"""
+
+_PARTY_NAMES = """(SELECT group_concat(lpa.nome, ', ')
+        FROM partes_processo lpp JOIN partes lpa ON lpa.id = lpp.parte_id
+        WHERE lpp.processo_id = p.id) AS partes"""
+
+
+def _sqlite_value(value):
+    """Store server values as SQLite-native types, keeping decimals exact"""
+    if isinstance(value, (UUID, Decimal)):
+        return str(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, bool):
+        return int(value)
+    return value
+
+
+def scope(user: Optional[Dict], alias: str = "p") -> Tuple[str, tuple]:
+    """case_access.scope for the mirror's SQLite tables"""
+    if not user:
+        return "0", ()
+    role = user.get("tipo")
+    if role in STAFF_COLUMNS:
+        return f"{alias}.{STAFF_COLUMNS[role]} = ?", (str(user["id"]),)
+    if role == "advogado":
+        return _LAWYER_PREDICATE.format(alias=alias), (str(user["id"]),)
+    if role == "parte":
+        document = digits_only(user.get("cpf"))
+        if not document:
+            return "0", ()
+        return _PARTY_PREDICATE.format(alias=alias), (document,)
+    return "0", ()
+
+
+class LocalMirror:
+    """SQLite copy of the case tables, synced from the change feed"""
+
+    def __init__(self, path: Optional[str] = None, interval: float = 30.0):
+        self.path = path
+        self.interval = interval
+        self.last_error: Optional[str] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._feed = ChangeFeed("local-mirror", source=_MIRROR_SOURCE, persist=False)
+        # One connection shared by the sync thread and the UI thread
+        self._lock = threading.RLock()
+        self._sync_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def open(self, path: Optional[str] = None):
+        """Open (creating if needed) the SQLite file and resume its feed"""
+        if path:
+            self.path = path
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.create_function("fold", 1, fold, deterministic=True)
+        conn.create_function("digits", 1, digits_only, deterministic=True)
+        with self._lock:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+            xact, last_id = self._state("watermark_xact"), self._state("watermark_id")
+        self._feed.reset((int(xact), last_id) if xact else None)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    @property
+    def ready(self) -> bool:
+        """Whether a complete sync has ever landed in the open file"""
+        return self._conn is not None and self.synced_at() is not None
+
+    def synced_at(self) -> Optional[datetime]:
+        value = self._state("sincronizado_em")
+        return datetime.fromisoformat(value) if value else None
+
+    def freshness(self) -> Optional[str]:
+        """Human readable age of the local copy"""
+        synced = self.synced_at()
+        if synced is None:
+            return None
+        age = max(0, int((datetime.now() - synced).total_seconds()))
+        note = f"Local copy as of {synced:%H:%M:%S} ({age}s ago)"
+        if self.last_error:
+            note += " - server unreachable, showing last synced data"
+        return note
+
+    # Sync ---------------------------------------------------------------
+
+    def sync_once(self) -> int:
+        """Pull every pending change; returns the number of case rows applied"""
+        with self._sync_lock:
+            started = time.perf_counter()
+            self._sync_categories()
+            count = 0
+            for rows in self._feed.batches():
+                self._apply_cases(rows)
+                count += len(rows)
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "DELETE FROM partes WHERE id NOT IN "
+                    "(SELECT parte_id FROM partes_processo)"
+                )
+                self._set_state("sincronizado_em", datetime.now().isoformat())
+            self.last_error = None
+            if count:
+                logging.info(
+                    "Local mirror applied %d case changes in %.2fs",
+                    count,
+                    time.perf_counter() - started,
+                )
+            return count
+
+    def _sync_categories(self):
+        try:
+            rows = db_manager.execute_query(
+                "SELECT versao FROM categorias_versao", return_results=True
+            )
+            version = str(rows[0]["versao"]) if rows else None
+        except Exception as exc:
+            logging.debug("Category version unavailable: %s", str(exc))
+            version = None
+        # Without the version table (migration 0006) copy on every sync
+        if version is not None and version == self._state("categorias_versao"):
+            return
+        categories = db_manager.execute_query(_CATEGORIES_QUERY, return_results=True)
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM categorias_causas")
+            self._conn.executemany(
+                "INSERT INTO categorias_causas VALUES (?, ?, ?, ?, ?)",
+                [
+                    tuple(
+                        _sqlite_value(row[col])
+                        for col in (
+                            "id",
+                            "categoria_pai_id",
+                            "nome",
+                            "descricao",
+                            "valor_maximo",
+                        )
+                    )
+                    for row in categories
+                ],
+            )
+            self._set_state("categorias_versao", version)
+
+    def _apply_cases(self, rows: List[Dict]):
+        """Write one feed page and its parties in a single local transaction"""
+        live = [str(row["id"]) for row in rows if not row.get("removido")]
+        links = parties = []
+        if live:
+            links = db_manager.execute_query(_LINKS_QUERY, (live,), return_results=True)
+            parties = db_manager.execute_query(
+                _PARTIES_QUERY, (live,), return_results=True
+            )
+
+        changed = [(str(row["id"]),) for row in rows]
+        last = rows[-1]
+        with self._lock, self._conn:
+            conn = self._conn
+            conn.executemany(
+                "DELETE FROM partes_processo WHERE processo_id = ?", changed
+            )
+            conn.executemany(
+                "DELETE FROM processos WHERE id = ?",
+                [(str(row["id"]),) for row in rows if row.get("removido")],
+            )
+            conn.executemany(
+                f"INSERT OR REPLACE INTO processos ({', '.join(_CASE_COLUMNS)})"
+                f" VALUES ({', '.join('?' * len(_CASE_COLUMNS))})",
+                [
+                    tuple(_sqlite_value(row[col]) for col in _CASE_COLUMNS)
+                    for row in rows
+                    if not row.get("removido")
+                ],
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO partes VALUES (?, ?, ?, ?, ?)",
+                [
+                    tuple(
+                        _sqlite_value(row[col])
+                        for col in ("id", "tipo", "nome", "cpf_cnpj", "advogado_id")
+                    )
+                    for row in parties
+                ],
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO partes_processo VALUES (?, ?, ?, ?, ?)",
+                [
+                    tuple(
+                        _sqlite_value(row[col])
+                        for col in (
+                            "id",
+                            "processo_id",
+                            "parte_id",
+                            "tipo",
+                            "principal",
+                        )
+                    )
+                    for row in links
+                ],
+            )
+            # Commit the feed position together with the rows it covers
+            self._set_state("watermark_xact", str(last["transacao"]))
+            self._set_state("watermark_id", str(last["id"]))
+
+    def run_once(self):
+        try:
+            self.sync_once()
+        except Exception as exc:
+            self.last_error = str(exc)
+            logging.error("Local mirror sync failed: %s", str(exc))
+
+    def start(self) -> threading.Thread:
+        """Sync now and then every `interval` seconds in a daemon thread"""
+        if self._conn is None:
+            self.open()
+
+        def loop():
+            self.run_once()
+            while not self._stop.wait(self.interval):
+                self.run_once()
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=loop, name="local-mirror", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        self._stop.set()
+
+    # Reads --------------------------------------------------------------
+
+    def active_cases(self, user: Optional[Dict]) -> List[Dict]:
+        """processos_ativos rows visible to the user, newest first"""
+        where, params = scope(user, "p")
+        return self._query(
+            f"""SELECT p.id, p.numero_processo, p.titulo, c.nome AS categoria,
+                p.status, p.data_distribuicao, p.autor
+            FROM processos p
+            LEFT JOIN categorias_causas c ON c.id = p.categoria_id
+            WHERE p.ativo = 1 AND {where}
+            ORDER BY p.data_distribuicao DESC""",
+            params,
+        )
+
+    def search(
+        self, term: str, user: Optional[Dict], limit: int = DEFAULT_LIMIT
+    ) -> SearchResult:
+        """Substring search over case number, title and party names/documents"""
+        needle = fold(term.strip())
+        if not needle:
+            return SearchResult([], 0)
+        digits = digits_only(term)
+        where, params = scope(user, "p")
+        rows = self._query(
+            f"""SELECT p.id, p.numero_processo, p.titulo, p.status,
+                p.data_distribuicao, {_PARTY_NAMES}, COUNT(*) OVER () AS _total
+            FROM processos p
+            WHERE {where} AND (
+                instr(fold(p.numero_processo), ?) > 0
+                OR instr(fold(p.titulo), ?) > 0
+                OR (? <> '' AND instr(digits(p.numero_processo), ?) > 0)
+                OR EXISTS (
+                    SELECT 1 FROM partes_processo spp
+                    JOIN partes spa ON spa.id = spp.parte_id
+                    WHERE spp.processo_id = p.id
+                    AND (instr(fold(spa.nome), ?) > 0
+                         OR (? <> '' AND digits(spa.cpf_cnpj) = ?))))
+            ORDER BY p.data_distribuicao DESC
+            LIMIT ?""",
+            params + (needle, needle, digits, digits, needle, digits, digits, limit),
+        )
+        total = rows[0].pop("_total") if rows else 0
+        for row in rows[1:]:
+            row.pop("_total")
+        return SearchResult(rows, total)
+
+    def _query(self, sql: str, params: tuple = ()) -> List[Dict]:
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params)]
+
+    def _state(self, key: str) -> Optional[str]:
+        with self._lock:
+            if self._conn is None:
+                return None
+            row = self._conn.execute(
+                "SELECT valor FROM sync_state WHERE chave = ?", (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def _set_state(self, key: str, value: Optional[str]):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO sync_state (chave, valor) VALUES (?, ?)",
+            (key, value),
+        )
+
+
+# Singleton instance, opened by main.py when LOCAL_MIRROR_ENABLED is set
+local_mirror = LocalMirror()
@@ -0,0 +1,246 @@
+"""
+Structured, non-blocking logging for JEC System
+
+Without setup, a logging call writes to its handlers on the caller's thread,
+so a slow disk slows whichever command logged. LogPipeline gives the root
+logger a single QueueHandler instead: a call only renders the message and
+puts the record on a bounded in-memory queue. A QueueListener thread takes
+records off the queue and writes them to LOG_FILE through a
+RotatingFileHandler (MAX_LOG_SIZE bytes per file, LOG_BACKUP_COUNT old
+files). If the writer falls so far behind that the queue fills up, new
+records are dropped and counted rather than making the caller wait.
+
+Each line of the file is one JSON object:
+    {"time": ..., "level": ..., "logger": ..., "message": ...,
+     "command": ..., "user_id": ..., "db_ms": ..., "db_queries": ...}
+command and user_id identify the command running when the record was
+logged (see command_scope), db_ms and db_queries its database time so far.
+When a command returns, command_scope logs a "Command finished" record
+that adds duration_ms and status.
+"""
+
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger("jec.commands")
+
+_scope: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar(
+    "jec_log_scope", default=None
+)
+
+# Record attributes copied into the JSON object when present
+_FIELDS = ("command", "user_id", "db_ms", "db_queries", "duration_ms", "status")
+
+
+@contextmanager
+def command_scope(name: str, user: Optional[Dict] = None):
+    """Tag records logged inside with the command and user, then log the outcome"""
+    # Imported here: the database driver is not needed for the first frame
+    from database import QueryTimer
+
+    timer = QueryTimer()
+    scope = {"command": name, "user_id": user.get("id") if user else None}
+    token = _scope.set(dict(scope, timer=timer))
+    started = time.perf_counter()
+    status = "error"
+    try:
+        with timer.activate():
+            yield
+        status = "ok"
+    except KeyboardInterrupt:
+        status = "interrupted"
+        raise
+    finally:
+        logger.info(
+            "Command finished",
+            extra=dict(
+                scope,
+                db_ms=round(timer.seconds * 1000, 1),
+                db_queries=timer.count,
+                duration_ms=round((time.perf_counter() - started) * 1000, 1),
+                status=status,
+            ),
+        )
+        _scope.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Adds the running command, its user and its database time to records"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        scope = _scope.get()
+        if scope is not None:
+            record.command = scope["command"]
+            record.user_id = scope["user_id"]
+            record.db_ms = round(scope["timer"].seconds * 1000, 1)
+            record.db_queries = scope["timer"].count
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created)
+            .astimezone()
+            .isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for name in _FIELDS:
+            value = getattr(record, name, None)
+            if value is not None:
+                entry[name] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of waiting on a full queue"""
+
+    def __init__(self, record_queue: queue.Queue):
+        super().__init__(record_queue)
+        self.dropped = 0
+        self._drop_lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Render args and traceback while they still describe the caller's
+        # objects; the layout is left to the listener's formatter
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._drop_lock:
+                self.dropped += 1
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self):
+        # Wait for room: stop() must get through even when the queue is full
+        self.queue.put(self._sentinel)
+
+
+class LogPipeline:
+    """Root logger -> bounded queue -> listener thread -> rotating JSON file"""
+
+    def __init__(self, queue_size: int = 10000):
+        self.queue: queue.Queue = queue.Queue(queue_size)
+        self.handler = NonBlockingQueueHandler(self.queue)
+        self.handler.addFilter(ContextFilter())
+        self.file_handler: Optional[RotatingFileHandler] = None
+        self.echo_handler: Optional[logging.Handler] = None
+        self.listener: Optional[QueueListener] = None
+        self._target = None  # (path, size, backups) of file_handler
+        self._lock = threading.Lock()
+        self._registered = False
+
+    def start(self, settings, echo: bool = False):
+        """Route all logging through the pipeline, configured from settings
+
+        With echo, records are also written to stderr as plain text.
+        """
+        if echo and self.echo_handler is None:
+            self.echo_handler = logging.StreamHandler(sys.stderr)
+            self.echo_handler.setFormatter(
+                logging.Formatter("%(asctime)s %(levelname)s %(message)s")
+            )
+        root = logging.getLogger()
+        if self.handler not in root.handlers:
+            root.addHandler(self.handler)
+        self.configure(settings)
+        if not self._registered:
+            atexit.register(self.stop)
+            self._registered = True
+
+    def configure(self, settings):
+        """Apply LOG_LEVEL and the rotation settings, e.g. after a reload
+
+        A different file, size or backup count replaces the file handler;
+        records logged meanwhile wait in the queue.
+        """
+        try:
+            logging.getLogger().setLevel(settings.log_level.upper())
+        except ValueError:
+            logging.error("Unknown LOG_LEVEL %s", settings.log_level)
+        target = (settings.log_file, settings.max_log_size, settings.log_backup_count)
+        with self._lock:
+            if target == self._target and self.listener is not None:
+                return
+            self._stop_listener()
+            self.file_handler = RotatingFileHandler(
+                settings.log_file,
+                maxBytes=settings.max_log_size,
+                backupCount=settings.log_backup_count,
+                encoding="utf-8",
+                delay=True,
+            )
+            self.file_handler.setFormatter(JsonFormatter())
+            self._target = target
+            handlers = [self.file_handler]
+            if self.echo_handler is not None:
+                handlers.append(self.echo_handler)
+            self.listener = _Listener(self.queue, *handlers, respect_handler_level=True)
+            self.listener.start()
+
+    def reconfigure(self, settings):
+        """configure(), if the pipeline has been started"""
+        if self.handler in logging.getLogger().handlers:
+            self.configure(settings)
+
+    def _stop_listener(self):
+        """Drain the queue into the current file and close it"""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+        if self.file_handler is not None:
+            if self.handler.dropped:
+                with self.handler._drop_lock:
+                    dropped, self.handler.dropped = self.handler.dropped, 0
+                self.file_handler.handle(
+                    logging.makeLogRecord(
+                        {
+                            "name": __name__,
+                            "levelno": logging.WARNING,
+                            "levelname": "WARNING",
+                            "msg": "%d log records dropped: the log queue was full",
+                            "args": (dropped,),
+                        }
+                    )
+                )
+            self.file_handler.close()
+            self.file_handler = None
+
+    def stop(self):
+        """Write out what is queued and go back to unconfigured logging"""
+        logging.getLogger().removeHandler(self.handler)
+        with self._lock:
+            self._stop_listener()
+            self._target = None
+
+
+# Singleton instance
+log_pipeline = LogPipeline()
@@ -1,30 +1,75 @@
+from startup import LazyImport, startup_profile
+
+import argparse
 import logging
-from typing import Optional
-from rich.console import Console
-from rich.prompt import Prompt, Confirm
-from rich.table import Table
-from rich import box
-from auth import auth_manager
-from database import db_manager
-from commands import (
-    CommandContext,
-    ListProcessesCommand,
-    LoginCommand,
-    ExitCommand,
-    SearchCasesCommand,
-    UserProfileCommand,
-)
+import signal
+import threading
+import time
+
+with startup_profile.step("import rich"):
+    from rich.console import Console
+    from rich.prompt import Prompt
+with startup_profile.step("load config"):
+    from config import config
+
+# Everything below loads on first use; see startup.py
+AuthSession = LazyImport("auth", "AuthSession")
+db_manager = LazyImport("database", "db_manager")
+pool_autosizer = LazyImport("database", "pool_autosizer")
+case_search = LazyImport("search", "case_search")
+case_index = LazyImport("search_index", "case_index")
+active_cases_refresher = LazyImport("active_cases", "active_cases_refresher")
+local_mirror = LazyImport("local_mirror", "local_mirror")
+case_details = LazyImport("case_detail", "case_details")
+court_statistics = LazyImport("court_stats", "court_statistics")
+prefetcher = LazyImport("prefetch", "prefetcher")
+command_profiler = LazyImport("command_profile", "command_profiler")
+log_pipeline = LazyImport("log_pipeline", "log_pipeline")
+command_scope = LazyImport("log_pipeline", "command_scope")
+CommandContext = LazyImport("commands", "CommandContext")
+ListProcessesCommand = LazyImport("commands", "ListProcessesCommand")
+LoginCommand = LazyImport("commands", "LoginCommand")
+ExitCommand = LazyImport("commands", "ExitCommand")
+SearchCasesCommand = LazyImport("commands", "SearchCasesCommand")
+LiveSearchCommand = LazyImport("commands", "LiveSearchCommand")
+CaseDetailCommand = LazyImport("commands", "CaseDetailCommand")
+CasesByCategoryCommand = LazyImport("commands", "CasesByCategoryCommand")
+StatisticsDashboardCommand = LazyImport("commands", "StatisticsDashboardCommand")
+UserProfileCommand = LazyImport("commands", "UserProfileCommand")
+ProfileReportCommand = LazyImport("commands", "ProfileReportCommand")
 
 console = Console()
 
 
 class JECCLI:
     def __init__(self):
-        self.context = CommandContext()
+        self.session = AuthSession()  # this terminal's login
+        self._context = None  # created with the first command
         self.commands = {}  # Will be initialized in main_menu
+        self._instances = {}  # one instance per command class, reused
         self.running = True
+        self.profile = False  # --profile: run commands under command_profiler
+        # Whether this terminal delivers single keystrokes (needed by Live Search)
+        self.interactive_keys = True
         self.current_menu = self.main_menu
 
+    @property
+    def context(self):
+        if self._context is None:
+            self._context = CommandContext(self.session)
+        return self._context
+
+    def command(self, factory):
+        """The shared instance of a command class, created on first use"""
+        instance = self._instances.get(factory)
+        if instance is None:
+            instance = self._instances[factory] = factory()
+            if self.profile and getattr(instance, "profiled", True):
+                instance.execute = command_profiler.wrap(
+                    type(instance).__name__, instance.execute
+                )
+        return instance
+
     def display_header(self, title: str):
         """Display consistent header for all screens"""
         console.print(f"\n[bold blue]JEC System - {title}[/bold blue]")
@@ -38,31 +83,45 @@ class JECCLI:
         self.clear_screen()
         self.display_header("Main Menu")
 
-        user = auth_manager.get_current_user()
+        user = self.session.user
         if not user:
             self.commands = {
-                "1": ("Login", LoginCommand()),
-                "2": ("List Processes", ListProcessesCommand()),
-                "3": ("Search Cases", SearchCasesCommand()),
-                "4": ("Profile", UserProfileCommand()),
-                "5": ("Exit", ExitCommand()),
+                "1": ("Login", LoginCommand),
+                "2": ("List Processes", ListProcessesCommand),
+                "3": ("Search Cases", SearchCasesCommand),
+                "4": ("Profile", UserProfileCommand),
+                "5": ("Exit", ExitCommand),
             }
         else:
-            self.commands = {
-                "1": ("List Processes", ListProcessesCommand()),
-                "2": ("Search Cases", SearchCasesCommand()),
-                "3": ("Profile", UserProfileCommand()),
-                "4": ("Logout", LoginCommand()),
-                "5": ("Exit", ExitCommand()),
-            }
+            entries = [
+                ("List Processes", ListProcessesCommand),
+                ("Search Cases", SearchCasesCommand),
+                ("Live Search", LiveSearchCommand),
+                ("Case Details", CaseDetailCommand),
+                ("Cases by Category", CasesByCategoryCommand),
+                ("Statistics", StatisticsDashboardCommand),
+                ("Profile", UserProfileCommand),
+                ("Logout", LoginCommand),
+                ("Exit", ExitCommand),
+            ]
+            if not self.interactive_keys:
+                entries = [e for e in entries if e[1] is not LiveSearchCommand]
+            self.commands = {str(key): entry for key, entry in enumerate(entries, 1)}
 
-        for key, (desc, _) in self.commands.items():
-            console.print(f"[green]{key}[/green]. {desc}")
+        if self.profile:
+            self.commands["0"] = ("Profile Report", ProfileReportCommand)
 
-        choice = Prompt.ask("\nSelect an option", choices=list(self.commands.keys()))
+        self.show_menu()
+        startup_profile.report_once(console.print)
 
-        # Execute command
-        self.commands[choice][1].execute(self.context)
+        batch = prefetcher.start(user) if user else None
+        choice = Prompt.ask("\nSelect an option", choices=list(self.commands.keys()))
+        if batch is not None:
+            # Keep a prefetch the chosen screen is about to use, drop the rest
+            batch.cancel(keep=getattr(self.commands[choice][1], "prefetch_job", None))
+        desc, factory = self.commands[choice]
+        with command_scope(getattr(factory, "__name__", desc), user):
+            self.run_command(choice)
 
         # Sync the running state between context and CLI
         self.running = self.context.running
@@ -71,6 +130,14 @@ class JECCLI:
         if self.running:
             self.press_enter_to_continue()
 
+    def show_menu(self):
+        for key, (desc, _) in self.commands.items():
+            console.print(f"[green]{key}[/green]. {desc}")
+
+    def run_command(self, choice: str):
+        # Commands (and their modules) load on first pick
+        self.command(self.commands[choice][1]).execute(self.context)
+
     def press_enter_to_continue(self):
         """Utility method for consistent pause"""
         Prompt.ask("\n[dim]Press Enter to continue...[/dim]")
@@ -94,9 +161,180 @@ class JECCLI:
                 self.exit_app()
 
 
+class FullScreenCLI(JECCLI):
+    """JECCLI on the alternate screen, repainting only the regions that change"""
+
+    def __init__(self):
+        super().__init__()
+        from tui import FullScreen
+
+        self.screen = FullScreen()
+        self.last_action = "Ready"
+
+    def clear_screen(self):
+        """Regions are repainted in place; nothing to clear"""
+
+    def display_header(self, title: str):
+        user = self.session.user
+        name = (user.get("nome_completo") or user.get("email", "")) if user else ""
+        self.screen.set_header(f"JEC System - {title}", name)
+
+    def show_menu(self):
+        self.screen.set_menu({key: desc for key, (desc, _) in self.commands.items()})
+        self.screen.set_status(self.last_action)
+        self.screen.refresh()
+
+    def run_command(self, choice: str):
+        desc, factory = self.commands[choice]
+        command = self.command(factory)
+        self.screen.begin_output()
+        started = time.perf_counter()
+        try:
+            if getattr(command, "owns_terminal", False) is True:
+                with self.screen.suspended():
+                    command.execute(self.context)
+            else:
+                command.execute(self.context)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            self.last_action = f"{desc} - {elapsed:.0f} ms"
+            self.screen.set_status(self.last_action)
+            self.screen.refresh()
+
+    def press_enter_to_continue(self):
+        """Results stay on screen until the next command"""
+
+    def run(self):
+        with self.screen.session():
+            super().run()
+
+
+def start_search_index():
+    """Attach the in-memory case index to search and build it in the background"""
+    case_search.index = case_index.resolve()
+    case_index.start_background_build()
+
+
+def start_active_cases_refresher():
+    """Keep the materialized active-case list fresh in the background"""
+    active_cases_refresher.start()
+
+
+def start_local_mirror():
+    """Open the local SQLite copy and keep it synced in the background"""
+    local_mirror.open(config.settings.local_mirror_path)
+    local_mirror.start()
+
+
+def start_prefetch():
+    """Load likely next screens in the background while the menu is idle"""
+    prefetcher.enabled = True
+
+
+def start_logging(echo: bool = False):
+    """Send log records through a background thread to the rotating JSON log"""
+    log_pipeline.start(config.settings, echo=echo)
+
+
+def start_pool_autosizer():
+    """Size the connection pool to demand between its configured limits"""
+    pool_autosizer.start()
+
+
+def apply_settings(settings):
+    """Hand a configuration snapshot to each service, as soon as it is loaded"""
+
+    def tune_refresher(refresher):
+        refresher.min_gap = settings.mv_refresh_min_gap
+        refresher.max_age = settings.mv_refresh_max_age
+
+    db_manager.when_loaded(lambda db: db.reconfigure(settings))
+    case_details.when_loaded(
+        lambda details: details.configure(
+            settings.case_detail_cache_ttl, settings.case_detail_cache_size
+        )
+    )
+    court_statistics.when_loaded(
+        lambda stats: stats.configure(settings.stats_cache_ttl)
+    )
+    prefetcher.when_loaded(
+        lambda fetcher: fetcher.cache.configure(settings.prefetch_ttl)
+    )
+    active_cases_refresher.when_loaded(tune_refresher)
+    local_mirror.when_loaded(
+        lambda mirror: setattr(mirror, "interval", settings.local_mirror_interval)
+    )
+    log_pipeline.when_loaded(lambda pipeline: pipeline.reconfigure(settings))
+
+
+def reload_config():
+    """Re-read .env and the environment and apply the result to running services"""
+    try:
+        config.reload()
+        logging.info("Configuration reloaded")
+    except ValueError as error:
+        logging.error("Configuration reload rejected: %s", str(error))
+
+
+def watch_config_reload():
+    """Reload configuration on SIGHUP (`kill -HUP <pid>`) where available"""
+    if hasattr(signal, "SIGHUP"):
+        # The handler runs on the main thread, possibly inside a query; the
+        # reload takes the pool lock, so it runs on a thread of its own
+        signal.signal(
+            signal.SIGHUP,
+            lambda signum, frame: threading.Thread(
+                target=reload_config, name="jec-config-reload", daemon=True
+            ).start(),
+        )
+
+
+def start_background_services():
+    """Start the optional caches and sync threads enabled in config"""
+    settings = config.settings
+    apply_settings(settings)
+    config.subscribe(apply_settings)
+    watch_config_reload()
+    if settings.search_index_enabled:
+        start_search_index()
+    if settings.mv_refresh_enabled:
+        start_active_cases_refresher()
+    if settings.local_mirror_enabled:
+        start_local_mirror()
+    if settings.prefetch_enabled:
+        start_prefetch()
+    if settings.db_pool_autosize:
+        start_pool_autosizer()
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="JEC System")
+    parser.add_argument(
+        "--startup-profile",
+        action="store_true",
+        help="print import and initialization timings at the main menu",
+    )
+    parser.add_argument(
+        "--fullscreen",
+        action="store_true",
+        help="run on the alternate screen, repainting only changed regions",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="profiles",
+        metavar="DIR",
+        help="profile each command and write one report per run to DIR",
+    )
+    args = parser.parse_args()
+    startup_profile.enabled = args.startup_profile
     try:
-        cli = JECCLI()
+        start_logging()
+        start_background_services()
+        cli = FullScreenCLI() if args.fullscreen else JECCLI()
+        if args.profile:
+            command_profiler.start(args.profile)
+            cli.profile = True
         cli.run()
     except Exception as error:
         logging.critical("Application crash: %s", str(error))
@@ -0,0 +1,500 @@
+"""
+Schema migrations for JEC System
+
+Migrations are plain idempotent SQL scripts applied in order and recorded in
+the schema_migrations table. Run from the project root with:
+python migrations.py
+"""
+
+import logging
+from typing import List, Tuple
+from database import db_manager
+
+MIGRATIONS: List[Tuple[str, str]] = [
+    (
+        "0001_case_access_indexes",
+        """
+        CREATE INDEX IF NOT EXISTS idx_processos_juiz_id
+            ON processos (juiz_id);
+        CREATE INDEX IF NOT EXISTS idx_processos_servidor_id
+            ON processos (servidor_id);
+        CREATE INDEX IF NOT EXISTS idx_partes_advogado_id
+            ON partes (advogado_id);
+        CREATE INDEX IF NOT EXISTS idx_partes_cpf_cnpj_digits
+            ON partes ((regexp_replace(cpf_cnpj, '\\D', '', 'g')));
+        CREATE INDEX IF NOT EXISTS idx_partes_processo_parte
+            ON partes_processo (parte_id, processo_id);
+        CREATE INDEX IF NOT EXISTS idx_partes_processo_processo
+            ON partes_processo (processo_id);
+        """,
+    ),
+    (
+        "0002_case_search_document",
+        """
+        ALTER TABLE processos ADD COLUMN IF NOT EXISTS documento_busca tsvector;
+
+        CREATE OR REPLACE FUNCTION jec_documento_busca(
+            p_id uuid, p_numero text, p_titulo text, p_descricao text)
+        RETURNS tsvector LANGUAGE sql STABLE AS $$
+            SELECT setweight(to_tsvector('simple', coalesce(p_numero, '')), 'A')
+                || setweight(to_tsvector('portuguese', coalesce(p_titulo, '')), 'A')
+                || setweight(to_tsvector('portuguese', coalesce(
+                       (SELECT string_agg(pa.nome, ' ')
+                        FROM partes_processo pp
+                        JOIN partes pa ON pa.id = pp.parte_id
+                        WHERE pp.processo_id = p_id), '')), 'B')
+                || setweight(to_tsvector('portuguese', coalesce(p_descricao, '')), 'C')
+        $$;
+
+        CREATE OR REPLACE FUNCTION jec_processos_documento_busca()
+        RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            NEW.documento_busca := jec_documento_busca(
+                NEW.id, NEW.numero_processo, NEW.titulo, NEW.descricao);
+            RETURN NEW;
+        END $$;
+
+        DROP TRIGGER IF EXISTS trg_processos_documento_busca ON processos;
+        CREATE TRIGGER trg_processos_documento_busca
+            BEFORE INSERT OR UPDATE OF numero_processo, titulo, descricao
+            ON processos FOR EACH ROW
+            EXECUTE FUNCTION jec_processos_documento_busca();
+
+        CREATE OR REPLACE FUNCTION jec_refresh_documento_busca(p_processo_ids uuid[])
+        RETURNS void LANGUAGE sql AS $$
+            UPDATE processos p
+            SET documento_busca = jec_documento_busca(
+                p.id, p.numero_processo, p.titulo, p.descricao)
+            WHERE p.id = ANY(p_processo_ids)
+        $$;
+
+        CREATE OR REPLACE FUNCTION jec_partes_processo_documento_busca()
+        RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                PERFORM jec_refresh_documento_busca(ARRAY[OLD.processo_id]);
+                RETURN OLD;
+            END IF;
+            IF TG_OP = 'UPDATE' AND OLD.processo_id <> NEW.processo_id THEN
+                PERFORM jec_refresh_documento_busca(ARRAY[OLD.processo_id]);
+            END IF;
+            PERFORM jec_refresh_documento_busca(ARRAY[NEW.processo_id]);
+            RETURN NEW;
+        END $$;
+
+        DROP TRIGGER IF EXISTS trg_partes_processo_documento_busca ON partes_processo;
+        CREATE TRIGGER trg_partes_processo_documento_busca
+            AFTER INSERT OR UPDATE OR DELETE ON partes_processo
+            FOR EACH ROW EXECUTE FUNCTION jec_partes_processo_documento_busca();
+
+        CREATE OR REPLACE FUNCTION jec_partes_documento_busca()
+        RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            PERFORM jec_refresh_documento_busca(ARRAY(
+                SELECT pp.processo_id FROM partes_processo pp
+                WHERE pp.parte_id = NEW.id));
+            RETURN NEW;
+        END $$;
+
+        DROP TRIGGER IF EXISTS trg_partes_documento_busca ON partes;
+        CREATE TRIGGER trg_partes_documento_busca
+            AFTER UPDATE OF nome ON partes
+            FOR EACH ROW EXECUTE FUNCTION jec_partes_documento_busca();
+
+        UPDATE processos p
+        SET documento_busca = jec_documento_busca(
+            p.id, p.numero_processo, p.titulo, p.descricao)
+        WHERE p.documento_busca IS NULL;
+
+        CREATE INDEX IF NOT EXISTS idx_processos_documento_busca
+            ON processos USING gin (documento_busca);
+        """,
+    ),
+    (
+        "0003_case_search_trigram",
+        """
+        DO $$
+        BEGIN
+            CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        EXCEPTION WHEN OTHERS THEN
+            RAISE NOTICE 'pg_trgm unavailable, substring search falls back to ILIKE';
+        END $$;
+
+        DO $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm') THEN
+                CREATE INDEX IF NOT EXISTS idx_processos_numero_trgm
+                    ON processos USING gin (numero_processo gin_trgm_ops);
+                CREATE INDEX IF NOT EXISTS idx_processos_titulo_trgm
+                    ON processos USING gin (titulo gin_trgm_ops);
+                CREATE INDEX IF NOT EXISTS idx_partes_nome_trgm
+                    ON partes USING gin (nome gin_trgm_ops);
+            END IF;
+        END $$;
+        """,
+    ),
+    (
+        "0004_processos_data_atualizacao_index",
+        """
+        CREATE INDEX IF NOT EXISTS idx_processos_data_atualizacao
+            ON processos (data_atualizacao);
+        """,
+    ),
+    (
+        "0005_processos_numero_digits_index",
+        """
+        CREATE INDEX IF NOT EXISTS idx_processos_numero_digits
+            ON processos ((regexp_replace(numero_processo, '\\D', '', 'g')));
+        """,
+    ),
+    (
+        "0006_category_tree_support",
+        """
+        CREATE TABLE IF NOT EXISTS categorias_versao (versao BIGINT NOT NULL);
+        INSERT INTO categorias_versao (versao)
+            SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM categorias_versao);
+
+        CREATE OR REPLACE FUNCTION jec_categorias_versao()
+        RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            UPDATE categorias_versao SET versao = versao + 1;
+            RETURN NULL;
+        END $$;
+
+        DROP TRIGGER IF EXISTS trg_categorias_versao ON categorias_causas;
+        CREATE TRIGGER trg_categorias_versao
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON categorias_causas
+            FOR EACH STATEMENT EXECUTE FUNCTION jec_categorias_versao();
+
+        CREATE INDEX IF NOT EXISTS idx_processos_categoria_id
+            ON processos (categoria_id);
+        CREATE INDEX IF NOT EXISTS idx_processos_subcategoria_id
+            ON processos (subcategoria_id);
+        """,
+    ),
+    (
+        "0007_processos_ativos_materialized",
+        """
+        CREATE MATERIALIZED VIEW IF NOT EXISTS processos_ativos_mv AS
+            SELECT DISTINCT ON (a.id) a.*, p.juiz_id, p.servidor_id
+            FROM processos_ativos a
+            JOIN processos p ON p.id = a.id
+            ORDER BY a.id;
+
+        -- REFRESH ... CONCURRENTLY requires a unique index
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_processos_ativos_mv_id
+            ON processos_ativos_mv (id);
+        CREATE INDEX IF NOT EXISTS idx_processos_ativos_mv_juiz
+            ON processos_ativos_mv (juiz_id, data_distribuicao DESC);
+        CREATE INDEX IF NOT EXISTS idx_processos_ativos_mv_servidor
+            ON processos_ativos_mv (servidor_id, data_distribuicao DESC);
+        CREATE INDEX IF NOT EXISTS idx_processos_ativos_mv_data
+            ON processos_ativos_mv (data_distribuicao DESC);
+
+        CREATE TABLE IF NOT EXISTS mv_refresh_state (
+            nome VARCHAR(100) PRIMARY KEY,
+            atualizada_em TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            versao_alteracao BIGINT NOT NULL DEFAULT 0,
+            versao_aplicada BIGINT NOT NULL DEFAULT 0);
+        INSERT INTO mv_refresh_state (nome) VALUES ('processos_ativos_mv')
+            ON CONFLICT (nome) DO NOTHING;
+
+        CREATE OR REPLACE FUNCTION jec_processos_ativos_mv_alterado()
+        RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            UPDATE mv_refresh_state SET versao_alteracao = versao_alteracao + 1
+            WHERE nome = 'processos_ativos_mv';
+            RETURN NULL;
+        END $$;
+
+        DROP TRIGGER IF EXISTS trg_processos_ativos_mv ON processos;
+        CREATE TRIGGER trg_processos_ativos_mv
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON processos
+            FOR EACH STATEMENT EXECUTE FUNCTION jec_processos_ativos_mv_alterado();
+        DROP TRIGGER IF EXISTS trg_processos_ativos_mv ON partes;
+        CREATE TRIGGER trg_processos_ativos_mv
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON partes
+            FOR EACH STATEMENT EXECUTE FUNCTION jec_processos_ativos_mv_alterado();
+        DROP TRIGGER IF EXISTS trg_processos_ativos_mv ON partes_processo;
+        CREATE TRIGGER trg_processos_ativos_mv
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON partes_processo
+            FOR EACH STATEMENT EXECUTE FUNCTION jec_processos_ativos_mv_alterado();
+        DROP TRIGGER IF EXISTS trg_processos_ativos_mv ON categorias_causas;
+        CREATE TRIGGER trg_processos_ativos_mv
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON categorias_causas
+            FOR EACH STATEMENT EXECUTE FUNCTION jec_processos_ativos_mv_alterado();
+
+        -- Returns FALSE without waiting when another session is refreshing
+        CREATE OR REPLACE FUNCTION jec_refresh_processos_ativos_mv()
+        RETURNS boolean LANGUAGE plpgsql AS $$
+        DECLARE
+            alvo BIGINT;
+        BEGIN
+            IF NOT pg_try_advisory_xact_lock(hashtext('processos_ativos_mv')) THEN
+                RETURN FALSE;
+            END IF;
+            SELECT versao_alteracao INTO alvo
+            FROM mv_refresh_state WHERE nome = 'processos_ativos_mv';
+            REFRESH MATERIALIZED VIEW CONCURRENTLY processos_ativos_mv;
+            UPDATE mv_refresh_state
+            SET versao_aplicada = alvo, atualizada_em = CURRENT_TIMESTAMP
+            WHERE nome = 'processos_ativos_mv';
+            RETURN TRUE;
+        END $$;
+        """,
+    ),
+    (
+        "0008_valor_causa_limit_trigger",
+        """
+        -- Lowest valor_maximo on the path from a category up to its root
+        CREATE OR REPLACE FUNCTION jec_limite_categoria(p_categoria uuid)
+        RETURNS numeric LANGUAGE sql STABLE AS $$
+            WITH RECURSIVE caminho AS (
+                SELECT c.id, c.categoria_pai_id, c.valor_maximo, 0 AS nivel
+                FROM categorias_causas c WHERE c.id = p_categoria
+                UNION ALL
+                SELECT c.id, c.categoria_pai_id, c.valor_maximo, caminho.nivel + 1
+                FROM categorias_causas c
+                JOIN caminho ON c.id = caminho.categoria_pai_id
+                WHERE caminho.nivel < 20)
+            SELECT MIN(valor_maximo) FROM caminho
+        $$;
+
+        CREATE OR REPLACE FUNCTION jec_valida_valor_causa()
+        RETURNS trigger LANGUAGE plpgsql AS $$
+        DECLARE
+            limite NUMERIC;
+        BEGIN
+            limite := LEAST(
+                jec_limite_categoria(NEW.categoria_id),
+                jec_limite_categoria(NEW.subcategoria_id));
+            IF NEW.valor_causa > limite THEN
+                RAISE EXCEPTION 'valor_causa % exceeds the category limit %',
+                    NEW.valor_causa, limite
+                    USING ERRCODE = 'check_violation';
+            END IF;
+            RETURN NULL;
+        END $$;
+
+        DROP TRIGGER IF EXISTS trg_valida_valor_causa ON processos;
+        CREATE CONSTRAINT TRIGGER trg_valida_valor_causa
+            AFTER INSERT OR UPDATE OF valor_causa, categoria_id, subcategoria_id
+            ON processos DEFERRABLE INITIALLY IMMEDIATE
+            FOR EACH ROW EXECUTE FUNCTION jec_valida_valor_causa();
+        -- Enforcement is opt-in: see validation.ValorCausaValidator.set_enforced
+        ALTER TABLE processos DISABLE TRIGGER trg_valida_valor_causa;
+        """,
+    ),
+    (
+        "0009_change_feed",
+        """
+        UPDATE processos SET data_atualizacao = COALESCE(data_criacao, now())
+            WHERE data_atualizacao IS NULL;
+
+        -- Keyset index for DatabaseManager.fetch_changes
+        CREATE INDEX IF NOT EXISTS idx_processos_feed
+            ON processos (data_atualizacao, id);
+
+        -- Every write stamps the row, whoever performs it
+        CREATE OR REPLACE FUNCTION jec_processos_atualizado()
+        RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            NEW.data_atualizacao := clock_timestamp();
+            RETURN NEW;
+        END $$;
+
+        DROP TRIGGER IF EXISTS trg_processos_atualizado ON processos;
+        CREATE TRIGGER trg_processos_atualizado
+            BEFORE INSERT OR UPDATE ON processos
+            FOR EACH ROW EXECUTE FUNCTION jec_processos_atualizado();
+
+        -- Party and document changes count as changes of their cases
+        CREATE OR REPLACE FUNCTION jec_tocar_processos(p_processo_ids uuid[])
+        RETURNS void LANGUAGE sql AS $$
+            UPDATE processos SET data_atualizacao = clock_timestamp()
+            WHERE id = ANY(p_processo_ids)
+        $$;
+
+        CREATE OR REPLACE FUNCTION jec_filho_processo_alterado()
+        RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                PERFORM jec_tocar_processos(ARRAY[OLD.processo_id]);
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                PERFORM jec_tocar_processos(ARRAY[NEW.processo_id]);
+            END IF;
+            RETURN NULL;
+        END $$;
+
+        DROP TRIGGER IF EXISTS trg_partes_processo_feed ON partes_processo;
+        CREATE TRIGGER trg_partes_processo_feed
+            AFTER INSERT OR UPDATE OR DELETE ON partes_processo
+            FOR EACH ROW EXECUTE FUNCTION jec_filho_processo_alterado();
+        DROP TRIGGER IF EXISTS trg_documentos_feed ON documentos;
+        CREATE TRIGGER trg_documentos_feed
+            AFTER INSERT OR UPDATE OR DELETE ON documentos
+            FOR EACH ROW EXECUTE FUNCTION jec_filho_processo_alterado();
+
+        CREATE OR REPLACE FUNCTION jec_parte_alterada()
+        RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            PERFORM jec_tocar_processos(ARRAY(
+                SELECT processo_id FROM partes_processo WHERE parte_id = NEW.id));
+            RETURN NULL;
+        END $$;
+
+        DROP TRIGGER IF EXISTS trg_partes_feed ON partes;
+        CREATE TRIGGER trg_partes_feed
+            AFTER UPDATE ON partes
+            FOR EACH ROW WHEN (OLD IS DISTINCT FROM NEW)
+            EXECUTE FUNCTION jec_parte_alterada();
+
+        -- Tombstones, so consumers learn about deleted cases too
+        CREATE TABLE IF NOT EXISTS processos_removidos (
+            id UUID PRIMARY KEY,
+            data_atualizacao TIMESTAMP NOT NULL);
+        CREATE INDEX IF NOT EXISTS idx_processos_removidos_feed
+            ON processos_removidos (data_atualizacao, id);
+
+        CREATE OR REPLACE FUNCTION jec_processo_removido()
+        RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO processos_removidos (id, data_atualizacao)
+            VALUES (OLD.id, clock_timestamp())
+            ON CONFLICT (id) DO UPDATE SET data_atualizacao = EXCLUDED.data_atualizacao;
+            RETURN NULL;
+        END $$;
+
+        DROP TRIGGER IF EXISTS trg_processos_removidos ON processos;
+        CREATE TRIGGER trg_processos_removidos
+            AFTER DELETE ON processos
+            FOR EACH ROW EXECUTE FUNCTION jec_processo_removido();
+
+        -- Per-consumer positions in the feed
+        CREATE TABLE IF NOT EXISTS feed_watermarks (
+            consumidor VARCHAR(100) PRIMARY KEY,
+            data_atualizacao TIMESTAMP NOT NULL,
+            id UUID NOT NULL,
+            gravado_em TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP);
+        """,
+    ),
+    (
+        "0010_change_feed_commit_order",
+        """
+        -- Feed key: the writing transaction's id instead of clock_timestamp().
+        -- A stamp taken at write time can commit long after later stamps
+        -- have been read past; fetch_changes only returns rows of
+        -- transactions older than every one still running, so no row can
+        -- appear behind a consumer's position.
+        ALTER TABLE processos
+            ADD COLUMN IF NOT EXISTS transacao BIGINT NOT NULL DEFAULT 0;
+        ALTER TABLE processos_removidos
+            ADD COLUMN IF NOT EXISTS transacao BIGINT NOT NULL DEFAULT 0;
+        CREATE INDEX IF NOT EXISTS idx_processos_feed_transacao
+            ON processos (transacao, id);
+        CREATE INDEX IF NOT EXISTS idx_processos_removidos_feed_transacao
+            ON processos_removidos (transacao, id);
+        DROP INDEX IF EXISTS idx_processos_feed;
+        DROP INDEX IF EXISTS idx_processos_removidos_feed;
+
+        CREATE OR REPLACE FUNCTION jec_processos_atualizado()
+        RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            NEW.data_atualizacao := clock_timestamp();
+            NEW.transacao := txid_current();
+            RETURN NEW;
+        END $$;
+
+        CREATE OR REPLACE FUNCTION jec_processo_removido()
+        RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO processos_removidos (id, data_atualizacao, transacao)
+            VALUES (OLD.id, clock_timestamp(), txid_current())
+            ON CONFLICT (id) DO UPDATE
+            SET data_atualizacao = EXCLUDED.data_atualizacao,
+                transacao = EXCLUDED.transacao;
+            RETURN NULL;
+        END $$;
+
+        -- Timestamp positions do not translate; consumers start over
+        DELETE FROM feed_watermarks;
+        ALTER TABLE feed_watermarks DROP COLUMN IF EXISTS data_atualizacao;
+        ALTER TABLE feed_watermarks
+            ADD COLUMN IF NOT EXISTS transacao BIGINT NOT NULL DEFAULT 0;
+        """,
+    ),
+    (
+        "0011_processos_ativos_mv_pending_rows",
+        """
+        -- Writers used to bump a counter on the one mv_refresh_state row,
+        -- whose lock made every write transaction wait for the previous
+        -- one to commit. Each writing statement now inserts a row of its
+        -- own instead; inserts never wait on each other.
+        CREATE TABLE IF NOT EXISTS processos_ativos_mv_pendencias (
+            registrada_em TIMESTAMP NOT NULL DEFAULT clock_timestamp());
+
+        CREATE OR REPLACE FUNCTION jec_processos_ativos_mv_alterado()
+        RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO processos_ativos_mv_pendencias DEFAULT VALUES;
+            RETURN NULL;
+        END $$;
+
+        CREATE OR REPLACE FUNCTION jec_refresh_processos_ativos_mv()
+        RETURNS boolean LANGUAGE plpgsql AS $$
+        BEGIN
+            IF NOT pg_try_advisory_xact_lock(hashtext('processos_ativos_mv')) THEN
+                RETURN FALSE;
+            END IF;
+            -- Cleared before the refresh takes its snapshot, so every change
+            -- cleared here is in the refreshed data; later ones stay pending
+            DELETE FROM processos_ativos_mv_pendencias;
+            REFRESH MATERIALIZED VIEW CONCURRENTLY processos_ativos_mv;
+            UPDATE mv_refresh_state SET atualizada_em = CURRENT_TIMESTAMP
+            WHERE nome = 'processos_ativos_mv';
+            RETURN TRUE;
+        END $$;
+
+        ALTER TABLE mv_refresh_state
+            DROP COLUMN IF EXISTS versao_alteracao,
+            DROP COLUMN IF EXISTS versao_aplicada;
+        -- Changes counted under the old scheme: refresh once
+        INSERT INTO processos_ativos_mv_pendencias DEFAULT VALUES;
+        """,
+    ),
+]
+
+
+def applied_migrations() -> List[str]:
+    """Names of migrations already recorded in the database"""
+    db_manager.execute_query(
+        """CREATE TABLE IF NOT EXISTS schema_migrations (
+            name VARCHAR(100) PRIMARY KEY,
+            aplicada_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"""
+    )
+    rows = db_manager.execute_query(
+        "SELECT name FROM schema_migrations", return_results=True
+    )
+    return [row["name"] for row in rows]
+
+
+def apply_migrations() -> List[str]:
+    """Apply pending migrations in order and return their names"""
+    done = set(applied_migrations())
+    applied = []
+    for name, script in MIGRATIONS:
+        if name in done:
+            continue
+        db_manager.execute_query(script)
+        db_manager.execute_query(
+            "INSERT INTO schema_migrations (name) VALUES (%s)", (name,)
+        )
+        logging.info("Applied migration %s", name)
+        applied.append(name)
+    return applied
+
+
+if __name__ == "__main__":
+    for migration in apply_migrations() or ["(nothing to apply)"]:
+        print(migration)
@@ -0,0 +1,82 @@
+"""
+Value normalization helpers for JEC System
+
+Brazilian identifiers (CPF, CNPJ, CNJ case numbers) are stored with
+inconsistent punctuation. These helpers reduce them to a canonical form so
+that comparisons and index lookups do not depend on formatting.
+"""
+
+import re
+from typing import Optional
+
+_NON_DIGITS = re.compile(r"\D")
+
+# SQL expression matching digits_only() server-side; used by expression indexes
+SQL_DIGITS_ONLY = "regexp_replace({column}, '\\D', '', 'g')"
+
+
+def digits_only(value: Optional[str]) -> str:
+    """Strip every non-digit character from a document or case number"""
+    if not value:
+        return ""
+    return _NON_DIGITS.sub("", str(value))
+
+
+def sql_digits_only(column: str) -> str:
+    """Build the server-side equivalent of digits_only() for a column"""
+    return SQL_DIGITS_ONLY.format(column=column)
+
+
+# Term kinds recognised by classify_term()
+TERM_CNJ = "cnj"
+TERM_CPF = "cpf"
+TERM_CNPJ = "cnpj"
+TERM_TEXT = "text"
+
+_CNJ_FORMATTED = re.compile(r"^\d{7}-\d{2}\.\d{4}\.\d\.\d{2}\.\d{4}$")
+_DOCUMENT_CHARS = re.compile(r"^[\d.\-/\s]+$")
+
+
+def is_valid_cpf(digits: str) -> bool:
+    """Check the two CPF verification digits"""
+    if len(digits) != 11 or digits == digits[0] * 11:
+        return False
+    for size in (9, 10):
+        total = sum(int(d) * w for d, w in zip(digits[:size], range(size + 1, 1, -1)))
+        if (total * 10 % 11) % 10 != int(digits[size]):
+            return False
+    return True
+
+
+def is_valid_cnpj(digits: str) -> bool:
+    """Check the two CNPJ verification digits"""
+    if len(digits) != 14 or digits == digits[0] * 14:
+        return False
+    for size in (12, 13):
+        weights = list(range(size - 7, 1, -1)) + list(range(9, 1, -1))
+        total = sum(int(d) * w for d, w in zip(digits[:size], weights))
+        remainder = total % 11
+        if (0 if remainder < 2 else 11 - remainder) != int(digits[size]):
+            return False
+    return True
+
+
+def classify_term(term: str) -> tuple:
+    """Return (kind, normalized value) for a search term
+
+    CNJ case numbers (formatted, or 20 bare digits) normalize to their
+    digits, as do CPF/CNPJ values with valid verification digits. Anything
+    else is free text and is returned stripped.
+    """
+    term = (term or "").strip()
+    if _CNJ_FORMATTED.match(term):
+        return TERM_CNJ, digits_only(term)
+    if _DOCUMENT_CHARS.match(term):
+        digits = digits_only(term)
+        if len(digits) == 20:
+            return TERM_CNJ, digits
+        if is_valid_cpf(digits):
+            return TERM_CPF, digits
+        if is_valid_cnpj(digits):
+            return TERM_CNPJ, digits
+    return TERM_TEXT, term
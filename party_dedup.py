@@ -0,0 +1,266 @@
+"""
+Duplicate party detection for JEC System
+
+The same person is often registered several times in partes with small
+differences in nome or in how cpf_cnpj is punctuated. Comparing every pair
+is quadratic, so candidates are blocked and compared only within a block:
+
+1. Document blocks: rows sharing the same digits-only CPF/CNPJ (served in
+   order by the expression index from migration 0001) are duplicates
+   outright.
+2. Name blocks: rows whose folded first and last names start with the
+   same three letters are streamed in key order, sorted by name within the
+   block. Each row is compared only with the WINDOW rows before it (sorted
+   neighbourhood), so large blocks cost O(n * WINDOW). A pair is proposed
+   when the names share enough trigrams or sound alike, and their documents
+   do not contradict each other.
+3. Sound-alike blocks: the same comparison over blocks keyed on the first
+   three letters of the first and last words of the phonetic key, computed
+   server-side, so spellings such as Thiago/Tiago or Kauã/Cauã meet even
+   though their name blocks differ.
+
+Each pass skips pairs an earlier pass already covers (same document, or
+same name block), so no pair is proposed twice and nothing is remembered
+across blocks. All passes read through server-side cursors, so memory
+stays bounded by one document block or one window. Proposals are yielded
+as they are found; nothing is merged. Within a proposal, the record
+linked to more cases is kept.
+
+Run `python party_dedup.py > proposals.csv` to export proposals.
+"""
+
+import csv
+import re
+import sys
+from collections import deque
+from itertools import groupby
+from typing import (
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+from database import db_manager
+from normalization import digits_only, is_valid_cnpj, is_valid_cpf, sql_digits_only
+from search_index import fold, trigrams
+
+WINDOW = 20
+NAME_THRESHOLD = 0.6
+
+_NAME_STOPWORDS = {"de", "da", "do", "das", "dos", "e"}
+
+# Rough Portuguese sound-alike rules, applied in order to a folded name
+_PHONETIC_RULES = [
+    (re.compile(r"(.)\1+"), r"\1"),
+    (re.compile(r"ph"), "f"),
+    (re.compile(r"th"), "t"),
+    (re.compile(r"ch|sh"), "x"),
+    (re.compile(r"lh"), "li"),
+    (re.compile(r"nh"), "ni"),
+    (re.compile(r"c(?=[ei])"), "s"),
+    (re.compile(r"qu|k"), "c"),
+    (re.compile(r"(?<=[aeiou])s(?=[aeiou])"), "z"),
+    (re.compile(r"z\b"), "s"),
+    (re.compile(r"y"), "i"),
+    (re.compile(r"w"), "v"),
+    (re.compile(r"\bh"), ""),
+]
+
+
+# Server-side blocking key: prefixes of the unaccented first and last names,
+# with connectives removed from the in-block sort order
+_ACCENTED = "áàâãäéèêëíìîïóòôõöúùûüçñ"
+_PLAIN = "aaaaaeeeeiiiiooooouuuucn"
+_FOLDED_NAME = f"translate(lower(btrim(pa.nome)), '{_ACCENTED}', '{_PLAIN}')"
+
+
+def _block_key(name: str) -> str:
+    """SQL: first three letters of the first and of the last word of `name`"""
+    return (
+        f"left(split_part({name}, ' ', 1), 3) || ' ' || "
+        f"left(regexp_replace({name}, '^.*\\s', ''), 3)"
+    )
+
+
+def _sql_phonetic_key(name: str) -> str:
+    """SQL counterpart of phonetic_key() over an already folded name"""
+    stopwords = "|".join(sorted(_NAME_STOPWORDS))
+    key = f"regexp_replace({name}, '[^a-z]+', ' ', 'g')"
+    key = f"regexp_replace({key}, '\\y({stopwords})\\y', ' ', 'g')"
+    key = f"btrim(regexp_replace({key}, '\\s+', ' ', 'g'))"
+    for pattern, replacement in _PHONETIC_RULES:
+        # PostgreSQL spells the word boundary \y
+        sql_pattern = pattern.pattern.replace("\\b", "\\y")
+        key = f"regexp_replace({key}, '{sql_pattern}', '{replacement}', 'g')"
+    return key
+
+
+_NAME_KEY = _block_key(_FOLDED_NAME)
+_SORT_NAME = f"regexp_replace({_FOLDED_NAME}, '\\s(de|da|do|das|dos|e)\\s', ' ', 'g')"
+
+_PARTY_COLUMNS = """pa.id, pa.nome, pa.cpf_cnpj, pa.tipo,
+        COALESCE(v.vinculos, 0) AS vinculos
+    FROM partes pa
+    LEFT JOIN (
+        SELECT parte_id, COUNT(*) AS vinculos
+        FROM partes_processo GROUP BY parte_id
+    ) v ON v.parte_id = pa.id"""
+
+_DOCUMENT_QUERY = f"""SELECT {sql_digits_only('pa.cpf_cnpj')} AS bloco, {_PARTY_COLUMNS}
+    WHERE {sql_digits_only('pa.cpf_cnpj')} <> ''
+    ORDER BY bloco, pa.id"""
+
+_NAME_QUERY = f"""SELECT {_NAME_KEY} AS bloco, {_PARTY_COLUMNS}
+    ORDER BY bloco, {_SORT_NAME}, pa.id"""
+
+_PHONETIC_QUERY = f"""SELECT {_block_key('f.chave')} AS bloco,
+        {_NAME_KEY} AS bloco_nome, {_PARTY_COLUMNS}
+    CROSS JOIN LATERAL (SELECT {_sql_phonetic_key(_FOLDED_NAME)} AS chave) f
+    ORDER BY bloco, f.chave, pa.id"""
+
+
+class MergeProposal(NamedTuple):
+    keep_id: object
+    duplicate_id: object
+    reason: str
+    score: float
+
+
+def phonetic_key(name: Optional[str]) -> str:
+    """Sound-alike key of a name, ignoring connectives like 'da' and 'dos'"""
+    tokens = [t for t in re.findall(r"[a-z]+", fold(name)) if t not in _NAME_STOPWORDS]
+    key = " ".join(tokens)
+    for pattern, replacement in _PHONETIC_RULES:
+        key = pattern.sub(replacement, key)
+    return key
+
+
+def name_similarity(a: Optional[str], b: Optional[str]) -> float:
+    """Jaccard similarity of the two folded names' trigram sets"""
+    grams_a, grams_b = trigrams(fold(a)), trigrams(fold(b))
+    if not grams_a or not grams_b:
+        return 0.0
+    return len(grams_a & grams_b) / len(grams_a | grams_b)
+
+
+def documents_conflict(a: Optional[str], b: Optional[str]) -> bool:
+    """True when both parties carry different valid CPF/CNPJ numbers"""
+    a, b = digits_only(a), digits_only(b)
+    valid = lambda d: is_valid_cpf(d) or is_valid_cnpj(d)  # noqa: E731
+    return bool(a and b and a != b and valid(a) and valid(b))
+
+
+def _same_document(a: Dict, b: Dict) -> bool:
+    """Pairs the document pass covers"""
+    document = digits_only(a["cpf_cnpj"])
+    return bool(document) and document == digits_only(b["cpf_cnpj"])
+
+
+def _same_name_block(a: Dict, b: Dict) -> bool:
+    """Pairs the document or name pass covers"""
+    return _same_document(a, b) or a["bloco_nome"] == b["bloco_nome"]
+
+
+def _keep_first(a: Dict, b: Dict) -> Tuple[Dict, Dict]:
+    """Order a pair so the better-linked record is kept
+
+    Ties keep the lower id (ids are random), so reruns pick the same record.
+    """
+    if (b["vinculos"], str(a["id"])) > (a["vinculos"], str(b["id"])):
+        return b, a
+    return a, b
+
+
+class PartyDeduplicator:
+    """Stream merge proposals for duplicate partes rows"""
+
+    def __init__(
+        self,
+        window: int = WINDOW,
+        threshold: float = NAME_THRESHOLD,
+        batch_size: int = 5000,
+    ):
+        self.window = window
+        self.threshold = threshold
+        self.batch_size = batch_size
+
+    def proposals(self) -> Iterator[MergeProposal]:
+        """Document matches, then name matches, then sound-alike matches"""
+        yield from self.document_matches()
+        yield from self.name_matches()
+        yield from self.phonetic_matches()
+
+    def document_matches(self) -> Iterator[MergeProposal]:
+        rows = db_manager.iter_query(_DOCUMENT_QUERY, batch_size=self.batch_size)
+        for _, block in groupby(rows, key=lambda row: row["bloco"]):
+            yield from self.compare_document_block(list(block))
+
+    def name_matches(self) -> Iterator[MergeProposal]:
+        rows = db_manager.iter_query(_NAME_QUERY, batch_size=self.batch_size)
+        for _, block in groupby(rows, key=lambda row: row["bloco"]):
+            yield from self.compare_name_block(block, covered=_same_document)
+
+    def phonetic_matches(self) -> Iterator[MergeProposal]:
+        rows = db_manager.iter_query(_PHONETIC_QUERY, batch_size=self.batch_size)
+        for _, block in groupby(rows, key=lambda row: row["bloco"]):
+            yield from self.compare_name_block(block, covered=_same_name_block)
+
+    @staticmethod
+    def compare_document_block(block: List[Dict]) -> Iterator[MergeProposal]:
+        """Every row in a document block merges into the best-linked one"""
+        if len(block) < 2:
+            return
+        keep = block[0]
+        for row in block[1:]:
+            keep, _ = _keep_first(keep, row)
+        for row in block:
+            if row is not keep:
+                yield MergeProposal(keep["id"], row["id"], "document", 1.0)
+
+    def compare_name_block(
+        self,
+        block: Iterable[Dict],
+        covered: Optional[Callable[[Dict, Dict], bool]] = None,
+    ) -> Iterator[MergeProposal]:
+        """Compare each row with the `window` rows preceding it in its block
+
+        Pairs for which `covered` is true were handled by an earlier pass.
+        """
+        recent: Deque[Tuple[Dict, str]] = deque(maxlen=self.window)
+        for row in block:
+            sound = phonetic_key(row["nome"])
+            for other, other_sound in recent:
+                if row["tipo"] != other["tipo"]:
+                    continue
+                if covered is not None and covered(row, other):
+                    continue
+                if documents_conflict(row["cpf_cnpj"], other["cpf_cnpj"]):
+                    continue
+                score = name_similarity(row["nome"], other["nome"])
+                if sound and sound == other_sound:
+                    reason, score = "phonetic", max(score, self.threshold)
+                elif score >= self.threshold:
+                    reason = "name"
+                else:
+                    continue
+                keep, duplicate = _keep_first(other, row)
+                yield MergeProposal(
+                    keep["id"], duplicate["id"], reason, round(score, 3)
+                )
+            recent.append((row, sound))
+
+
+# Singleton instance
+party_deduplicator = PartyDeduplicator()
+
+
+if __name__ == "__main__":
+    writer = csv.writer(sys.stdout)
+    writer.writerow(MergeProposal._fields)
+    for merge in party_deduplicator.proposals():
+        writer.writerow(merge)
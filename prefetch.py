@@ -0,0 +1,135 @@
+"""
+Idle-time prefetch for JEC System
+
+While the main menu waits for the user's choice, the connection and the
+database are idle. Prefetcher uses that time to load the screens a
+logged-in user most often opens next, on a background thread:
+- cases: the user's active case list (what List Processes shows)
+- profile: the user's current usuarios row (what Profile shows)
+
+Results go into a TTLCache with a short TTL, keyed by job and user, so the
+screen that was picked renders from memory. Each menu prompt starts its own
+PrefetchBatch, so concurrent sessions do not interfere. As soon as a choice
+is made, cancel() stops the batch: a job still running for the chosen screen is
+allowed to finish (its result is about to be used), anything else is
+interrupted server-side through its CancelToken and dropped.
+
+Enabled with PREFETCH_ENABLED; PREFETCH_TTL sets how long results stay.
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+from psycopg2.extensions import QueryCanceledError
+from cache import TTLCache
+from database import CancelToken, db_manager
+
+
+def _load_cases(user: Dict):
+    # Imported here: the scheduler starts before any command module is loaded
+    from commands import ListProcessesCommand
+
+    return ListProcessesCommand.fetch(user)
+
+
+def _load_profile(user: Dict) -> Optional[Dict]:
+    rows = db_manager.execute_query(
+        "SELECT * FROM usuarios WHERE id = %s", (user["id"],), return_results=True
+    )
+    return rows[0] if rows else None
+
+
+class PrefetchBatch:
+    """Jobs running in the background for one menu prompt"""
+
+    def __init__(self, prefetcher: "Prefetcher", user: Dict, jobs):
+        self._prefetcher = prefetcher
+        self._user = user
+        self._jobs = jobs
+        self._lock = threading.Lock()
+        self._stopped = False
+        self._running: Optional[str] = None
+        self._token: Optional[CancelToken] = None
+        self._thread = threading.Thread(
+            target=self._run, name="jec-prefetch", daemon=True
+        )
+
+    def start(self) -> "PrefetchBatch":
+        self._thread.start()
+        return self
+
+    def _run(self):
+        for name, loader in self._jobs:
+            token = CancelToken()
+            with self._lock:
+                if self._stopped:
+                    return
+                self._running, self._token = name, token
+            try:
+                with token.activate():
+                    value = loader(self._user)
+                if not token.cancelled:
+                    self._prefetcher.cache.set(
+                        self._prefetcher._key(name, self._user), value
+                    )
+            except QueryCanceledError:
+                logging.debug("Prefetch of %s cancelled", name)
+            except Exception as error:
+                logging.debug("Prefetch of %s failed: %s", name, str(error))
+            finally:
+                with self._lock:
+                    self._running, self._token = None, None
+
+    def cancel(self, keep: Optional[str] = None):
+        """Stop the batch; if the `keep` job is running, wait for it instead"""
+        with self._lock:
+            self._stopped = True
+            running, token = self._running, self._token
+            if token is not None and running != keep:
+                token.cancel()
+        if keep is not None and running == keep:
+            self._thread.join()
+
+
+class Prefetcher:
+    """Short-lived cache of likely next screens, filled between menu choices"""
+
+    def __init__(self, ttl: float = 15.0):
+        self.enabled = False
+        self.cache = TTLCache(ttl=ttl, maxsize=256)
+        self.jobs: List[Tuple[str, Callable[[Dict], Any]]] = [
+            ("cases", _load_cases),
+            ("profile", _load_profile),
+        ]
+
+    @staticmethod
+    def _key(name: str, user: Dict) -> Hashable:
+        return name, user.get("id")
+
+    def start(self, user: Optional[Dict]) -> Optional[PrefetchBatch]:
+        """Start prefetching for a user waiting at the menu
+
+        Jobs whose result is still cached are skipped. The caller cancels the
+        returned batch once the user has chosen.
+        """
+        if not (self.enabled and user):
+            return None
+        pending = [
+            (name, loader)
+            for name, loader in self.jobs
+            if self._key(name, user) not in self.cache
+        ]
+        if not pending:
+            return None
+        return PrefetchBatch(self, user, pending).start()
+
+    def get(self, name: str, user: Dict) -> Any:
+        """The prefetched result if it is still fresh, else None"""
+        return self.cache.get(self._key(name, user))
+
+    def invalidate(self):
+        self.cache.invalidate()
+
+
+# Singleton instance
+prefetcher = Prefetcher()
@@ -0,0 +1,264 @@
+"""
+Case search engine for JEC System
+
+Searches combine:
+- full-text matching on processos.documento_busca, a tsvector maintained by
+  triggers over title, description and party names (migration 0002)
+- substring matching accelerated by pg_trgm GIN indexes (migration 0003)
+- relevance ranking and a hard result limit
+The match set is a UNION of case-id subqueries, one per index (the tsvector,
+the numero_processo and titulo trigrams, and the party-name trigram joined
+through partes_processo). ORed together in one WHERE clause those predicates
+defeat the indexes and scan all of processos; as separate branches each is
+an index scan, and every case is returned once. Totals beyond the first page
+come from the planner's row estimate instead of a full count.
+Databases without the search column or the pg_trgm extension fall back to
+plain ILIKE matching ordered by filing date.
+Full CNJ case numbers and valid CPF/CNPJ values skip all of the above and
+become exact probes on digit-normalized expression indexes over
+processos.numero_processo and partes.cpf_cnpj.
+When an in-memory CaseTrigramIndex is attached (search_index.py), lookups of
+three or more characters are answered from it and only the matching rows
+are fetched.
+"""
+
+import logging
+from typing import Dict, List, Optional
+from database import db_manager
+from case_access import case_access
+from normalization import TERM_CNJ, TERM_TEXT, classify_term, sql_digits_only
+
+DEFAULT_LIMIT = 50
+TEXT_SEARCH_CONFIG = "portuguese"
+
+# Party names of one page row, so callers can show or re-filter them locally
+_PARTY_NAMES = """(SELECT string_agg(lpa.nome, ', ')
+                FROM partes_processo lpp JOIN partes lpa ON lpa.id = lpp.parte_id
+                WHERE lpp.processo_id = p.id) AS partes"""
+
+
+class SearchCapabilities:
+    """Server-side search features detected once per process"""
+
+    def __init__(self, fulltext: bool = False, trigram: bool = False):
+        self.fulltext = fulltext
+        self.trigram = trigram
+
+    @classmethod
+    def detect(cls) -> "SearchCapabilities":
+        rows = db_manager.execute_query(
+            """SELECT
+                EXISTS (SELECT 1 FROM information_schema.columns
+                        WHERE table_name = 'processos'
+                        AND column_name = 'documento_busca') AS fulltext,
+                EXISTS (SELECT 1 FROM pg_extension
+                        WHERE extname = 'pg_trgm') AS trigram""",
+            return_results=True,
+        )
+        row = rows[0] if rows else {}
+        return cls(bool(row.get("fulltext")), bool(row.get("trigram")))
+
+
+class SearchResult:
+    """One page of search results plus the (possibly estimated) total"""
+
+    def __init__(self, rows: List[Dict], total: int, estimated: bool = False):
+        self.rows = rows
+        self.total = total
+        self.estimated = estimated
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __bool__(self) -> bool:
+        return bool(self.rows)
+
+
+class CaseSearchEngine:
+    """Build and run ranked, role-scoped case searches"""
+
+    def __init__(self, limit: int = DEFAULT_LIMIT, index=None):
+        self.limit = limit
+        self.index = index
+        self._capabilities: Optional[SearchCapabilities] = None
+
+    @property
+    def capabilities(self) -> SearchCapabilities:
+        if self._capabilities is None:
+            try:
+                self._capabilities = SearchCapabilities.detect()
+            except Exception as exc:
+                logging.warning("Search capability detection failed: %s", str(exc))
+                self._capabilities = SearchCapabilities()
+        return self._capabilities
+
+    def build_query(
+        self,
+        term: str,
+        user: Optional[Dict],
+        limit: Optional[int] = None,
+        fulltext: bool = True,
+    ) -> tuple:
+        """Return (sql, params) for a ranked search restricted to the user
+
+        With fulltext=False only substring predicates are used, so the matches
+        for a longer term are always a subset of the matches for its prefix.
+        """
+        caps = self.capabilities
+        fulltext = fulltext and caps.fulltext
+        rank_terms, rank_params = [], []
+        if fulltext:
+            rank_terms.append(
+                f"ts_rank(p.documento_busca, "
+                f"websearch_to_tsquery('{TEXT_SEARCH_CONFIG}', %s))"
+            )
+            rank_params.append(term)
+        if caps.trigram:
+            rank_terms.append(
+                "GREATEST(similarity(p.numero_processo, %s), similarity(p.titulo, %s))"
+            )
+            rank_params.extend([term, term])
+        rank = " + ".join(rank_terms) or "0"
+
+        match_sql, match_params = self._match_clause(term, user, fulltext)
+        sql = f"""SELECT p.id, p.numero_processo, p.titulo, p.status,
+                p.data_distribuicao, {_PARTY_NAMES}, {rank} AS relevancia
+            FROM processos p
+            WHERE {match_sql}
+            ORDER BY relevancia DESC, p.data_distribuicao DESC
+            LIMIT %s"""
+        params = (*rank_params, *match_params, limit or self.limit)
+        return sql, params
+
+    def _match_clause(
+        self, term: str, user: Optional[Dict], fulltext: bool = True
+    ) -> tuple:
+        """WHERE clause shared by the page query and the count estimate"""
+        like = f"%{term}%"
+        branches = [
+            "SELECT id FROM processos WHERE numero_processo ILIKE %s",
+            "SELECT id FROM processos WHERE titulo ILIKE %s",
+            """SELECT pp.processo_id FROM partes pa
+                JOIN partes_processo pp ON pp.parte_id = pa.id
+                WHERE pa.nome ILIKE %s""",
+        ]
+        match_params = [like, like, like]
+        if fulltext and self.capabilities.fulltext:
+            branches.insert(
+                0,
+                "SELECT id FROM processos WHERE documento_busca @@ "
+                f"websearch_to_tsquery('{TEXT_SEARCH_CONFIG}', %s)",
+            )
+            match_params.insert(0, term)
+
+        where, scope_params = case_access.scope(user, "p")
+        sql = f"p.id IN ({' UNION '.join(branches)}) AND {where}"
+        return sql, (*match_params, *scope_params)
+
+    def estimate_total(
+        self, term: str, user: Optional[Dict], fulltext: bool = True
+    ) -> int:
+        """Planner row estimate for the full match set, without executing it"""
+        match_sql, match_params = self._match_clause(term, user, fulltext)
+        rows = db_manager.execute_query(
+            f"EXPLAIN (FORMAT JSON) SELECT 1 FROM processos p WHERE {match_sql}",
+            match_params,
+            return_results=True,
+        )
+        try:
+            return int(rows[0]["QUERY PLAN"][0]["Plan"]["Plan Rows"])
+        except (IndexError, KeyError, TypeError, ValueError):
+            return 0
+
+    def search(
+        self,
+        term: str,
+        user: Optional[Dict],
+        limit: Optional[int] = None,
+        fulltext: bool = True,
+    ) -> SearchResult:
+        """Return one page of ranked matches and the total match count
+
+        The total is exact when the page is not full; otherwise it is the
+        planner's estimate (never less than the rows already shown).
+        """
+        term = term.strip()
+        if not term:
+            return SearchResult([], 0)
+        limit = limit or self.limit
+        kind, value = classify_term(term)
+        if kind != TERM_TEXT:
+            return self._search_exact(kind, value, user, limit)
+        if self.index is not None and self.index.ready:
+            result = self._search_index(term, user, limit)
+            if result is not None:
+                return result
+        sql, params = self.build_query(term, user, limit, fulltext)
+        rows = db_manager.execute_query(sql, params, return_results=True)
+        if len(rows) < limit:
+            return SearchResult(rows, len(rows))
+        try:
+            total = max(self.estimate_total(term, user, fulltext), len(rows))
+        except Exception as exc:
+            logging.warning("Search count estimate failed: %s", str(exc))
+            total = len(rows)
+        return SearchResult(rows, total, estimated=True)
+
+    def _search_exact(
+        self, kind: str, digits: str, user: Optional[Dict], limit: int
+    ) -> SearchResult:
+        """Single index probe for a case number or a party's CPF/CNPJ"""
+        if kind == TERM_CNJ:
+            match = f"{sql_digits_only('p.numero_processo')} = %s"
+        else:
+            match = f"""p.id IN (SELECT pp.processo_id FROM partes pa
+                JOIN partes_processo pp ON pp.parte_id = pa.id
+                WHERE {sql_digits_only('pa.cpf_cnpj')} = %s)"""
+        where, scope_params = case_access.scope(user, "p")
+        rows = db_manager.execute_query(
+            f"""SELECT p.id, p.numero_processo, p.titulo, p.status,
+                p.data_distribuicao, {_PARTY_NAMES}, 1 AS relevancia
+            FROM processos p
+            WHERE {match} AND {where}
+            ORDER BY p.data_distribuicao DESC
+            LIMIT %s""",
+            (digits, *scope_params, limit),
+            return_results=True,
+        )
+        return SearchResult(rows, len(rows), estimated=len(rows) >= limit)
+
+    def _search_index(
+        self, term: str, user: Optional[Dict], limit: int
+    ) -> Optional[SearchResult]:
+        """Answer from the in-memory index, fetching only the page's rows"""
+        try:
+            self.index.refresh()
+            matches = self.index.lookup(term)
+        except Exception as exc:
+            logging.warning("Case index lookup failed: %s", str(exc))
+            return None
+        if matches is None:
+            return None
+
+        matches &= case_access.visible_case_ids(user)
+        if not matches:
+            return SearchResult([], 0)
+        page = self.index.newest_first(matches, limit)
+        where, scope_params = case_access.scope(user, "p")
+        rows = db_manager.execute_query(
+            f"""SELECT p.id, p.numero_processo, p.titulo, p.status,
+                p.data_distribuicao, {_PARTY_NAMES}, 0 AS relevancia
+            FROM processos p
+            WHERE p.id = ANY(%s::uuid[]) AND {where}
+            ORDER BY p.data_distribuicao DESC""",
+            ([str(case_id) for case_id in page], *scope_params),
+            return_results=True,
+        )
+        return SearchResult(rows, len(matches))
+
+
+# Singleton instance
+case_search = CaseSearchEngine()
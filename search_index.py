@@ -0,0 +1,199 @@
+"""
+In-process trigram index for JEC System case lookups
+
+Keeps trigram postings for processos.numero_processo (as typed and digits
+only), processos.titulo and the names of each case's parties, so partial
+case-number and name lookups are answered from memory. Only the IDs that
+match are then fetched from the database.
+
+The index is optional (SEARCH_INDEX_ENABLED) and is built in the background
+at startup. Both the build and later refreshes read the processos change
+feed (migration 0009), so a refresh costs O(changes) and deleted cases are
+dropped through their tombstones.
+"""
+
+import logging
+import threading
+import time
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Set
+from database import ChangeFeed
+from normalization import digits_only
+
+# Fields are joined with a separator that never appears in the text, so a
+# substring can't match across two fields
+FIELD_SEPARATOR = "\x00"
+
+# Change-feed source: live cases plus tombstones of deleted ones
+_INDEX_SOURCE = """(
+    SELECT p.id, p.transacao, FALSE AS removido, p.numero_processo,
+        p.titulo, p.data_distribuicao,
+        (SELECT string_agg(pa.nome, ' ')
+         FROM partes_processo pp JOIN partes pa ON pa.id = pp.parte_id
+         WHERE pp.processo_id = p.id) AS partes
+    FROM processos p
+    UNION ALL
+    SELECT r.id, r.transacao, TRUE, NULL, NULL, NULL, NULL
+    FROM processos_removidos r
+)"""
+
+
+def fold(text: Optional[str]) -> str:
+    """Lowercase and strip accents so lookups ignore case and diacritics"""
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", str(text).lower())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def trigrams(text: str) -> Set[str]:
+    """Every three-character window of an already folded string"""
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+class CaseTrigramIndex:
+    """Trigram postings over case numbers, titles and party names"""
+
+    def __init__(self, refresh_interval: float = 30.0):
+        self.refresh_interval = refresh_interval
+        self._postings: Dict[str, Set] = {}
+        self._documents: Dict[object, str] = {}
+        self._filed_on: Dict[object, object] = {}
+        self._feed = ChangeFeed("case-index", source=_INDEX_SOURCE, persist=False)
+        self._last_refresh = 0.0
+        self._lock = threading.RLock()
+        # Serializes feed reads; lookups only wait on _lock, row by row
+        self._feed_lock = threading.Lock()
+        self.ready = False
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def add(self, case_id, fields: Iterable[Optional[str]], filed_on=None):
+        """Index (or re-index) one case"""
+        document = FIELD_SEPARATOR.join(fold(field) for field in fields if field)
+        with self._lock:
+            self.remove(case_id)
+            self._documents[case_id] = document
+            self._filed_on[case_id] = filed_on
+            for gram in trigrams(document):
+                if FIELD_SEPARATOR not in gram:
+                    self._postings.setdefault(gram, set()).add(case_id)
+
+    def remove(self, case_id):
+        """Drop one case and its postings"""
+        with self._lock:
+            document = self._documents.pop(case_id, None)
+            self._filed_on.pop(case_id, None)
+            if document is None:
+                return
+            for gram in trigrams(document):
+                ids = self._postings.get(gram)
+                if ids is not None:
+                    ids.discard(case_id)
+                    if not ids:
+                        del self._postings[gram]
+
+    def lookup(self, term: str) -> Optional[Set]:
+        """IDs whose fields contain `term`, or None when the index can't tell
+
+        Terms shorter than three characters have no trigrams; callers fall
+        back to SQL for those.
+        """
+        needle = fold(term.strip())
+        grams = trigrams(needle)
+        if not grams:
+            return None
+        with self._lock:
+            postings = sorted(
+                (self._postings.get(gram, set()) for gram in grams), key=len
+            )
+            candidates = set(postings[0])
+            for ids in postings[1:]:
+                candidates &= ids
+                if not candidates:
+                    break
+            # Postings only prove the trigrams occur; confirm the substring
+            return {cid for cid in candidates if needle in self._documents[cid]}
+
+    def newest_first(self, case_ids: Iterable, limit: int) -> List:
+        """Order matched IDs by filing date, newest first, and keep `limit`"""
+        with self._lock:
+            filed = self._filed_on
+            ordered = sorted(
+                case_ids, key=lambda cid: str(filed.get(cid) or ""), reverse=True
+            )
+        return ordered[:limit]
+
+    def build(self):
+        """Load every case; safe to call again for a full rebuild"""
+        started = time.perf_counter()
+        with self._feed_lock:
+            with self._lock:
+                self._postings.clear()
+                self._documents.clear()
+                self._filed_on.clear()
+            self._feed.reset()
+            count = self._drain()
+            self.ready = True
+        logging.info(
+            "Case search index built: %d cases in %.2fs",
+            count,
+            time.perf_counter() - started,
+        )
+
+    def refresh(self, force: bool = False) -> int:
+        """Re-index cases changed since the last read; returns the count"""
+        if not self.ready:
+            return 0
+        now = time.monotonic()
+        if not force and now - self._last_refresh < self.refresh_interval:
+            return 0
+        self._last_refresh = now
+        if not self._feed_lock.acquire(blocking=False):
+            return 0  # another thread is already reading the feed
+        try:
+            return self._drain()
+        finally:
+            self._feed_lock.release()
+
+    def _drain(self) -> int:
+        count = 0
+        for rows in self._feed.batches():
+            self._apply(rows)
+            count += len(rows)
+        self._last_refresh = time.monotonic()
+        return count
+
+    def start_background_build(self) -> threading.Thread:
+        """Build without delaying startup; searches use SQL until ready"""
+
+        def run():
+            try:
+                self.build()
+            except Exception as exc:
+                logging.error("Case search index build failed: %s", str(exc))
+
+        thread = threading.Thread(target=run, name="case-index-build", daemon=True)
+        thread.start()
+        return thread
+
+    def _apply(self, rows: List[Dict]):
+        for row in rows:
+            if row.get("removido"):
+                self.remove(row["id"])
+                continue
+            self.add(
+                row["id"],
+                (
+                    row["numero_processo"],
+                    digits_only(row["numero_processo"]),
+                    row["titulo"],
+                    row["partes"],
+                ),
+                row["data_distribuicao"],
+            )
+
+
+# Singleton instance, attached to the search engine when enabled
+case_index = CaseTrigramIndex()
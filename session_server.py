@@ -0,0 +1,273 @@
+"""
+Multi-session terminal server for JEC System
+
+Running one CLI process per clerk gives every terminal its own connection
+pool: 30 clerks with DB_MAX_CONNECTIONS=5 keep 150 backend connections open,
+nearly all idle. This server runs many JECCLI sessions in one process
+instead. All of them share the process-wide db_manager, whose connections
+are checked out per query, so the number of backend connections follows
+the number of running queries and is capped by DB_MAX_CONNECTIONS. When
+every connection is busy, sessions wait for one to come back.
+
+An asyncio loop owns the sockets. Each session's (blocking) CLI runs in a
+worker thread under its own contextvars context, which gives it:
+- its own JECCLI and CommandContext
+- its own logged-in user (the JECCLI's AuthSession)
+- its own stdin/stdout: sys.stdin and sys.stdout are replaced by routers
+  that forward to the current session's streams, so the commands' Rich
+  consoles and prompts work unchanged
+
+The wire protocol is newline-delimited JSON from server to client
+({"t": "out", "d": text}, {"t": "input"}, {"t": "secret"}, {"t": "bye"})
+and plain text lines from client to server. The server listens on
+localhost by default and does not encrypt traffic; put it behind SSH
+(`ssh -L`) to reach it from other machines.
+
+    python session_server.py --port 7070          # server
+    python session_server.py --connect 127.0.0.1:7070   # client
+"""
+
+import argparse
+import asyncio
+import contextvars
+import getpass
+import io
+import json
+import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+import rich.console
+from main import JECCLI, console, start_background_services, start_logging
+
+_session: contextvars.ContextVar[Optional["SessionIO"]] = contextvars.ContextVar(
+    "jec_session", default=None
+)
+
+
+class SessionOutput(io.TextIOBase):
+    """Buffered stdout of one session, sent to its client on flush"""
+
+    def __init__(self, session: "SessionIO"):
+        super().__init__()
+        self._session = session
+        self._chunks = []
+
+    def write(self, text: str) -> int:
+        self._chunks.append(text)
+        return len(text)
+
+    def flush(self):
+        if self._chunks:
+            text, self._chunks = "".join(self._chunks), []
+            self._session.send({"t": "out", "d": text})
+
+    def isatty(self) -> bool:
+        return True
+
+    def writable(self) -> bool:
+        return True
+
+
+class SessionIO:
+    """One client connection, used from its CLI worker thread"""
+
+    def __init__(self, loop, reader, writer):
+        self.loop = loop
+        self.reader = reader
+        self.writer = writer
+        self.stdout = SessionOutput(self)
+        self.stdin = self  # readline() below
+
+    def send(self, message: Dict):
+        """Queue a message on the socket (safe to call from any thread)"""
+        data = (json.dumps(message) + "\n").encode("utf-8")
+        self.loop.call_soon_threadsafe(self.writer.write, data)
+
+    def readline(self, size: int = -1, secret: bool = False) -> str:
+        self.stdout.flush()
+        self.send({"t": "secret" if secret else "input"})
+        future = asyncio.run_coroutine_threadsafe(self.reader.readline(), self.loop)
+        line = future.result()
+        if not line:
+            # The client went away; unwind the CLI as if the user hit Ctrl+C
+            raise KeyboardInterrupt
+        return line.decode("utf-8", errors="replace")
+
+
+class _Router(io.TextIOBase):
+    """Stand-in for sys.stdin/sys.stdout that follows the current session"""
+
+    def __init__(self, name: str, fallback):
+        super().__init__()
+        self._name = name
+        self._fallback = fallback
+
+    def _stream(self):
+        session = _session.get()
+        return getattr(session, self._name) if session else self._fallback
+
+    def write(self, text: str) -> int:
+        return self._stream().write(text)
+
+    def flush(self):
+        self._stream().flush()
+
+    def readline(self, size: int = -1) -> str:
+        return self._stream().readline(size)
+
+    def isatty(self) -> bool:
+        return self._stream().isatty() if _session.get() is None else True
+
+    def writable(self) -> bool:
+        return True
+
+    def readable(self) -> bool:
+        return True
+
+
+def _session_getpass(prompt: str = "", stream=None) -> str:
+    """getpass that asks the session's client instead of the server's tty"""
+    session = _session.get()
+    if session is None:
+        return getpass.getpass(prompt, stream)
+    if prompt:
+        session.stdout.write(prompt)
+    return session.readline(secret=True).rstrip("\r\n")
+
+
+def install_routing():
+    """Route stdio and password prompts through the current session"""
+    if not isinstance(sys.stdout, _Router):
+        sys.stdout = _Router("stdout", sys.stdout)
+        sys.stdin = _Router("stdin", sys.stdin)
+    # Console.input(password=True) calls rich.console's own getpass import
+    rich.console.getpass = _session_getpass
+
+
+class SessionCLI(JECCLI):
+    """JECCLI whose exit ends the session but leaves the shared pool open
+
+    Clients send whole lines, so Live Search (raw keystrokes from the local
+    terminal) is left off the menu.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.interactive_keys = False
+
+    def exit_app(self):
+        console.print("\n[bold blue]Closing JEC System...[/bold blue]")
+        self.running = False
+
+
+class SessionServer:
+    """Serve JECCLI sessions over TCP, one worker thread per open session"""
+
+    def __init__(
+        self, host: str = "127.0.0.1", port: int = 7070, max_sessions: int = 50
+    ):
+        self.host = host
+        self.port = port
+        self.max_sessions = max_sessions
+        self.sessions = 0
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_sessions, thread_name_prefix="jec-session"
+        )
+
+    async def handle(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        session = SessionIO(loop, reader, writer)
+        peer = writer.get_extra_info("peername")
+        if self.sessions >= self.max_sessions:
+            session.send({"t": "out", "d": "Server busy, try again later\n"})
+            session.send({"t": "bye"})
+            await asyncio.sleep(0)
+            writer.close()
+            return
+
+        self.sessions += 1
+        logging.info("Session opened: %s (%d open)", peer, self.sessions)
+        context = contextvars.copy_context()
+        try:
+            await loop.run_in_executor(
+                self._executor, context.run, self._run_session, session
+            )
+        except Exception as exc:
+            logging.error("Session %s failed: %s", peer, str(exc))
+        finally:
+            self.sessions -= 1
+            session.send({"t": "bye"})
+            await asyncio.sleep(0)  # let the queued writes reach the transport
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+            logging.info("Session closed: %s (%d open)", peer, self.sessions)
+
+    @staticmethod
+    def _run_session(session: SessionIO):
+        _session.set(session)
+        try:
+            SessionCLI().run()
+        finally:
+            session.stdout.flush()
+
+    async def serve_forever(self):
+        install_routing()
+        server = await asyncio.start_server(self.handle, self.host, self.port)
+        logging.info("JEC session server listening on %s:%d", self.host, self.port)
+        async with server:
+            await server.serve_forever()
+
+
+async def run_client(host: str, port: int):
+    """Minimal terminal client: print output, answer input requests"""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            message = json.loads(line)
+            kind = message.get("t")
+            if kind == "out":
+                sys.stdout.write(message["d"])
+                sys.stdout.flush()
+            elif kind in ("input", "secret"):
+                ask = getpass.getpass if kind == "secret" else input
+                try:
+                    answer = await asyncio.to_thread(ask, "")
+                except EOFError:
+                    break
+                writer.write((answer + "\n").encode("utf-8"))
+                await writer.drain()
+            elif kind == "bye":
+                break
+    finally:
+        writer.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="JEC System session server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7070)
+    parser.add_argument("--max-sessions", type=int, default=50)
+    parser.add_argument(
+        "--connect", metavar="HOST:PORT", help="run as a client of a server"
+    )
+    args = parser.parse_args()
+
+    if args.connect:
+        host, _, port = args.connect.rpartition(":")
+        asyncio.run(run_client(host or "127.0.0.1", int(port)))
+    else:
+        start_logging(echo=True)
+        start_background_services()
+        try:
+            asyncio.run(
+                SessionServer(args.host, args.port, args.max_sessions).serve_forever()
+            )
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,112 @@
+"""
+Startup timing and deferred imports for JEC System
+
+main.py only imports what the first menu frame needs. Everything else
+(commands, search, database pool, background services) is reached through
+LazyImport proxies that import their module on first use, so launching the
+CLI does not pay for screens the user never opens.
+
+StartupProfile records how long each import and initialization step took;
+`python main.py --startup-profile` prints the breakdown once the main menu
+is on screen.
+"""
+
+import importlib
+import sys
+import time
+from contextlib import contextmanager
+from typing import List, Tuple
+
+# Taken as early as possible; main.py imports this module first
+_STARTED = time.perf_counter()
+
+
+class StartupProfile:
+    """Named, timed steps from process start to the first menu frame"""
+
+    def __init__(self, started: float = _STARTED):
+        self.started = started
+        self.enabled = False
+        self.steps: List[Tuple[str, float]] = []
+        self.reported = False
+
+    @contextmanager
+    def step(self, name: str):
+        began = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps.append((name, time.perf_counter() - began))
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def report(self) -> List[str]:
+        """Lines of the breakdown, slowest step first"""
+        total = self.elapsed()
+        lines = [f"Startup: {total * 1000:.1f} ms from launch to first frame"]
+        for name, seconds in sorted(self.steps, key=lambda s: s[1], reverse=True):
+            lines.append(f"  {seconds * 1000:8.1f} ms  {name}")
+        accounted = sum(seconds for _, seconds in self.steps)
+        lines.append(f"  {(total - accounted) * 1000:8.1f} ms  (other)")
+        return lines
+
+    def report_once(self, write):
+        """Emit the breakdown the first time it is asked for, if enabled"""
+        if self.enabled and not self.reported:
+            self.reported = True
+            for line in self.report():
+                write(line)
+
+
+class LazyImport:
+    """Stand-in for `from module import name`, resolved on first use
+
+    Attribute access and calls are forwarded to the real object; setting a
+    public attribute sets it on the real object too.
+    """
+
+    def __init__(self, module: str, name: str):
+        self._module = module
+        self._name = name
+        self._target = None
+        self._on_load = []
+
+    def resolve(self):
+        if self._target is None:
+            with startup_profile.step(f"import {self._module}"):
+                target = getattr(importlib.import_module(self._module), self._name)
+            self._target = target
+            for callback in self._on_load:
+                callback(target)
+            self._on_load.clear()
+        return self._target
+
+    def when_loaded(self, callback):
+        """Call callback(target) now if loaded, otherwise right after import"""
+        if self._target is not None or self._module in sys.modules:
+            # Already imported, perhaps by another module: nothing to defer
+            callback(self.resolve())
+        else:
+            self._on_load.append(callback)
+
+    def __getattr__(self, attr):
+        # Only reached for names not set in __init__
+        return getattr(self.resolve(), attr)
+
+    def __setattr__(self, attr, value):
+        if attr.startswith("_"):
+            object.__setattr__(self, attr, value)
+        else:
+            setattr(self.resolve(), attr, value)
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._target is not None else "deferred"
+        return f"<LazyImport {self._module}.{self._name} ({state})>"
+
+
+# Singleton instance shared by main.py and the lazy imports
+startup_profile = StartupProfile()
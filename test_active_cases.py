@@ -0,0 +1,100 @@
+"""
+python -m pytest test_active_cases.py -v -s
+"""
+
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from active_cases import ActiveCasesRefresher, ActiveCasesView
+
+
+@pytest.fixture
+def mock_db():
+    with patch("active_cases.db_manager") as mock:
+        yield mock
+
+
+def test_view_detection_is_cached(mock_db):
+    mock_db.execute_query.return_value = [{"available": True}]
+    view = ActiveCasesView()
+    assert view.exists and view.exists
+    assert mock_db.execute_query.call_count == 1
+
+
+def test_view_unavailable_on_error(mock_db):
+    mock_db.execute_query.side_effect = Exception("boom")
+    assert ActiveCasesView().available is False
+
+
+def test_view_used_while_refresher_runs(mock_db):
+    mock_db.execute_query.return_value = [{"available": True}]
+    refresher = ActiveCasesRefresher(poll_interval=60)
+    view = ActiveCasesView(refresher)
+    refresher.start()
+    try:
+        assert view.available
+    finally:
+        refresher.stop()
+    assert mock_db.execute_query.call_count == 1  # no freshness check
+
+
+def test_stale_view_skipped_with_refresher_off(mock_db):
+    mock_db.execute_query.side_effect = [[{"available": True}], [{"idade": 3600.0}]]
+    view = ActiveCasesView(ActiveCasesRefresher(max_age=600))
+    assert view.available is False
+    assert "mv_refresh_state" in mock_db.execute_query.call_args[0][0]
+
+
+def test_view_refreshed_elsewhere_is_used(mock_db):
+    mock_db.execute_query.side_effect = [[{"available": True}], [{"idade": 12.0}]]
+    assert ActiveCasesView(ActiveCasesRefresher()).available is True
+
+
+def test_query_scopes_materialized_rows():
+    sql, params = ActiveCasesView().query({"id": "judge-1", "tipo": "juiz"})
+    assert "FROM processos_ativos_mv a" in sql
+    assert "a.juiz_id = %s" in sql
+    assert "EXISTS (SELECT 1 FROM processos_ativos_mv_pendencias)" in sql
+    assert params == ("judge-1",)
+
+
+def test_staleness_reports_age_and_pending():
+    refreshed = datetime.now() - timedelta(seconds=42)
+    note = ActiveCasesView.staleness([{"_atualizada_em": refreshed, "_pendente": True}])
+    assert "(42s ago)" in note or "(43s ago)" in note
+    assert "pending" in note
+    assert ActiveCasesView.staleness([]) is None
+    assert ActiveCasesView.staleness([{"numero_processo": "1"}]) is None
+
+
+def test_refresh_due_when_pending_after_min_gap(mock_db):
+    refresher = ActiveCasesRefresher(min_gap=30, max_age=600)
+    mock_db.execute_query.return_value = [{"pendente": True, "idade": 5}]
+    assert refresher.due()
+    assert (
+        "FROM processos_ativos_mv_pendencias" in mock_db.execute_query.call_args[0][0]
+    )
+
+    mock_db.execute_query.return_value = [{"refreshed": True}]
+    assert refresher.refresh()
+
+    # Just refreshed: pending changes wait for the minimum gap
+    mock_db.execute_query.return_value = [{"pendente": True, "idade": 1}]
+    assert not refresher.due()
+
+
+def test_refresh_due_when_too_old(mock_db):
+    refresher = ActiveCasesRefresher(max_age=600)
+    mock_db.execute_query.return_value = [{"pendente": False, "idade": 601}]
+    assert refresher.due()
+    mock_db.execute_query.return_value = [{"pendente": False, "idade": 10}]
+    assert not refresher.due()
+
+
+def test_run_once_swallows_errors(mock_db):
+    mock_db.execute_query.side_effect = Exception("down")
+    ActiveCasesRefresher().run_once()
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", "-s", __file__])
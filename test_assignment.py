@@ -0,0 +1,106 @@
+"""
+python -m pytest test_assignment.py -v -s
+"""
+
+import pytest
+from unittest.mock import patch
+from assignment import AssignmentService, WorkloadHeap
+
+
+@pytest.fixture
+def mock_db():
+    with patch("assignment.db_manager") as mock:
+        yield mock
+
+
+@pytest.fixture
+def service(mock_db):
+    mock_db.execute_query.return_value = [
+        {"id": "judge-a", "tipo": "juiz", "abertos": 5},
+        {"id": "judge-b", "tipo": "juiz", "abertos": 2},
+        {"id": "clerk-a", "tipo": "servidor", "abertos": 0},
+    ]
+    service = AssignmentService(resync_interval=3600)
+    service.load()
+    mock_db.execute_query.reset_mock()
+    return service
+
+
+def test_heap_takes_least_loaded_and_skips_stale_entries():
+    heap = WorkloadHeap({"a": 3, "b": 1})
+    heap.adjust("b", 5)  # b now 6; its old entry is stale
+    assert heap.take() == "a"
+    assert heap.counts == {"a": 4, "b": 6}
+    heap.remove("a")
+    assert heap.take() == "b"
+    assert WorkloadHeap().take() is None
+
+
+def test_plan_balances_incrementally(service, mock_db):
+    plan = service.plan(["c1", "c2", "c3", "c4", "c5"], "juiz")
+    assert [staff for _, staff in plan] == [
+        "judge-b",
+        "judge-b",
+        "judge-b",
+        "judge-a",
+        "judge-b",
+    ]
+    assert service.workloads("juiz") == {"judge-a": 6, "judge-b": 6}
+    mock_db.execute_query.assert_not_called()  # no recount per assignment
+
+
+def test_assign_uses_one_set_based_update(service, mock_db):
+    mock_db.execute_query.return_value = [{"id": "c1", "staff_id": "judge-b"}]
+
+    with patch("assignment.case_access") as access:
+        assigned = service.assign(["c1", "c2"], "juiz")
+
+    assert assigned == {"c1": "judge-b"}
+    sql, params = mock_db.execute_query.call_args.args[:2]
+    assert "unnest(%s::uuid[], %s::uuid[])" in sql
+    assert "p.juiz_id IS NULL" in sql
+    assert params == (["c1", "c2"], ["judge-b", "judge-b"])
+    # c2 was taken concurrently, so its planned count is handed back
+    assert service.workloads("juiz")["judge-b"] == 3
+    access.invalidate.assert_called_once_with("judge-b")
+
+
+def test_repeated_case_is_planned_and_charged_once(service, mock_db):
+    mock_db.execute_query.return_value = [{"id": "c1", "staff_id": "judge-b"}]
+
+    with patch("assignment.case_access"):
+        assigned = service.assign(["c1", "c1"], "juiz")
+
+    assert assigned == {"c1": "judge-b"}
+    assert mock_db.execute_query.call_args.args[1] == (["c1"], ["judge-b"])
+    assert service.workloads("juiz") == {"judge-a": 5, "judge-b": 3}
+
+
+def test_open_cases_are_not_joined_to_the_view(service, mock_db):
+    service.load()
+    mock_db.execute_query.side_effect = [[]]
+    service.assign_unassigned("juiz")
+
+    for query in (c.args[0] for c in mock_db.execute_query.call_args_list):
+        assert "JOIN processos_ativos" not in query
+        assert "EXISTS (SELECT 1 FROM processos_ativos a WHERE a.id = p.id)" in query
+
+
+def test_assign_rejects_unknown_role(service):
+    with pytest.raises(ValueError):
+        service.assign(["c1"], "advogado")
+
+
+def test_assign_unassigned_pages_until_done(service, mock_db):
+    mock_db.execute_query.side_effect = [
+        [{"id": "c1"}],
+        [{"id": "c1", "staff_id": "clerk-a"}],
+        [],
+    ]
+    with patch("assignment.case_access"):
+        assert service.assign_unassigned("servidor") == 1
+    assert service.workloads("servidor") == {"clerk-a": 1}
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", "-s", __file__])
@@ -1,6 +1,6 @@
 import pytest
 from unittest.mock import patch, MagicMock
-from auth import AuthManager, auth_manager
+from auth import AuthManager, AuthSession, auth_manager
 from database import db_manager
 
 
@@ -74,5 +74,42 @@ def test_logout():
     assert auth_manager.get_current_user() is None
 
 
+def test_current_user_is_per_context():
+    """Sessions running in separate contexts do not see each other's login"""
+    import contextvars
+
+    auth = AuthManager()
+    auth.current_user = {"email": "main@example.com"}
+
+    def other_session():
+        assert auth.get_current_user() is None
+        auth.current_user = {"email": "other@example.com"}
+        return auth.get_current_user()
+
+    assert contextvars.Context().run(other_session)["email"] == "other@example.com"
+    assert auth.get_current_user()["email"] == "main@example.com"
+
+
+def test_auth_session_login_does_not_need_global_state(mock_db):
+    mock_db.return_value = [
+        {
+            "id": 1,
+            "email": "test@example.com",
+            "senha": auth_manager.hash_password("correctpass"),
+        }
+    ]
+    session = AuthSession()
+
+    assert auth_manager.authenticate("test@example.com", "correctpass")["id"] == 1
+    assert session.login("test@example.com", "correctpass")
+    assert session.user["email"] == "test@example.com"
+    # Legacy readers of the global see the login in this context
+    assert auth_manager.get_current_user() is session.user
+
+    session.logout()
+    assert session.user is None
+    assert auth_manager.get_current_user() is None
+
+
 if __name__ == "__main__":
     pytest.main(["-v", "-s", __file__])
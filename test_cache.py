@@ -0,0 +1,67 @@
+"""
+python -m pytest test_cache.py -v -s
+"""
+
+import pytest
+from unittest.mock import patch, MagicMock
+from cache import TTLCache
+
+
+def test_set_and_get():
+    cache = TTLCache(ttl=10)
+    cache.set("key", "value")
+    assert cache.get("key") == "value"
+    assert "key" in cache
+    assert cache.get("missing", "default") == "default"
+
+
+def test_entries_expire():
+    cache = TTLCache(ttl=10)
+    with patch("cache.time.monotonic", return_value=100.0):
+        cache.set("key", "value")
+    with patch("cache.time.monotonic", return_value=111.0):
+        assert cache.get("key") is None
+        assert len(cache) == 0
+
+
+def test_lru_eviction():
+    cache = TTLCache(ttl=10, maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" becomes least recently used
+    cache.set("c", 3)
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+
+
+def test_get_or_load_calls_loader_once():
+    cache = TTLCache(ttl=10)
+    loader = MagicMock(return_value=[1, 2])
+    assert cache.get_or_load("key", loader) == [1, 2]
+    assert cache.get_or_load("key", loader) == [1, 2]
+    loader.assert_called_once()
+
+
+def test_invalidate():
+    cache = TTLCache(ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.invalidate("a")
+    assert "a" not in cache and "b" in cache
+    cache.invalidate()
+    assert len(cache) == 0
+
+
+def test_configure_shrinks_oldest_first():
+    cache = TTLCache(ttl=10, maxsize=3)
+    for key in "abc":
+        cache.set(key, key)
+    cache.get("a")
+    cache.configure(ttl=1, maxsize=2)
+    assert "b" not in cache and "a" in cache and "c" in cache
+    assert cache.ttl == 1
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", "-s", __file__])
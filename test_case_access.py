@@ -0,0 +1,66 @@
+"""
+python -m pytest test_case_access.py -v -s
+"""
+
+import pytest
+from unittest.mock import patch
+from case_access import CaseAccessPolicy
+
+
+@pytest.fixture
+def policy():
+    return CaseAccessPolicy()
+
+
+@pytest.fixture
+def mock_db():
+    with patch("case_access.db_manager") as mock:
+        yield mock
+
+
+def test_scope_without_user(policy):
+    assert policy.scope(None) == ("FALSE", ())
+
+
+@pytest.mark.parametrize(
+    "role,column", [("juiz", "p.juiz_id"), ("servidor", "p.servidor_id")]
+)
+def test_scope_staff(policy, role, column):
+    where, params = policy.scope({"id": "u1", "tipo": role})
+    assert where == f"{column} = %s"
+    assert params == ("u1",)
+
+
+def test_scope_lawyer_uses_partes_advogado(policy):
+    where, params = policy.scope({"id": "u2", "tipo": "advogado"}, alias="x")
+    assert "acc_pp.processo_id = x.id" in where
+    assert "acc_pa.advogado_id = %s" in where
+    assert params == ("u2",)
+
+
+def test_scope_party_matches_normalized_document(policy):
+    where, params = policy.scope({"id": "u3", "tipo": "parte", "cpf": "123.456.789-01"})
+    assert "regexp_replace(acc_pa.cpf_cnpj" in where
+    assert params == ("12345678901",)
+
+
+def test_scope_unknown_role_sees_nothing(policy):
+    assert policy.scope({"id": "u4", "tipo": "visitante"}) == ("FALSE", ())
+
+
+def test_visible_case_ids_cached(policy, mock_db):
+    mock_db.execute_query.return_value = [{"id": "c1"}, {"id": "c2"}]
+    user = {"id": "u1", "tipo": "juiz"}
+
+    assert policy.visible_case_ids(user) == frozenset({"c1", "c2"})
+    assert policy.can_view(user, "c1")
+    assert not policy.can_view(user, "c3")
+    mock_db.execute_query.assert_called_once()
+
+    policy.invalidate("u1")
+    policy.visible_case_ids(user)
+    assert mock_db.execute_query.call_count == 2
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", "-s", __file__])
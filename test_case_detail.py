@@ -0,0 +1,80 @@
+"""
+python -m pytest test_case_detail.py -v -s
+"""
+
+import pytest
+from unittest.mock import patch
+from case_detail import CaseDetailService
+
+JUDGE = {"id": "judge-1", "tipo": "juiz"}
+DETAIL = {
+    "numero_processo": "0001234-55.2024.8.26.0100",
+    "titulo": "Cobrança",
+    "partes": [{"nome": "José", "tipo": "autor"}],
+    "documentos": None,
+    "categoria": ["Cível", "Consumidor"],
+}
+
+
+@pytest.fixture
+def mock_db():
+    with patch("case_detail.db_manager") as mock:
+        yield mock
+
+
+def test_first_load_requests_full_document(mock_db):
+    mock_db.execute_query.return_value = [
+        {"id": "c1", "data_atualizacao": "t1", "detalhe": DETAIL}
+    ]
+    service = CaseDetailService()
+
+    case = service.load("0001234-55.2024.8.26.0100", JUDGE)
+
+    assert case["id"] == "c1"
+    assert case["partes"][0]["nome"] == "José"
+    sql, params = mock_db.execute_query.call_args[0]
+    # one statement aggregates parties, documents and the category path
+    assert sql.count("json_agg") == 3
+    assert "WITH RECURSIVE caminho" in sql
+    assert "p.juiz_id = %s" in sql
+    assert params == (True, None, "00012345520248260100", "judge-1")
+
+
+def test_unchanged_case_is_served_from_cache(mock_db):
+    service = CaseDetailService()
+    mock_db.execute_query.return_value = [
+        {"id": "c1", "data_atualizacao": "t1", "detalhe": DETAIL}
+    ]
+    first = service.load("0001234-55.2024.8.26.0100", JUDGE)
+
+    mock_db.execute_query.return_value = [
+        {"id": "c1", "data_atualizacao": "t1", "detalhe": None}
+    ]
+    second = service.load("00012345520248260100", JUDGE)
+
+    assert second is first
+    _, params = mock_db.execute_query.call_args[0]
+    assert params[:2] == (False, "t1")
+
+
+def test_changed_case_replaces_cache(mock_db):
+    service = CaseDetailService()
+    mock_db.execute_query.return_value = [
+        {"id": "c1", "data_atualizacao": "t1", "detalhe": DETAIL}
+    ]
+    service.load("00012345520248260100", JUDGE)
+
+    mock_db.execute_query.return_value = [
+        {"id": "c1", "data_atualizacao": "t2", "detalhe": dict(DETAIL, titulo="Novo")}
+    ]
+    assert service.load("00012345520248260100", JUDGE)["titulo"] == "Novo"
+
+
+def test_invisible_or_missing_case(mock_db):
+    mock_db.execute_query.return_value = []
+    assert CaseDetailService().load("123", JUDGE) is None
+    assert CaseDetailService().load("abc", JUDGE) is None
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", "-s", __file__])
@@ -0,0 +1,95 @@
+"""
+python -m pytest test_categories.py -v -s
+"""
+
+import pytest
+from unittest.mock import patch
+from categories import CategoryTree
+
+ROWS = [
+    {"id": "civel", "categoria_pai_id": None, "nome": "Cível"},
+    {"id": "consumidor", "categoria_pai_id": "civel", "nome": "Consumidor"},
+    {"id": "bancario", "categoria_pai_id": "consumidor", "nome": "Bancário"},
+    {"id": "transito", "categoria_pai_id": "civel", "nome": "Trânsito"},
+    {"id": "fazenda", "categoria_pai_id": None, "nome": "Fazenda Pública"},
+]
+
+
+@pytest.fixture
+def mock_db():
+    with patch("categories.db_manager") as mock:
+        yield mock
+
+
+@pytest.fixture
+def tree():
+    tree = CategoryTree(check_interval=3600)
+    tree.build(ROWS, version=1)
+    return tree
+
+
+def test_descendants_are_a_contiguous_interval(tree):
+    assert tree.descendants("civel") == {"civel", "consumidor", "bancario", "transito"}
+    assert tree.descendants("consumidor", include_self=False) == {"bancario"}
+    assert tree.descendants("fazenda") == {"fazenda"}
+    assert tree.descendants("unknown") == frozenset()
+
+
+def test_is_descendant(tree):
+    assert tree.is_descendant("bancario", "civel")
+    assert tree.is_descendant("civel", "civel")
+    assert not tree.is_descendant("transito", "consumidor")
+    assert not tree.is_descendant("civel", "bancario")
+
+
+def test_path_and_walk(tree):
+    assert [c["nome"] for c in tree.path("bancario")] == ["Cível", "Consumidor", "Bancário"]
+    walked = [(c["id"], depth) for c, depth in tree.walk()]
+    assert walked == [
+        ("civel", 0),
+        ("consumidor", 1),
+        ("bancario", 2),
+        ("transito", 1),
+        ("fazenda", 0),
+    ]
+
+
+def test_cycles_do_not_hang(mock_db):
+    tree = CategoryTree()
+    tree.build(
+        [
+            {"id": "a", "categoria_pai_id": "b", "nome": "A"},
+            {"id": "b", "categoria_pai_id": "a", "nome": "B"},
+        ]
+    )
+    assert tree.descendants("a") == {"a", "b"}
+
+
+def test_case_filter_uses_any(tree):
+    sql, params = tree.case_filter("consumidor")
+    assert sql == (
+        "(p.categoria_id = ANY(%s::uuid[]) OR p.subcategoria_id = ANY(%s::uuid[]))"
+    )
+    assert sorted(params[0]) == ["bancario", "consumidor"]
+    assert tree.case_filter("unknown") == ("FALSE", ())
+
+
+def test_rebuilds_when_version_changes(mock_db):
+    tree = CategoryTree(check_interval=0)
+    mock_db.execute_query.side_effect = [ROWS, [{"versao": 1}]]
+    tree.ensure_current()
+    assert tree.loaded
+
+    # same version: only the version probe runs
+    mock_db.execute_query.side_effect = [[{"versao": 1}]]
+    tree.ensure_current()
+
+    # new version: full reload
+    mock_db.execute_query.side_effect = [[{"versao": 2}], ROWS[:1], [{"versao": 2}]]
+    tree.ensure_current()
+    tree.check_interval = 3600
+    assert tree.descendants("civel") == {"civel"}
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", "-s", __file__])
@@ -0,0 +1,94 @@
+"""
+python -m pytest test_command_profile.py -v -s
+"""
+
+import os
+import time
+import pytest
+from unittest.mock import patch
+from rich.console import Console
+from command_profile import CommandProfiler
+from database import DatabaseManager, QueryTimer
+
+
+@pytest.fixture
+def profiler(tmp_path):
+    profiler = CommandProfiler()
+    profiler.start(str(tmp_path))
+    return profiler
+
+
+def slow_answer(prompt=""):
+    time.sleep(0.03)
+    return "x"
+
+
+def fake_command(context):
+    with patch("psycopg2.pool.SimpleConnectionPool"):
+        DatabaseManager().execute_query("SELECT 1")
+    started = time.perf_counter()
+    time.sleep(0.05)  # a slow query
+    QueryTimer.current().add(time.perf_counter() - started)
+    with patch("rich.console.input", side_effect=slow_answer):
+        Console(force_terminal=False).input("Case number: ")
+    context.append(bytearray(200_000))
+    return "done"
+
+
+def test_run_splits_wall_time_and_writes_report(profiler, tmp_path):
+    context = []
+    assert profiler.wrap("SearchCasesCommand", fake_command)(context) == "done"
+
+    record = profiler.records[0]
+    assert record["queries"] == 2
+    assert record["db"] >= 0.05
+    assert record["input"] >= 0.03
+    assert record["render"] == pytest.approx(
+        record["wall"] - record["db"] - record["input"], abs=1e-6
+    )
+    assert record["peak_bytes"] >= 200_000
+
+    report = open(record["report"], encoding="utf-8").read()
+    assert report.startswith("Command:     SearchCasesCommand")
+    assert "function calls" in report
+    assert os.path.exists(record["report"][:-4] + ".prof")
+
+
+def test_prompt_wait_is_not_profiled(profiler):
+    profiler.run("Prompt", fake_command, [])
+    names = [row["function"] for row in profiler.hottest(limit=1000)]
+    assert any("fake_command" in name for name in names)
+    assert not any("slow_answer" in name for name in names)
+
+
+def test_summary_aggregates_runs(profiler):
+    profiler.run("A", lambda: None)
+    profiler.run("A", lambda: None)
+    with pytest.raises(ValueError):
+        profiler.run("B", lambda: (_ for _ in ()).throw(ValueError("boom")))
+
+    summary = {row["command"]: row for row in profiler.command_summary()}
+    assert summary["A"]["runs"] == 2
+    assert summary["B"]["runs"] == 1
+    assert len(profiler.records) == 3
+
+
+def test_cli_wraps_commands_when_profiling():
+    from main import JECCLI
+    from commands import ProfileReportCommand
+
+    class Dummy:
+        def execute(self, context):
+            return context
+
+    cli = JECCLI()
+    cli.profile = True
+    with patch("main.command_profiler") as profiler:
+        profiler.wrap.side_effect = lambda name, execute: ("wrapped", name)
+        assert cli.command(Dummy).execute == ("wrapped", "Dummy")
+        assert cli.command(ProfileReportCommand).execute != ("wrapped",)
+        profiler.wrap.assert_called_once()
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", "-s", __file__])
@@ -11,11 +11,17 @@ from commands import (
     ExitCommand,
     ListProcessesCommand,
     SearchCasesCommand,
+    CaseDetailCommand,
+    CasesByCategoryCommand,
+    StatisticsDashboardCommand,
     UserProfileCommand,
     CommandContext,
 )
 from database import db_manager
+from search import SearchResult
+from rich.panel import Panel
 from rich.table import Table
+from datetime import date
 import sys
 from pathlib import Path
 
@@ -46,6 +52,21 @@ def mock_confirm():
         yield
 
 
+@pytest.fixture
+def judge_context():
+    context = CommandContext()
+    context.current_user = {"id": "judge-1", "tipo": "juiz"}
+    return context
+
+
+@pytest.fixture
+def plain_view():
+    with patch("commands.active_cases") as mock:
+        mock.available = False
+        mock.staleness.return_value = None
+        yield mock
+
+
 @pytest.fixture
 def mock_cli():
     with patch("main.JECCLI") as mock:
@@ -68,7 +89,7 @@ def test_base_command_utilities():
 
 
 # --- ListProcessesCommand Tests ---
-def test_list_processes_success(mock_db):
+def test_list_processes_success(mock_db, judge_context, plain_view):
     test_data = [
         {
             "numero_processo": "123",
@@ -81,28 +102,66 @@ def test_list_processes_success(mock_db):
     mock_db.execute_query.return_value = test_data
 
     cmd = ListProcessesCommand()
-    context = CommandContext()
 
     with patch("commands.console.print") as mock_print:
-        cmd.execute(context)
+        cmd.execute(judge_context)
         assert any(isinstance(args[0], Table) for args, _ in mock_print.call_args_list)
 
+    # Visibility is pushed down into SQL for the judge's own cases
+    called_args, _ = mock_db.execute_query.call_args
+    assert "p.juiz_id = %s" in called_args[0]
+    assert called_args[1] == ("judge-1",)
+
 
-def test_list_processes_empty(mock_db):
+def test_list_processes_empty(mock_db, judge_context, plain_view):
     mock_db.execute_query.return_value = []
 
+    cmd = ListProcessesCommand()
+
+    with patch("commands.console.print") as mock_print:
+        cmd.execute(judge_context)
+        mock_print.assert_any_call("\n[italic]No processes found[/italic]")
+
+
+def test_list_processes_materialized_shows_staleness(mock_db, judge_context):
+    mock_db.execute_query.return_value = [
+        {
+            "numero_processo": "123",
+            "titulo": "Test Case",
+            "categoria": "Civil",
+            "status": "Active",
+            "data_distribuicao": "2023-01-01",
+        }
+    ]
+
+    with patch("commands.active_cases") as view, patch(
+        "commands.console.print"
+    ) as mock_print:
+        view.available = True
+        view.query.return_value = ("SELECT mv", ("judge-1",))
+        view.staleness.return_value = "Data as of 10:00:00 (5s ago)"
+        ListProcessesCommand().execute(judge_context)
+
+    view.query.assert_called_once_with(judge_context.current_user)
+    mock_db.execute_query.assert_called_once_with(
+        "SELECT mv", ("judge-1",), return_results=True
+    )
+    mock_print.assert_any_call("[dim]Data as of 10:00:00 (5s ago)[/dim]")
+
+
+def test_list_processes_unauthenticated(mock_db):
     cmd = ListProcessesCommand()
     context = CommandContext()
 
     with patch("commands.console.print") as mock_print:
         cmd.execute(context)
-        mock_print.assert_any_call("\n[italic]No processes found[/italic]")
+        mock_print.assert_any_call("\n[bold red]Not authenticated[/bold red]")
+    mock_db.execute_query.assert_not_called()
 
 
 # --- LoginCommand Tests ---
 def test_login_success(mock_auth):
-    mock_auth.login.return_value = True
-    mock_auth.get_current_user.return_value = {"name": "Test User"}
+    mock_auth.authenticate.return_value = {"name": "Test User"}
 
     cmd = LoginCommand()
     context = CommandContext()
@@ -110,13 +169,13 @@ def test_login_success(mock_auth):
     with patch("commands.Prompt.ask", side_effect=["test@test.com", "password"]):
         cmd.execute(context)
 
-    mock_auth.login.assert_called_with("test@test.com", "password")
+    mock_auth.authenticate.assert_called_with("test@test.com", "password")
     assert context.current_user == {"name": "Test User"}
+    assert context.auth.authenticated
 
 
 def test_login_failure(mock_auth):
-    mock_auth.login.return_value = False
-    mock_auth.get_current_user.return_value = None
+    mock_auth.authenticate.return_value = None
 
     cmd = LoginCommand()
     context = CommandContext()
@@ -129,7 +188,7 @@ def test_login_failure(mock_auth):
 
 
 # --- SearchCasesCommand Tests ---
-def test_search_cases(mock_db):
+def test_search_cases(judge_context):
     test_data = [
         {
             "numero_processo": "456",
@@ -138,27 +197,113 @@ def test_search_cases(mock_db):
             "data_distribuicao": "2023-02-01",
         }
     ]
-    mock_db.execute_query.return_value = test_data
 
     cmd = SearchCasesCommand()
-    context = CommandContext()
 
-    with patch("commands.Prompt.ask", return_value="test"):
-        with patch("commands.console.print") as mock_print:
-            cmd.execute(context)
-            assert any(
-                isinstance(args[0], Table) for args, _ in mock_print.call_args_list
-            )
+    with patch("commands.case_search") as mock_search:
+        mock_search.search.return_value = SearchResult(test_data, 1)
+        with patch("commands.Prompt.ask", return_value="test"):
+            with patch("commands.console.print") as mock_print:
+                cmd.execute(judge_context)
+                assert any(
+                    isinstance(args[0], Table) for args, _ in mock_print.call_args_list
+                )
 
-    # Verify query format
-    called_args, _ = mock_db.execute_query.call_args
-    actual_query = " ".join(called_args[0].split())
-    expected = (
-        "SELECT p.* FROM processos p LEFT JOIN partes_processo pp ON p.id = pp.processo_id "
-        "LEFT JOIN partes pa ON pp.parte_id = pa.id WHERE p.numero_processo ILIKE %s "
-        "OR p.titulo ILIKE %s OR pa.nome ILIKE %s ORDER BY p.data_distribuicao DESC"
+    # The search engine receives the term and the user for role scoping
+    mock_search.search.assert_called_once_with("test", judge_context.current_user)
+
+
+def test_search_cases_reads_local_mirror(judge_context):
+    rows = [
+        {
+            "numero_processo": "456",
+            "titulo": "Mirrored",
+            "status": "Pending",
+            "data_distribuicao": "2023-02-01",
+        }
+    ]
+
+    with patch("commands.local_mirror") as mirror, patch(
+        "commands.case_search"
+    ) as mock_search, patch("commands.Prompt.ask", return_value="test"), patch(
+        "commands.console.print"
+    ) as mock_print:
+        mirror.ready = True
+        mirror.search.return_value = SearchResult(rows, 1)
+        mirror.freshness.return_value = "Local copy as of 10:00:00 (3s ago)"
+        SearchCasesCommand().execute(judge_context)
+
+    mirror.search.assert_called_once_with("test", judge_context.current_user)
+    mock_search.search.assert_not_called()
+    mock_print.assert_any_call("[dim]Local copy as of 10:00:00 (3s ago)[/dim]")
+
+
+# --- CasesByCategoryCommand Tests ---
+def test_cases_by_category_filters_subtree(mock_db, judge_context):
+    mock_db.execute_query.return_value = [
+        {
+            "numero_processo": "1",
+            "titulo": "Case",
+            "status": "Ativo",
+            "data_distribuicao": "2024-01-01",
+        }
+    ]
+    cmd = CasesByCategoryCommand()
+
+    with patch("commands.category_tree") as mock_tree:
+        mock_tree.walk.return_value = [({"id": "civel", "nome": "Cível"}, 0)]
+        mock_tree.case_filter.return_value = ("p.categoria_id = ANY(%s)", (["civel"],))
+        with patch("commands.Prompt.ask", return_value="1"):
+            with patch("commands.console.print") as mock_print:
+                cmd.execute(judge_context)
+                assert any(
+                    isinstance(args[0], Table) for args, _ in mock_print.call_args_list
+                )
+
+    mock_tree.case_filter.assert_called_once_with("civel", "p")
+    sql, params = mock_db.execute_query.call_args[0]
+    assert "p.categoria_id = ANY(%s) AND p.juiz_id = %s" in sql
+    assert params == (["civel"], "judge-1")
+
+
+# --- CaseDetailCommand Tests ---
+def test_case_detail_renders_tables(judge_context):
+    case = {
+        "id": "c1",
+        "numero_processo": "0001234-55.2024.8.26.0100",
+        "titulo": "Cobrança",
+        "status": "Ativo",
+        "valor_causa": 1000,
+        "data_distribuicao": "2024-01-10",
+        "categoria": ["Cível", "Consumidor"],
+        "partes": [
+            {"nome": "José", "tipo": "autor", "cpf_cnpj": "1", "principal": True}
+        ],
+        "documentos": [],
+    }
+    cmd = CaseDetailCommand()
+
+    with patch("commands.case_details") as mock_details:
+        mock_details.load.return_value = case
+        with patch("commands.Prompt.ask", return_value="0001234-55.2024.8.26.0100"):
+            with patch("commands.console.print") as mock_print:
+                cmd.execute(judge_context)
+
+    mock_details.load.assert_called_once_with(
+        "0001234-55.2024.8.26.0100", judge_context.current_user
     )
-    assert actual_query == expected
+    tables = [args[0] for args, _ in mock_print.call_args_list if isinstance(args[0], Table)]
+    assert len(tables) == 2
+
+
+def test_case_detail_not_found(judge_context):
+    cmd = CaseDetailCommand()
+    with patch("commands.case_details") as mock_details:
+        mock_details.load.return_value = None
+        with patch("commands.Prompt.ask", return_value="999"):
+            with patch("commands.console.print") as mock_print:
+                cmd.execute(judge_context)
+                mock_print.assert_any_call("\n[italic]Case not found[/italic]")
 
 
 # --- ExitCommand Tests ---
@@ -173,8 +318,6 @@ def test_exit_command():
 
 # --- UserProfileCommand Tests ---
 def test_user_profile_unauthenticated(mock_auth):
-    mock_auth.get_current_user.return_value = None
-
     cmd = UserProfileCommand()
     context = CommandContext()
 
@@ -192,10 +335,9 @@ def test_user_profile_authenticated(mock_auth, mock_confirm):
         "id": 1,
         "senha": "hashed_password",
     }
-    mock_auth.get_current_user.return_value = test_user
-
     cmd = UserProfileCommand()
     context = CommandContext()
+    context.current_user = test_user
 
     with patch("commands.console.print") as mock_print:
         cmd.execute(context)
@@ -211,7 +353,6 @@ def test_user_profile_change_password(mock_auth, mock_db):
         "id": "550e8400-e29b-41d4-a716-446655440000",  # Changed to UUID string
         "senha": "hashed_password",
     }
-    mock_auth.get_current_user.return_value = test_user
     mock_auth.verify_password.return_value = True
     mock_auth.validate_password_complexity.return_value = (True, "")
     mock_auth.hash_password.return_value = "new_hashed_password"
@@ -221,6 +362,7 @@ def test_user_profile_change_password(mock_auth, mock_db):
 
     cmd = UserProfileCommand()
     context = CommandContext()
+    context.current_user = test_user
 
     with patch("commands.Confirm.ask", return_value=True):
         with patch(
@@ -233,6 +375,30 @@ def test_user_profile_change_password(mock_auth, mock_db):
                 )
 
 
+# --- StatisticsDashboardCommand Tests ---
+def test_statistics_dashboard_renders_cached_stats(judge_context):
+    stats = {
+        "total": 2,
+        "valor_total": 1500,
+        "por_status": {"Ativo": 2},
+        "por_categoria": {"Cível": 2},
+        "por_juiz": {},
+        "por_mes": {date(2024, 1, 1): 2},
+    }
+    with patch("commands.court_statistics") as mock_stats, patch(
+        "commands.console.print"
+    ) as mock_print:
+        mock_stats.load.return_value = stats
+        StatisticsDashboardCommand().execute(judge_context)
+
+    mock_stats.load.assert_called_once_with(judge_context.current_user)
+    panels = [args[0] for args, _ in mock_print.call_args_list if isinstance(args[0], Panel)]
+    titles = [panel.title for panel in panels]
+    assert "Overview" in titles and "Filings per Month" in titles
+    # Empty groupings are skipped rather than showing demo data
+    assert "Cases per Judge" not in titles
+
+
 # --- CommandContext Tests ---
 def test_command_context_refresh():
     with patch("auth.auth_manager") as mock_auth:
@@ -243,3 +409,17 @@ def test_command_context_refresh():
         context.refresh_user()
 
         assert context.current_user == test_user
+
+
+def test_contexts_keep_separate_logins(mock_auth):
+    mock_auth.authenticate.side_effect = [{"email": "a@x"}, {"email": "b@x"}]
+    first, second = CommandContext(), CommandContext()
+
+    with patch("commands.Prompt.ask", side_effect=["a@x", "pw", "b@x", "pw"]):
+        LoginCommand().execute(first)
+        LoginCommand().execute(second)
+
+    assert first.current_user == {"email": "a@x"}
+    assert second.current_user == {"email": "b@x"}
+    second.auth.logout()
+    assert first.auth.authenticated and not second.auth.authenticated
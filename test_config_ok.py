@@ -165,6 +165,72 @@ def test_no_env_file(monkeypatch):
     assert cfg.get("DB_USUARIO") == "test_user"
 
 
+def test_settings_snapshot_is_typed_and_frozen(mock_env_vars, monkeypatch):
+    monkeypatch.setenv("DB_MAX_CONNECTIONS", "8")
+    cfg = ConfigManager()
+    settings = cfg.settings
+    assert settings.db_max_connections == 8
+    assert settings.db_checkout_timeout == 30.0
+    assert "test_pass" not in repr(settings)
+    with pytest.raises(AttributeError):
+        settings.db_max_connections = 9
+
+
+def test_reload_notifies_subscribers(mock_env_vars, monkeypatch):
+    cfg = ConfigManager()
+    seen = []
+    cfg.subscribe(seen.append)
+    before = cfg.settings
+
+    monkeypatch.setenv("DB_MAX_CONNECTIONS", "12")
+    cfg.reload()
+    assert seen == [cfg.settings]
+    assert cfg.settings.db_max_connections == 12
+    assert before.db_max_connections == 5
+
+
+def test_invalid_reload_keeps_current_config(mock_env_vars, monkeypatch):
+    cfg = ConfigManager()
+    seen = []
+    cfg.subscribe(seen.append)
+    monkeypatch.delenv("DB_SENHA")
+    monkeypatch.setattr("config.dotenv_values", lambda *args: {})
+
+    with pytest.raises(ValueError):
+        cfg.reload()
+    assert cfg.get("DB_SENHA") == "test_pass"
+    assert seen == []
+
+
+def test_reload_picks_up_env_file_edits(mock_env_vars, monkeypatch):
+    cfg = ConfigManager()
+    monkeypatch.setattr(
+        "config.dotenv_values",
+        lambda *args: {"DB_MIN_CONNECTIONS": "3", "DB_USUARIO": "from_file"},
+    )
+    # Recorded so that teardown removes the value reload() writes
+    monkeypatch.setenv("DB_MIN_CONNECTIONS", "1")
+    monkeypatch.delenv("DB_MIN_CONNECTIONS")
+    monkeypatch.setattr(ConfigManager, "_process_keys", frozenset({"DB_USUARIO"}))
+
+    cfg.reload()
+    assert cfg.settings.db_min_connections == 3
+    # Set in the process environment: .env does not override it
+    assert cfg.settings.db_usuario == "test_user"
+
+
+def test_boolean_flags_share_one_parser(mock_env_vars, monkeypatch):
+    monkeypatch.setenv("DB_POOL_AUTOSIZE", " Yes ")
+    monkeypatch.setenv("PREFETCH_ENABLED", "1")
+    monkeypatch.setenv("SEARCH_INDEX_ENABLED", "no")
+    monkeypatch.delenv("MV_REFRESH_ENABLED", raising=False)
+    settings = ConfigManager().settings
+    assert settings.db_pool_autosize is True
+    assert settings.prefetch_enabled is True
+    assert settings.search_index_enabled is False
+    assert settings.mv_refresh_enabled is False
+
+
 def test_singleton_instance_access():
     """Test that the singleton instance can be accessed via config variable"""
     # Import and reload the module to reset state
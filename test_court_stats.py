@@ -0,0 +1,68 @@
+"""
+python -m pytest test_court_stats.py -v -s
+"""
+
+import pytest
+from datetime import date
+from decimal import Decimal
+from unittest.mock import patch
+from court_stats import CourtStatistics
+
+SETS = ("por_status", "por_categoria", "por_juiz", "por_mes")
+
+
+def grouped(grouping=None, total=3, valor="300", **columns):
+    """One GROUPING SETS output row; no grouping means the grand total"""
+    row = {flag: flag == grouping for flag in SETS}
+    row.update(status=None, categoria=None, juiz=None, mes=None)
+    row.update(columns, total=total, valor_total=Decimal(valor))
+    return row
+
+
+GROUPED_ROWS = [
+    grouped("por_status", status="Ativo"),
+    grouped("por_categoria", categoria="Cível"),
+    grouped("por_juiz"),
+    grouped("por_mes", total=1, valor="100", mes=date(2024, 2, 1)),
+    grouped("por_mes", total=2, valor="200", mes=date(2024, 1, 1)),
+    grouped(),
+]
+
+
+@pytest.fixture
+def mock_db():
+    with patch("court_stats.db_manager") as mock:
+        mock.execute_query.return_value = GROUPED_ROWS
+        yield mock
+
+
+def test_single_grouping_sets_query_split_by_set(mock_db):
+    stats = CourtStatistics().load({"id": "judge-1", "tipo": "juiz"})
+
+    sql = mock_db.execute_query.call_args.args[0]
+    assert "GROUPING SETS" in sql
+    assert mock_db.execute_query.call_count == 1
+    assert stats["total"] == 3
+    assert stats["valor_total"] == Decimal("300")
+    assert stats["por_status"] == {"Ativo": 3}
+    assert stats["por_categoria"] == {"Cível": 3}
+    assert stats["por_juiz"] == {"Unassigned": 3}
+    assert list(stats["por_mes"]) == [date(2024, 1, 1), date(2024, 2, 1)]
+
+
+def test_staff_share_one_cached_court_result(mock_db):
+    statistics = CourtStatistics()
+    statistics.load({"id": "judge-1", "tipo": "juiz"})
+    statistics.load({"id": "clerk-1", "tipo": "servidor"})
+    assert mock_db.execute_query.call_count == 1
+
+
+def test_other_roles_are_scoped(mock_db):
+    CourtStatistics().load({"id": "lawyer-1", "tipo": "advogado"})
+    sql, params = mock_db.execute_query.call_args.args[:2]
+    assert "acc_pa.advogado_id = %s" in sql
+    assert params == ("lawyer-1",)
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", "-s", __file__])
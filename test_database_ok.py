@@ -2,7 +2,14 @@ import pytest
 from unittest.mock import patch, MagicMock
 import psycopg2
 from psycopg2 import OperationalError
-from database import DatabaseManager
+from psycopg2.extensions import QueryCanceledError
+from database import (
+    CancelToken,
+    ChangeFeed,
+    DatabaseManager,
+    PoolAutosizer,
+    PoolExhausted,
+)
 
 
 @pytest.fixture(autouse=True)
@@ -40,6 +47,17 @@ def test_connection_pool_initialization(mock_connection_pool):
     assert db._connection_pool is not None
 
 
+def test_lazy_pool_connects_on_first_query(mock_connection_pool):
+    """A lazy manager creates its pool only when a connection is needed"""
+    db = DatabaseManager(lazy=True)
+    mock_connection_pool.assert_not_called()
+
+    db.execute_query("SELECT 1")
+    mock_connection_pool.assert_called_once()
+    db._get_connection()
+    mock_connection_pool.assert_called_once()
+
+
 def test_execute_query_success(mock_connection_pool):
     """Test successful query execution with mocked results"""
     # Setup mocks
@@ -98,5 +116,295 @@ def test_close_all_connections(mock_connection_pool):
     mock_connection_pool.return_value.closeall.assert_called_once()
 
 
+def test_cancel_token_interrupts_bound_connection(mock_connection_pool):
+    """Cancelling an active token cancels the query on its connection"""
+    mock_conn = MagicMock()
+    mock_connection_pool.return_value.getconn.return_value = mock_conn
+    token = CancelToken()
+
+    def cancel_mid_query(*args):
+        token.cancel()
+        raise QueryCanceledError("canceling statement due to user request")
+
+    cursor = mock_conn.cursor.return_value.__enter__.return_value
+    cursor.execute.side_effect = cancel_mid_query
+
+    db = DatabaseManager()
+    with token.activate():
+        with pytest.raises(QueryCanceledError):
+            db.execute_query("SELECT pg_sleep(10)")
+
+    mock_conn.cancel.assert_called_once()
+    mock_conn.rollback.assert_called_once()
+    assert CancelToken.current() is None
+
+
+def test_cancelled_token_refuses_new_queries(mock_connection_pool):
+    """A token cancelled before the query starts never executes it"""
+    mock_conn = MagicMock()
+    mock_connection_pool.return_value.getconn.return_value = mock_conn
+    token = CancelToken()
+    token.cancel()
+
+    db = DatabaseManager()
+    with token.activate():
+        with pytest.raises(QueryCanceledError):
+            db.execute_query("SELECT 1")
+
+    mock_conn.cursor.assert_not_called()
+    mock_connection_pool.return_value.putconn.assert_called_once_with(mock_conn)
+
+
+def test_iter_query_streams_through_named_cursor(mock_connection_pool):
+    """iter_query yields rows from a server-side cursor and returns the conn"""
+    mock_conn = MagicMock()
+    mock_connection_pool.return_value.getconn.return_value = mock_conn
+    cursor = mock_conn.cursor.return_value.__enter__.return_value
+    cursor.description = [("id",), ("nome",)]
+    cursor.__iter__.return_value = iter([(1, "Ana"), (2, "Bia")])
+
+    db = DatabaseManager()
+    rows = list(db.iter_query("SELECT id, nome FROM partes", batch_size=10))
+
+    assert rows == [{"id": 1, "nome": "Ana"}, {"id": 2, "nome": "Bia"}]
+    assert mock_conn.cursor.call_args.kwargs["name"].startswith("jec_stream_")
+    assert cursor.itersize == 10
+    mock_conn.commit.assert_called_once()
+    mock_connection_pool.return_value.putconn.assert_called_once_with(mock_conn)
+
+
+def test_transaction_commits_or_rolls_back(mock_connection_pool):
+    """transaction() holds one connection and settles it on exit"""
+    mock_conn = MagicMock()
+    mock_connection_pool.return_value.getconn.return_value = mock_conn
+    db = DatabaseManager()
+
+    with db.transaction() as conn:
+        assert conn is mock_conn
+    mock_conn.commit.assert_called_once()
+
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            raise RuntimeError("boom")
+    mock_conn.rollback.assert_called_once()
+    assert mock_connection_pool.return_value.putconn.call_count == 2
+
+
+def test_fetch_changes_uses_keyset_after_watermark(mock_connection_pool):
+    """Changes are read with a (transacao, id) row comparison"""
+    db = DatabaseManager()
+    with patch.object(db, "execute_query", return_value=[]) as query:
+        db.fetch_changes("processos", (812, "abc"), limit=50)
+        sql, params = query.call_args.args
+        assert "(feed.transacao, feed.id) > (%s, %s::uuid)" in sql
+        assert "feed.transacao < txid_snapshot_xmin(txid_current_snapshot())" in sql
+        assert "ORDER BY feed.transacao, feed.id" in sql
+        assert params == (812, "abc", 50)
+
+        db.fetch_changes()
+        assert query.call_args.args[1][:2] == (
+            0,
+            "00000000-0000-0000-0000-000000000000",
+        )
+
+
+def test_change_feed_pages_and_persists_watermark():
+    """A consumer resumes from its stored watermark and saves progress"""
+    pages = [
+        [{"id": "a", "transacao": 1}, {"id": "b", "transacao": 2}],
+        [{"id": "c", "transacao": 3}],
+    ]
+    with patch("database.db_manager") as db:
+        db.load_watermark.return_value = (0, "z")
+        db.fetch_changes.side_effect = pages
+        feed = ChangeFeed("export", batch_size=2)
+        seen = [row["id"] for rows in feed.batches() for row in rows]
+
+    assert seen == ["a", "b", "c"]
+    assert db.fetch_changes.call_args_list[0].args[1] == (0, "z")
+    assert db.fetch_changes.call_args_list[1].args[1] == (2, "b")
+    db.save_watermark.assert_called_with("export", (3, "c"))
+    assert feed.watermark == (3, "c")
+
+
+class FakeFeedServer:
+    """Committed rows plus running transactions, as fetch_changes sees them"""
+
+    def __init__(self):
+        self.committed = []
+        self.running = {}  # transaction id -> rows written so far
+        self.next_xact = 100
+
+    def begin(self) -> int:
+        self.next_xact += 1
+        self.running[self.next_xact] = []
+        return self.next_xact
+
+    def write(self, xact, case_id):
+        self.running[xact].append({"id": case_id, "transacao": xact})
+
+    def commit(self, xact):
+        self.committed.extend(self.running.pop(xact))
+
+    def fetch_changes(self, source, watermark, limit):
+        # txid_snapshot_xmin: the oldest transaction still running
+        xmin = min(self.running, default=self.next_xact + 1)
+        after = watermark or (0, "")
+        rows = sorted(
+            (r for r in self.committed if (r["transacao"], r["id"]) > after),
+            key=lambda r: (r["transacao"], r["id"]),
+        )
+        return [r for r in rows if r["transacao"] < xmin][:limit]
+
+
+def test_change_feed_waits_for_late_committing_transaction():
+    """A long import that commits after newer writes is not skipped"""
+    server = FakeFeedServer()
+    with patch("database.db_manager", server):
+        feed = ChangeFeed("export", persist=False)
+        importer = server.begin()
+        server.write(importer, "imported-1")
+        server.write(importer, "imported-2")
+        clerk = server.begin()
+        server.write(clerk, "edited")
+        server.commit(clerk)
+
+        # The clerk's edit is held back while the older import still runs
+        assert [r["id"] for rows in feed.batches() for r in rows] == []
+
+        server.commit(importer)
+        seen = [r["id"] for rows in feed.batches() for r in rows]
+
+    assert seen == ["imported-1", "imported-2", "edited"]
+    assert feed.watermark == (clerk, "edited")
+
+
+def test_checkout_waits_for_free_slot_then_times_out(mock_connection_pool):
+    """Checkouts past max connections wait and give up with PoolExhausted"""
+    db = DatabaseManager()
+    db.checkout_timeout = 0.05
+    held = [db._get_connection() for _ in range(5)]
+
+    with pytest.raises(PoolExhausted):
+        db._get_connection()
+    db._put_connection(held.pop())
+    assert db._get_connection() is not None
+    assert mock_connection_pool.return_value.getconn.call_count == 6
+
+
+def make_settings(**changes):
+    from dataclasses import replace
+    from config import Settings
+
+    return replace(
+        Settings(db_usuario="test_user", db_senha="test_pass", db_nome="test_db"),
+        **changes,
+    )
+
+
+def test_explicit_settings_configure_the_pool(mock_connection_pool):
+    db = DatabaseManager(settings=make_settings(db_max_connections=9))
+    assert mock_connection_pool.call_args.kwargs["maxconn"] == 9
+    assert db._slots.limit == 9
+
+
+def test_reconfigure_resizes_pool_in_place(mock_connection_pool):
+    db = DatabaseManager(settings=make_settings())
+    pool = db._connection_pool
+
+    db.reconfigure(make_settings(db_min_connections=2, db_max_connections=10))
+    assert db._connection_pool is pool
+    assert (pool.minconn, pool.maxconn) == (2, 10)
+    assert db._slots.limit == 10
+    mock_connection_pool.assert_called_once()
+
+
+def test_reconfigure_rebuilds_pool_and_drains_old_one(mock_connection_pool):
+    old_pool, new_pool = MagicMock(), MagicMock()
+    mock_connection_pool.side_effect = [old_pool, new_pool]
+    db = DatabaseManager(settings=make_settings())
+    in_flight = db._get_connection()
+
+    db.reconfigure(make_settings(db_host="replica"))
+    assert db._connection_pool is new_pool
+    assert mock_connection_pool.call_args.kwargs["host"] == "replica"
+    old_pool.closeall.assert_not_called()
+
+    db._put_connection(in_flight)
+    old_pool.putconn.assert_called_once_with(in_flight, close=True)
+    old_pool.closeall.assert_called_once()
+    db._get_connection()
+    new_pool.getconn.assert_called_once()
+
+
+def autosized(**changes):
+    settings = make_settings(
+        db_min_connections=2,
+        db_max_connections=8,
+        db_pool_wait_target_ms=50,
+        db_pool_idle_cooldown=300,
+        **changes,
+    )
+    db = DatabaseManager(settings=settings)
+    return db, PoolAutosizer(db)
+
+
+def test_autosizer_grows_pool_when_waits_exceed_target(mock_connection_pool):
+    db, sizer = autosized()
+    db.resize_pool(4)
+    db._slots._waits.extend([0.001] * 90 + [0.2] * 10)
+
+    assert sizer.tick(now=0) == 6
+    assert db._slots.limit == 6
+    assert db._connection_pool.minconn == 6
+    db._slots._waits.extend([0.2] * 10)
+    assert sizer.tick(now=10) == 8  # capped at DB_MAX_CONNECTIONS
+
+
+def test_autosizer_ignores_rare_slow_checkouts(mock_connection_pool):
+    db, sizer = autosized()
+    db.resize_pool(4)
+    db._slots._waits.extend([0.001] * 99 + [0.5])
+
+    assert sizer.tick(now=0) == 4
+
+
+def test_autosizer_shrinks_idle_pool_after_cooldown(mock_connection_pool):
+    db, sizer = autosized()
+    idle = [MagicMock() for _ in range(8)]
+    db._connection_pool._pool = list(idle)
+    sizer._last_busy = 0
+
+    assert sizer.tick(now=299) == 8
+    assert sizer.tick(now=300) == 7
+    idle[0].close.assert_called_once()
+    assert len(db._connection_pool._pool) == 7
+    assert sizer.tick(now=301) == 7  # one step per cooldown
+    assert sizer.tick(now=600) == 6
+
+
+def test_autosizer_keeps_busy_pool_and_minimum(mock_connection_pool):
+    db, sizer = autosized()
+    db.resize_pool(2)
+    db._connection_pool._pool = []
+    sizer._last_busy = 0
+    assert sizer.tick(now=1000) == 2  # DB_MIN_CONNECTIONS
+
+    db.resize_pool(3)
+    held = [db._get_connection() for _ in range(3)]
+    for conn in held:
+        db._put_connection(conn)
+    assert sizer.tick(now=2000) == 3  # every slot was busy: cooldown restarts
+    assert sizer._last_busy == 2000
+
+
+def test_autosizer_follows_reloaded_limits(mock_connection_pool):
+    db, sizer = autosized()
+    db._connection_pool._pool = []
+    db.settings = make_settings(db_min_connections=1, db_max_connections=4)
+
+    assert sizer.tick(now=0) == 4
+
+
 if __name__ == "__main__":
     pytest.main(["-v", "-s", __file__])
@@ -0,0 +1,219 @@
+"""
+python -m pytest test_importer.py -v -s
+"""
+
+import io
+import pytest
+from datetime import date
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+from xml.etree import ElementTree
+from importer import (
+    CaseImporter,
+    ImportReport,
+    PartyResolver,
+    normalize_case,
+    normalize_chunk,
+    parse_decimal,
+    read_csv,
+    read_json,
+    read_xml,
+)
+
+CNJ_1 = "0001234-56.2024.8.26.0100"
+CNJ_2 = "0005678-90.2024.8.26.0100"
+CPF = "529.982.247-25"
+
+
+def record(numero=CNJ_1, **overrides):
+    base = {
+        "numero_processo": numero,
+        "titulo": "Cobrança indevida",
+        "categoria": "Consumidor",
+        "valor_causa": "1.500,00",
+        "data_distribuicao": "05/02/2024",
+        "status": "Ativo",
+        "partes": [{"nome": "Ana  Lima", "cpf_cnpj": CPF, "papel": "Autor"}],
+    }
+    base.update(overrides)
+    return base
+
+
+# --- Readers ---
+def test_read_csv_groups_party_rows_per_case():
+    data = (
+        "numero_processo,titulo,parte_nome,parte_cpf_cnpj\n"
+        f"{CNJ_1},A,Ana,{CPF}\n"
+        f"{CNJ_1},A,Banco,\n"
+        f"{CNJ_2},B,,\n"
+    )
+    cases = list(read_csv(io.StringIO(data)))
+    assert [c["numero_processo"] for c in cases] == [CNJ_1, CNJ_2]
+    assert [p["nome"] for p in cases[0]["partes"]] == ["Ana", "Banco"]
+    assert cases[1]["partes"] == []
+
+
+def test_read_json_streams_arrays_and_lines_across_chunks():
+    array = '[{"numero_processo": "1", "titulo": "x"}, {"numero_processo": "2"}]'
+    lines = '{"numero_processo": "1"}\n{"numero_processo": "2"}\n'
+    for text in (array, lines):
+        records = list(read_json(io.StringIO(text), chunk_size=7))
+        assert [r["numero_processo"] for r in records] == ["1", "2"]
+
+
+def test_read_xml_yields_processo_elements():
+    xml = (
+        b"<processos><processo numero_processo='1'><titulo>T</titulo>"
+        b"<partes><parte cpf_cnpj='1'><nome>Ana</nome></parte></partes>"
+        b"</processo></processos>"
+    )
+    (case,) = read_xml(io.BytesIO(xml))
+    assert case["numero_processo"] == "1" and case["titulo"] == "T"
+    assert case["partes"] == [{"cpf_cnpj": "1", "nome": "Ana"}]
+
+
+@pytest.mark.parametrize(
+    "head, tail",
+    [
+        (b"<processos>", b"</processos>"),
+        (b"<export><lote><processos>", b"</processos></lote></export>"),
+    ],
+)
+def test_read_xml_detaches_handled_elements(head, tail):
+    xml = head + b"<processo numero_processo='1'/>" * 3 + tail
+    parse = ElementTree.iterparse
+    wrappers = []
+
+    def iterparse(source, events=("end",)):
+        for event, element in parse(source, events=("start", "end")):
+            if event == "start" and element.tag == "processos":
+                wrappers.append(element)
+            if event in events:
+                yield event, element
+
+    with patch("importer.ElementTree.iterparse", iterparse):
+        cases = list(read_xml(io.BytesIO(xml)))
+    assert [case["numero_processo"] for case in cases] == ["1", "1", "1"]
+    assert len(wrappers[0]) == 0
+
+
+# --- Normalization ---
+def test_normalize_case_canonical_values():
+    case = normalize_case(record())
+    assert case["numero_digitos"] == "00012345620248260100"
+    assert case["valor_causa"] == Decimal("1500.00")
+    assert case["data_distribuicao"] == date(2024, 2, 5)
+    assert case["categoria"] == "consumidor"
+    (party,) = case["partes"]
+    assert party["documento"] == "52998224725"
+    assert party["nome"] == "Ana Lima"
+    assert party["tipo"] == "fisica" and party["papel"] == "autor"
+    assert parse_decimal("R$ 2500.5") == Decimal("2500.5")
+
+
+def test_normalize_chunk_collects_rejects():
+    cases, rejects = normalize_chunk(
+        [
+            record(),
+            record(numero="123"),
+            record(valor_causa=""),
+            record(partes=[{"nome": "X", "cpf_cnpj": "111.111.111-11"}]),
+        ]
+    )
+    assert len(cases) == 1
+    reasons = [reason for _, reason in rejects]
+    assert "invalid CNJ number" in reasons[0]
+    assert "missing valor_causa" in reasons[1]
+    assert "invalid CPF/CNPJ" in reasons[2]
+
+
+def test_worker_pool_preserves_order():
+    importer = CaseImporter(workers=2, chunk_size=1)
+    numbers = [CNJ_1, CNJ_2, "0009999-00.2024.8.26.0100"]
+    report = ImportReport()
+    cases = list(importer.normalized([record(n) for n in numbers], report))
+    assert [c["numero_processo"] for c in cases] == numbers
+    assert report.read == 3
+
+
+# --- Party lookup cache ---
+def test_party_resolver_queries_only_misses():
+    resolver = PartyResolver()
+    cursor = MagicMock()
+    cursor.fetchall.return_value = [("52998224725", "party-1")]
+
+    assert resolver.resolve(cursor, ["52998224725", "11144477735"]) == {
+        "52998224725": "party-1"
+    }
+    assert sorted(cursor.execute.call_args.args[1][0]) == [
+        "11144477735",
+        "52998224725",
+    ]
+
+    cursor.reset_mock()
+    resolver.remember({"11144477735": "party-2"})
+    assert resolver.resolve(cursor, ["52998224725", "11144477735"]) == {
+        "52998224725": "party-1",
+        "11144477735": "party-2",
+    }
+    cursor.execute.assert_not_called()
+
+
+# --- Loading ---
+@pytest.fixture
+def mock_tx():
+    cursor = MagicMock()
+    conn = MagicMock()
+    conn.cursor.return_value.__enter__.return_value = cursor
+    with patch("importer.db_manager") as db, patch(
+        "importer.valor_causa_validator"
+    ) as validator, patch("importer.category_tree") as tree:
+        db.transaction.return_value.__enter__.return_value = conn
+        validator.query.return_value = ("SELECT v", (["cat"], ["100"], [], []))
+        tree.walk.return_value = [({"id": "cat-1", "nome": "Consumidor"}, 0)]
+        yield cursor
+
+
+def test_import_copies_to_staging_and_merges(mock_tx):
+    cursor = mock_tx
+    results = iter(
+        [
+            [],  # resolver: no known parties
+            [("0005678-90.2024.8.26.0100", Decimal("999"))],  # over the limit
+        ]
+    )
+    cursor.fetchall.side_effect = lambda: next(results, [])
+    cursor.fetchone.side_effect = [(1,), (1,)]
+
+    importer = CaseImporter()
+    with patch.object(importer.resolver, "remember") as remember:
+        report = importer.import_records(
+            [
+                record(),
+                record(),
+                record(CNJ_2),
+                record("0009999-00.2024.8.26.0100", categoria="Outra"),
+            ]
+        )
+
+    copied = [call.args[0] for call in cursor.copy_expert.call_args_list]
+    assert [sql.split(" (")[0] for sql in copied] == [
+        "COPY stg_processos",
+        "COPY stg_partes",
+        "COPY stg_vinculos",
+    ]
+    executed = [call.args[0] for call in cursor.execute.call_args_list]
+    assert any("DELETE FROM stg_processos WHERE id IN" in sql for sql in executed)
+    assert any("INSERT INTO partes_processo" in sql for sql in executed)
+
+    assert report.read == 4 and report.imported == 1
+    reasons = [reason for _, reason in report.rejects]
+    assert "duplicated in file" in reasons
+    assert "unknown category" in reasons
+    assert any("above category limit" in reason for reason in reasons)
+    # The party was never confirmed as inserted, so it is not cached
+    remember.assert_called_once_with({})
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", "-s", __file__])
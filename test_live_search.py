@@ -0,0 +1,183 @@
+"""
+python -m pytest test_live_search.py -v -s
+"""
+
+import io
+import pytest
+from unittest.mock import MagicMock, patch
+from psycopg2.extensions import QueryCanceledError
+from rich.console import Console
+from live_search import (
+    BACKSPACE,
+    ENTER,
+    ESCAPE,
+    KeyReader,
+    LiveCaseSearch,
+    PrefixResultCache,
+    row_matches,
+)
+from search import SearchResult
+
+ROWS = [
+    {
+        "numero_processo": "0001234-55.2024",
+        "titulo": "Cobrança",
+        "partes": "José Silva",
+        "status": "Ativo",
+        "data_distribuicao": "2024-01-10",
+    },
+    {
+        "numero_processo": "0009876-11.2023",
+        "titulo": "Dano moral",
+        "partes": "Silvana Reis",
+        "status": "Ativo",
+        "data_distribuicao": "2023-05-02",
+    },
+]
+
+
+class ScriptedKeys:
+    """Stand-in for KeyReader that replays keys, then presses Enter"""
+
+    def __init__(self, keys):
+        self.keys = list(keys)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def read(self, timeout):
+        return self.keys.pop(0) if self.keys else ENTER
+
+
+def test_translate_keys():
+    assert KeyReader._translate("\r") == ENTER
+    assert KeyReader._translate("\x1b") == ESCAPE
+    assert KeyReader._translate("\x7f") == BACKSPACE
+    assert KeyReader._translate("a") == "a"
+    assert KeyReader._translate("\x01") is None
+
+
+def test_row_matches_folds_case_and_accents():
+    assert row_matches(ROWS[0], "jose")
+    assert row_matches(ROWS[0], "000123455")
+    assert not row_matches(ROWS[0], "moral")
+
+
+def test_prefix_cache_refines_complete_results():
+    cache = PrefixResultCache()
+    cache.store("silva", SearchResult(ROWS, 2))
+
+    refined = cache.lookup("silvan")
+    assert [row["partes"] for row in refined.rows] == ["Silvana Reis"]
+    assert refined.total == 1
+
+
+def test_prefix_cache_ignores_truncated_results():
+    cache = PrefixResultCache()
+    cache.store("silva", SearchResult(ROWS, 500, estimated=True))
+    assert cache.lookup("silvan") is None
+
+
+def test_dispatch_uses_cache_without_querying():
+    engine = MagicMock()
+    search = LiveCaseSearch({"id": "u1"}, engine=engine)
+    search.cache.store("silva", SearchResult(ROWS, 2))
+
+    search.dispatch("silvana")
+
+    engine.search.assert_not_called()
+    assert search.status == "refined locally"
+    assert len(search.result) == 1
+
+
+def test_superseded_query_is_cancelled_and_discarded():
+    search = LiveCaseSearch({"id": "u1"}, engine=MagicMock())
+    first = MagicMock()
+    search._token = first
+    search._generation = 1
+
+    search.dispatch("x")  # too short: clears results without querying
+    first.cancel.assert_called_once()
+
+    # a late answer for the old generation must not replace newer state
+    search._publish(1, SearchResult(ROWS, 2), "late")
+    assert len(search.result) == 0
+
+
+def test_cancelled_query_publishes_nothing():
+    engine = MagicMock()
+    engine.search.side_effect = QueryCanceledError("cancelled")
+    search = LiveCaseSearch({"id": "u1"}, engine=engine)
+    token = MagicMock()
+    search._run_query("silva", search._generation, token)
+    assert len(search.result) == 0
+
+
+class SyncThread:
+    """Runs the query inline so the test is deterministic"""
+
+    def __init__(self, target, args, **kwargs):
+        self.target, self.args = target, args
+
+    def start(self):
+        self.target(*self.args)
+
+
+def make_search(engine, keys, debounce):
+    return LiveCaseSearch(
+        {"id": "u1"},
+        engine=engine,
+        console=Console(file=io.StringIO()),
+        debounce=debounce,
+        key_reader=lambda: ScriptedKeys(keys),
+    )
+
+
+def test_run_waits_for_typing_to_settle():
+    engine = MagicMock()
+    search = make_search(engine, ["s", "i", "l", BACKSPACE, "l"], debounce=10)
+    search.run()
+    assert search.term == "sil"
+    engine.search.assert_not_called()
+
+
+def test_run_refines_extended_terms_locally():
+    engine = MagicMock()
+    engine.search.return_value = SearchResult(ROWS[:1], 1)
+    search = make_search(engine, ["s", "i", "l"], debounce=0)
+
+    with patch("live_search.threading.Thread", SyncThread):
+        result = search.run()
+
+    # "s" is too short, "si" queries (substring mode), "sil" refines locally
+    engine.search.assert_called_once_with("si", {"id": "u1"}, fulltext=False)
+    assert search.status == "refined locally"
+    assert result.rows == ROWS[:1]
+
+
+def test_run_sends_complete_cpf_to_the_server():
+    engine = MagicMock()
+    engine.search.return_value = SearchResult([], 0)
+    search = make_search(engine, list("529.982.247-25"), debounce=0)
+
+    with patch("live_search.threading.Thread", SyncThread):
+        search.run()
+
+    # Every prefix is free text refined locally, but the valid CPF is not
+    assert engine.search.call_args_list[-1][0][0] == "529.982.247-25"
+    assert search.status != "refined locally"
+
+
+def test_prefix_cache_never_answers_document_terms():
+    cache = PrefixResultCache()
+    cache.store("529.982.247-2", SearchResult([], 0))
+    cache.store("52998224725", SearchResult(ROWS, 2))
+    assert cache.lookup("529.982.247-25") is None
+    assert cache.lookup("52998224725") is None
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", "-s", __file__])
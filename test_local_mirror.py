@@ -0,0 +1,194 @@
+"""
+python -m pytest test_local_mirror.py -v -s
+"""
+
+import pytest
+from datetime import date, datetime
+from decimal import Decimal
+from unittest.mock import patch
+from local_mirror import LocalMirror, scope
+
+CASE_1 = "11111111-1111-1111-1111-111111111111"
+CASE_2 = "22222222-2222-2222-2222-222222222222"
+
+
+def case_row(case_id, numero, titulo, stamp, **extra):
+    row = {
+        "id": case_id,
+        "transacao": stamp.day,
+        "data_atualizacao": stamp,
+        "removido": False,
+        "numero_processo": numero,
+        "titulo": titulo,
+        "descricao": None,
+        "categoria_id": "cat-1",
+        "subcategoria_id": None,
+        "valor_causa": Decimal("1500.50"),
+        "data_distribuicao": date(2024, 3, stamp.day),
+        "status": "Em andamento",
+        "juiz_id": "judge-1",
+        "servidor_id": None,
+        "ativo": True,
+        "autor": "Maria",
+    }
+    row.update(extra)
+    return row
+
+
+class FakeServer:
+    """Answers the mirror's queries from in-memory pages"""
+
+    def __init__(self, pages):
+        self.pages = list(pages)
+        self.links = []
+        self.parties = []
+        self.watermarks = []
+
+    def fetch_changes(self, source, watermark, limit):
+        self.watermarks.append(watermark)
+        return self.pages.pop(0) if self.pages else []
+
+    def execute_query(self, query, params=None, return_results=False):
+        if "categorias_versao" in query:
+            return [{"versao": 1}]
+        if "FROM categorias_causas" in query:
+            return [
+                {
+                    "id": "cat-1",
+                    "categoria_pai_id": None,
+                    "nome": "Consumo",
+                    "descricao": None,
+                    "valor_maximo": Decimal("40000"),
+                }
+            ]
+        if "FROM partes_processo WHERE" in query:
+            return [l for l in self.links if l["processo_id"] in params[0]]
+        return list(self.parties)
+
+
+@pytest.fixture
+def server():
+    fake = FakeServer(
+        [
+            [
+                case_row(
+                    CASE_1,
+                    "0001234-55.2024.8.26.0100",
+                    "Cobrança indevida",
+                    datetime(2024, 3, 1, 10),
+                ),
+                case_row(
+                    CASE_2,
+                    "0009999-11.2024.8.26.0100",
+                    "Voo cancelado",
+                    datetime(2024, 3, 2, 10),
+                    juiz_id="judge-2",
+                ),
+            ]
+        ]
+    )
+    fake.links = [
+        {
+            "id": "link-1",
+            "processo_id": CASE_1,
+            "parte_id": "party-1",
+            "tipo": "autor",
+            "principal": True,
+        },
+    ]
+    fake.parties = [
+        {
+            "id": "party-1",
+            "tipo": "fisica",
+            "nome": "José Antônio",
+            "cpf_cnpj": "123.456.789-09",
+            "advogado_id": "lawyer-1",
+        },
+    ]
+    with patch("local_mirror.db_manager", fake), patch("database.db_manager", fake):
+        yield fake
+
+
+@pytest.fixture
+def mirror(tmp_path):
+    local = LocalMirror(str(tmp_path / "mirror.db"))
+    local.open()
+    yield local
+    local.close()
+
+
+def test_not_ready_before_first_sync(mirror):
+    assert LocalMirror().ready is False
+    assert mirror.ready is False
+    assert mirror.freshness() is None
+
+
+def test_sync_copies_cases_parties_and_categories(server, mirror):
+    assert mirror.sync_once() == 2
+    assert mirror.ready
+
+    rows = mirror.active_cases({"id": "judge-1", "tipo": "juiz"})
+    assert [row["id"] for row in rows] == [CASE_1]
+    assert rows[0]["categoria"] == "Consumo"
+    assert mirror.freshness().startswith("Local copy as of")
+
+
+def test_search_matches_folded_names_and_scopes(server, mirror):
+    mirror.sync_once()
+    lawyer = {"id": "lawyer-1", "tipo": "advogado"}
+
+    results = mirror.search("jose antonio", lawyer)
+    assert [row["id"] for row in results] == [CASE_1]
+    assert results.total == 1
+    assert results.rows[0]["partes"] == "José Antônio"
+    assert not mirror.search("voo", lawyer)
+    assert (
+        mirror.search(
+            "12345678909", {"id": "u", "tipo": "parte", "cpf": "123.456.789-09"}
+        ).total
+        == 1
+    )
+
+
+def test_watermark_survives_reopen(server, mirror, tmp_path):
+    mirror.sync_once()
+    mirror.close()
+
+    reopened = LocalMirror(str(tmp_path / "mirror.db"))
+    reopened.open()
+    reopened.sync_once()
+    assert server.watermarks[-1] == (2, CASE_2)
+    reopened.close()
+
+
+def test_tombstone_removes_case_and_orphan_parties(server, mirror):
+    mirror.sync_once()
+    server.pages.append(
+        [
+            {
+                "id": CASE_1,
+                "transacao": 3,
+                "data_atualizacao": datetime(2024, 3, 3),
+                "removido": True,
+            }
+        ]
+    )
+    mirror.sync_once()
+
+    assert mirror.active_cases({"id": "judge-1", "tipo": "juiz"}) == []
+    assert mirror._query("SELECT id FROM partes") == []
+
+
+def test_failed_sync_keeps_data_and_flags_freshness(server, mirror):
+    mirror.sync_once()
+    server.fetch_changes = lambda *args: (_ for _ in ()).throw(Exception("timeout"))
+    mirror.run_once()
+
+    assert mirror.ready
+    assert "server unreachable" in mirror.freshness()
+
+
+def test_scope_denies_unknown_roles():
+    assert scope(None) == ("0", ())
+    assert scope({"id": "x", "tipo": "visitante"}) == ("0", ())
+    assert scope({"id": "x", "tipo": "servidor"}, "c") == ("c.servidor_id = ?", ("x",))
@@ -0,0 +1,117 @@
+"""
+python -m pytest test_log_pipeline.py -v -s
+"""
+
+import json
+import logging
+from dataclasses import replace
+import pytest
+from config import Settings
+from database import QueryTimer
+from log_pipeline import LogPipeline, command_scope
+
+
+def make_settings(tmp_path, **changes):
+    settings = Settings(log_file=str(tmp_path / "jec.log"), log_level="INFO")
+    return replace(settings, **changes)
+
+
+@pytest.fixture
+def pipeline(tmp_path):
+    root = logging.getLogger()
+    level = root.level
+    pipeline = LogPipeline()
+    pipeline.start(make_settings(tmp_path))
+    yield pipeline
+    pipeline.stop()
+    root.setLevel(level)
+
+
+def read_records(path):
+    with open(path, encoding="utf-8") as log:
+        return [json.loads(line) for line in log]
+
+
+def test_records_are_json_with_command_context(pipeline, tmp_path):
+    with command_scope("ListProcessesCommand", {"id": 7}):
+        QueryTimer.current().add(0.0125, queries=2)
+        logging.getLogger("jec.test").warning("slow %s", "listing")
+    pipeline.stop()
+
+    logged, finished = read_records(tmp_path / "jec.log")
+    assert logged["message"] == "slow listing"
+    assert logged["level"] == "WARNING"
+    assert logged["command"] == "ListProcessesCommand"
+    assert logged["user_id"] == 7
+    assert (logged["db_ms"], logged["db_queries"]) == (12.5, 2)
+    assert finished["message"] == "Command finished"
+    assert finished["status"] == "ok"
+    assert "duration_ms" in finished
+
+
+def test_failed_command_logs_status_and_traceback(pipeline, tmp_path):
+    with pytest.raises(RuntimeError):
+        with command_scope("CaseDetailCommand"):
+            try:
+                raise RuntimeError("boom")
+            except RuntimeError:
+                logging.exception("Case lookup failed")
+                raise
+    pipeline.stop()
+
+    failed, finished = read_records(tmp_path / "jec.log")
+    assert "RuntimeError: boom" in failed["exception"]
+    assert "user_id" not in failed
+    assert finished["status"] == "error"
+
+
+def test_nested_query_timers_both_count():
+    outer, inner = QueryTimer(), QueryTimer()
+    with outer.activate(), inner.activate():
+        QueryTimer.current().add(0.5)
+    assert (outer.seconds, outer.count) == (0.5, 1)
+    assert (inner.seconds, inner.count) == (0.5, 1)
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    root = logging.getLogger()
+    level = root.level
+    pipeline = LogPipeline(queue_size=2)
+    pipeline.start(make_settings(tmp_path))
+    # Hold the file handler so the listener stalls on its first record
+    pipeline.file_handler.acquire()
+    try:
+        for number in range(50):
+            logging.warning("record %d", number)
+        assert pipeline.handler.dropped > 0
+    finally:
+        pipeline.file_handler.release()
+        pipeline.stop()
+        root.setLevel(level)
+
+    records = read_records(tmp_path / "jec.log")
+    assert "log records dropped" in records[-1]["message"]
+    assert len(records) < 50
+
+
+def test_reconfigure_switches_file_and_rotation(pipeline, tmp_path):
+    logging.warning("first")
+    pipeline.reconfigure(
+        make_settings(tmp_path, log_file=str(tmp_path / "other.log"), max_log_size=200)
+    )
+    for number in range(5):
+        logging.warning("second %d", number)
+    pipeline.stop()
+
+    assert read_records(tmp_path / "jec.log")[0]["message"] == "first"
+    assert (tmp_path / "other.log.1").exists()
+
+
+def test_stopped_pipeline_is_not_reconfigured(tmp_path):
+    pipeline = LogPipeline()
+    pipeline.reconfigure(make_settings(tmp_path))
+    assert pipeline.listener is None
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", "-s", __file__])
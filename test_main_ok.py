@@ -4,7 +4,7 @@ python -m pytest test_main_ok.py -v -s
 
 import pytest
 from unittest.mock import patch, MagicMock, call
-from main import JECCLI
+from main import JECCLI, FullScreenCLI
 from commands import ExitCommand
 from rich.table import Table
 
@@ -26,12 +26,6 @@ def mock_prompt_ask():
         yield mock
 
 
-@pytest.fixture
-def mock_auth():
-    with patch("main.auth_manager") as mock:
-        yield mock
-
-
 @pytest.fixture
 def mock_db():
     with patch("main.db_manager") as mock:
@@ -42,7 +36,11 @@ def mock_db():
 def mock_commands():
     with patch("main.LoginCommand"), patch("main.ListProcessesCommand"), patch(
         "main.SearchCasesCommand"
-    ), patch("main.UserProfileCommand"), patch("main.ExitCommand"):
+    ), patch("main.LiveSearchCommand"), patch("main.CaseDetailCommand"), patch(
+        "main.CasesByCategoryCommand"
+    ), patch("main.StatisticsDashboardCommand"), patch(
+        "main.UserProfileCommand"
+    ), patch("main.ExitCommand"):
         yield
 
 
@@ -64,8 +62,7 @@ def test_press_enter_to_continue(cli, mock_prompt_ask):
     mock_prompt_ask.assert_called_once_with("\n[dim]Press Enter to continue...[/dim]")
 
 
-def test_main_menu_unauthenticated(cli, mock_prompt_ask, mock_auth, mock_commands):
-    mock_auth.get_current_user.return_value = None
+def test_main_menu_unauthenticated(cli, mock_prompt_ask, mock_commands):
 
     # Create a completely mock command
     mock_command = MagicMock()
@@ -82,8 +79,8 @@ def test_main_menu_unauthenticated(cli, mock_prompt_ask, mock_auth, mock_command
         mock_command.execute.assert_called_once()
 
 
-def test_main_menu_authenticated(cli, mock_prompt_ask, mock_auth, mock_commands):
-    mock_auth.get_current_user.return_value = {"name": "Test User"}
+def test_main_menu_authenticated(cli, mock_prompt_ask, mock_commands):
+    cli.session.user = {"name": "Test User"}
 
     # Create a completely mock command
     mock_command = MagicMock()
@@ -100,8 +97,76 @@ def test_main_menu_authenticated(cli, mock_prompt_ask, mock_auth, mock_commands)
         mock_command.execute.assert_called_once()
 
 
-def test_main_menu_exit(cli, mock_prompt_ask, mock_auth, mock_commands):
-    mock_auth.get_current_user.return_value = None
+def test_main_menu_builds_only_the_chosen_command(
+    cli, mock_prompt_ask, mock_commands
+):
+    mock_prompt_ask.return_value = "1"
+
+    with patch("main.ListProcessesCommand") as listing, patch("main.console.print"):
+        cli.main_menu()
+
+    listing.assert_not_called()
+
+
+def test_commands_are_created_once(cli, mock_prompt_ask, mock_commands):
+    mock_prompt_ask.return_value = "1"
+
+    with patch("main.LoginCommand") as login, patch("main.console.print"):
+        cli.main_menu()
+        cli.main_menu()
+
+    login.assert_called_once_with()
+    assert login.return_value.execute.call_count == 2
+
+
+def test_menu_prefetches_while_waiting(cli, mock_prompt_ask, mock_commands):
+    cli.session.user = {"id": "judge-1"}
+    mock_prompt_ask.return_value = "1"
+
+    with patch("main.prefetcher") as prefetcher, patch("main.console.print"):
+        with patch("main.ListProcessesCommand") as listing:
+            listing.prefetch_job = "cases"
+            cli.main_menu()
+
+    prefetcher.start.assert_called_once_with({"id": "judge-1"})
+    prefetcher.start.return_value.cancel.assert_called_once_with(keep="cases")
+
+
+def test_menu_logs_each_command(cli, mock_prompt_ask, mock_commands, caplog):
+    cli.session.user = {"id": "judge-1"}
+    mock_prompt_ask.return_value = "1"
+
+    with patch("main.prefetcher"), patch("main.console.print"):
+        with caplog.at_level("INFO", logger="jec.commands"):
+            cli.main_menu()
+
+    (record,) = [r for r in caplog.records if r.name == "jec.commands"]
+    assert record.getMessage() == "Command finished"
+    assert (record.command, record.user_id, record.status) == (
+        "List Processes",
+        "judge-1",
+        "ok",
+    )
+
+
+def test_fullscreen_menu_updates_regions(mock_prompt_ask, mock_commands):
+    mock_prompt_ask.return_value = "2"
+
+    with patch("tui.FullScreen") as screen_class:
+        cli = FullScreenCLI()
+        with patch("main.ListProcessesCommand") as listing:
+            cli.main_menu()
+
+    screen = screen_class.return_value
+    screen.set_menu.assert_called_once()
+    assert "2" in screen.set_menu.call_args[0][0]
+    screen.begin_output.assert_called_once()
+    listing.return_value.execute.assert_called_once_with(cli.context)
+    assert cli.last_action.startswith("List Processes - ")
+    screen.set_status.assert_called_with(cli.last_action)
+
+
+def test_main_menu_exit(cli, mock_prompt_ask, mock_commands):
 
     # Create a mock exit command that sets running to False
     mock_exit = MagicMock()
@@ -0,0 +1,48 @@
+"""
+python -m pytest test_migrations.py -v -s
+"""
+
+import pytest
+from unittest.mock import patch
+import migrations
+
+
+@pytest.fixture
+def mock_db():
+    with patch("migrations.db_manager") as mock:
+        yield mock
+
+
+def test_apply_migrations_skips_applied(mock_db):
+    first, second = migrations.MIGRATIONS[0][0], "9999_test"
+    with patch.object(
+        migrations, "MIGRATIONS", [(first, "SELECT 1"), (second, "SELECT 2")]
+    ):
+        mock_db.execute_query.side_effect = lambda *a, **k: (
+            [{"name": first}] if k.get("return_results") else None
+        )
+        assert migrations.apply_migrations() == [second]
+
+    executed = [call.args[0] for call in mock_db.execute_query.call_args_list]
+    assert "SELECT 2" in executed
+    assert "SELECT 1" not in executed
+
+
+def test_migration_names_are_unique_and_ordered():
+    names = [name for name, _ in migrations.MIGRATIONS]
+    assert names == sorted(set(names))
+
+
+def test_active_case_triggers_do_not_share_a_row():
+    """Writers record pending changes by inserting, never by updating one row"""
+    script = dict(migrations.MIGRATIONS)["0011_processos_ativos_mv_pending_rows"]
+    trigger = script.split("jec_processos_ativos_mv_alterado()")[1].split("END $$")[0]
+    assert "INSERT INTO processos_ativos_mv_pendencias" in trigger
+    assert "UPDATE" not in trigger
+    refresh = script.split("jec_refresh_processos_ativos_mv()")[1]
+    # Pending rows are cleared before REFRESH takes its snapshot
+    assert refresh.index("DELETE FROM") < refresh.index("REFRESH MATERIALIZED")
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", "-s", __file__])
@@ -0,0 +1,54 @@
+"""
+python -m pytest test_normalization.py -v -s
+"""
+
+import pytest
+from normalization import (
+    TERM_CNJ,
+    TERM_CNPJ,
+    TERM_CPF,
+    TERM_TEXT,
+    classify_term,
+    digits_only,
+    is_valid_cnpj,
+    is_valid_cpf,
+    sql_digits_only,
+)
+
+
+def test_digits_only():
+    assert digits_only("529.982.247-25") == "52998224725"
+    assert digits_only(None) == ""
+
+
+def test_sql_digits_only():
+    assert sql_digits_only("pa.cpf_cnpj") == "regexp_replace(pa.cpf_cnpj, '\\D', '', 'g')"
+
+
+def test_cpf_and_cnpj_check_digits():
+    assert is_valid_cpf("52998224725")
+    assert not is_valid_cpf("52998224724")
+    assert not is_valid_cpf("11111111111")
+    assert is_valid_cnpj("11222333000181")
+    assert not is_valid_cnpj("11222333000182")
+
+
+@pytest.mark.parametrize(
+    "term,expected",
+    [
+        ("0001234-55.2024.8.26.0100", (TERM_CNJ, "00012345520248260100")),
+        ("00012345520248260100", (TERM_CNJ, "00012345520248260100")),
+        ("529.982.247-25", (TERM_CPF, "52998224725")),
+        (" 52998224725 ", (TERM_CPF, "52998224725")),
+        ("11.222.333/0001-81", (TERM_CNPJ, "11222333000181")),
+        ("52998224724", (TERM_TEXT, "52998224724")),  # bad check digit
+        ("0001234", (TERM_TEXT, "0001234")),  # partial case number
+        ("Maria Silva", (TERM_TEXT, "Maria Silva")),
+    ],
+)
+def test_classify_term(term, expected):
+    assert classify_term(term) == expected
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", "-s", __file__])
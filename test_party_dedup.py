@@ -0,0 +1,127 @@
+"""
+python -m pytest test_party_dedup.py -v -s
+"""
+
+import pytest
+from unittest.mock import patch
+from party_dedup import (
+    _PHONETIC_QUERY,
+    PartyDeduplicator,
+    documents_conflict,
+    name_similarity,
+    phonetic_key,
+)
+
+CPF_A = "529.982.247-25"
+CPF_B = "111.444.777-35"
+
+
+def party(id, nome, cpf_cnpj="", bloco="b", vinculos=0, tipo="fisica", bloco_nome=None):
+    return {
+        "id": id,
+        "nome": nome,
+        "cpf_cnpj": cpf_cnpj,
+        "bloco": bloco,
+        "bloco_nome": bloco_nome or bloco,
+        "vinculos": vinculos,
+        "tipo": tipo,
+    }
+
+
+def test_phonetic_key_ignores_spelling_variants():
+    assert phonetic_key("Luiz Souza") == phonetic_key("Luis Sousa")
+    assert phonetic_key("Maria da Silva") == phonetic_key("Maria Silva")
+    assert phonetic_key("Thereza Queiroz") == phonetic_key("Teresa Queirós")
+    assert phonetic_key("Ana Lima") != phonetic_key("Ana Lopes")
+
+
+def test_name_similarity_and_document_conflicts():
+    assert name_similarity("José Pereira", "Jose Pereira") == 1.0
+    assert name_similarity("Ana", "") == 0.0
+    assert documents_conflict(CPF_A, CPF_B)
+    assert not documents_conflict(CPF_A, "52998224725")
+    assert not documents_conflict(CPF_A, "")
+
+
+def test_document_block_merges_into_best_linked():
+    block = [party("p1", "Ana"), party("p2", "Ana S.", vinculos=3), party("p3", "A")]
+    proposals = list(PartyDeduplicator.compare_document_block(block))
+    assert [(p.keep_id, p.duplicate_id) for p in proposals] == [
+        ("p2", "p1"),
+        ("p2", "p3"),
+    ]
+    assert list(PartyDeduplicator.compare_document_block(block[:1])) == []
+
+
+def test_name_block_uses_window_and_skips_conflicts():
+    block = [
+        party("p1", "Luiz Souza", CPF_A, vinculos=2),
+        party("p2", "Luis Sousa"),
+        party("p3", "Luiz Souza", CPF_B),  # different valid CPF than p1
+        party("p4", "Luiz Souza Ltda", tipo="juridica"),
+    ]
+    proposals = list(PartyDeduplicator(window=1).compare_name_block(block))
+    # window=1: each row is only compared with the row right before it
+    assert [(p.keep_id, p.duplicate_id, p.reason) for p in proposals] == [
+        ("p1", "p2", "phonetic"),
+        ("p2", "p3", "phonetic"),
+    ]
+
+
+def test_proposals_stream_blocks_and_skip_repeated_pairs():
+    document_rows = [
+        party("p1", "Ana Lima", CPF_A, bloco="1"),
+        party("p2", "Ana Lima", CPF_A, bloco="1"),
+        party("p3", "Rui", CPF_B, bloco="2"),
+    ]
+    name_rows = [
+        party("p1", "Ana Lima", CPF_A, bloco="ana lim"),
+        party("p2", "Ana Lima", CPF_A, bloco="ana lim"),
+        party("p5", "Ana Limma", bloco="ana lim"),
+    ]
+
+    phonetic_rows = [
+        party("p1", "Ana Lima", CPF_A, bloco="ana lim", bloco_nome="ana lim"),
+        party("p2", "Ana Lima", CPF_A, bloco="ana lim", bloco_nome="ana lim"),
+        party("p5", "Ana Limma", bloco="ana lim", bloco_nome="ana lim"),
+    ]
+
+    with patch("party_dedup.db_manager") as mock_db:
+        mock_db.iter_query.side_effect = [
+            iter(document_rows),
+            iter(name_rows),
+            iter(phonetic_rows),
+        ]
+        proposals = list(PartyDeduplicator().proposals())
+
+    pairs = [(p.keep_id, p.duplicate_id, p.reason) for p in proposals]
+    assert pairs[0] == ("p1", "p2", "document")
+    assert len(pairs) == len(set((keep, dup) for keep, dup, _ in pairs))
+    assert {p.duplicate_id for p in proposals[1:]} == {"p5"}
+
+
+def test_sound_alike_names_meet_across_name_blocks():
+    phonetic_rows = [
+        party("p1", "Thiago Souza", bloco="tia sou", bloco_nome="thi sou"),
+        party("p2", "Tiago Sousa", bloco="tia sou", bloco_nome="tia sou"),
+        party("p3", "Kauã Lima", bloco="cau lim", bloco_nome="kau lim"),
+        party("p4", "Cauã Lima", bloco="cau lim", bloco_nome="cau lim"),
+    ]
+
+    with patch("party_dedup.db_manager") as mock_db:
+        mock_db.iter_query.return_value = iter(phonetic_rows)
+        proposals = list(PartyDeduplicator().phonetic_matches())
+
+    pairs = {(p.keep_id, p.duplicate_id, p.reason) for p in proposals}
+    assert pairs == {("p1", "p2", "phonetic"), ("p3", "p4", "phonetic")}
+    assert mock_db.iter_query.call_args[0][0] == _PHONETIC_QUERY
+
+
+def test_phonetic_blocking_key_uses_postgres_word_boundaries():
+    assert "\\y" in _PHONETIC_QUERY
+    assert "\\b" not in _PHONETIC_QUERY
+    assert "bloco_nome" in _PHONETIC_QUERY
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", "-s", __file__])
@@ -0,0 +1,109 @@
+"""
+python -m pytest test_prefetch.py -v -s
+"""
+
+import threading
+import pytest
+from unittest.mock import patch
+from psycopg2.extensions import QueryCanceledError
+from database import CancelToken
+from prefetch import Prefetcher
+
+USER = {"id": "judge-1", "tipo": "juiz"}
+
+
+@pytest.fixture
+def prefetcher():
+    fetcher = Prefetcher(ttl=60)
+    fetcher.enabled = True
+    return fetcher
+
+
+def test_disabled_or_anonymous_does_nothing(prefetcher):
+    assert Prefetcher().start(USER) is None
+    assert prefetcher.start(None) is None
+
+
+def test_batch_fills_cache(prefetcher):
+    prefetcher.jobs = [("cases", lambda user: ([{"id": 1}], None))]
+
+    batch = prefetcher.start(USER)
+    batch.cancel(keep="cases")
+    batch._thread.join(1)
+
+    assert prefetcher.get("cases", USER) == ([{"id": 1}], None)
+    assert prefetcher.get("cases", {"id": "other"}) is None
+    # Still fresh: nothing left to prefetch
+    assert prefetcher.start(USER) is None
+
+
+def test_cancel_keeps_the_chosen_job_running(prefetcher):
+    started, release = threading.Event(), threading.Event()
+
+    def slow_profile(user):
+        started.set()
+        release.wait(1)
+        return {"id": user["id"], "email": "judge@x"}
+
+    prefetcher.jobs = [("profile", slow_profile)]
+    batch = prefetcher.start(USER)
+    started.wait(1)
+    threading.Timer(0.05, release.set).start()
+    batch.cancel(keep="profile")
+
+    assert prefetcher.get("profile", USER)["email"] == "judge@x"
+
+
+def test_cancel_interrupts_other_jobs(prefetcher):
+    started = threading.Event()
+    tokens = []
+
+    def blocking_query(user):
+        token = CancelToken.current()
+        tokens.append(token)
+        started.set()
+        while not token.cancelled:
+            pass
+        raise QueryCanceledError("canceling statement due to user request")
+
+    ran_next = []
+    prefetcher.jobs = [
+        ("cases", blocking_query),
+        ("profile", lambda user: ran_next.append(user)),
+    ]
+    batch = prefetcher.start(USER)
+    started.wait(1)
+    batch.cancel(keep="profile")
+    batch._thread.join(1)
+
+    assert tokens[0].cancelled
+    assert ran_next == []
+    assert prefetcher.get("cases", USER) is None
+
+
+def test_list_command_renders_prefetched_cases():
+    from commands import CommandContext, ListProcessesCommand
+
+    context = CommandContext()
+    context.current_user = USER
+    rows = [
+        {
+            "numero_processo": "0001",
+            "titulo": "T",
+            "categoria": "C",
+            "status": "Em andamento",
+            "data_distribuicao": "2024-01-01",
+        }
+    ]
+    with patch("commands.prefetcher") as cache, patch.object(
+        ListProcessesCommand, "fetch"
+    ) as fetch, patch("commands.console.print"):
+        cache.get.return_value = (rows, None)
+        ListProcessesCommand().execute(context)
+
+    cache.get.assert_called_once_with("cases", USER)
+    fetch.assert_not_called()
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", "-s", __file__])
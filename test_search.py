@@ -0,0 +1,176 @@
+"""
+python -m pytest test_search.py -v -s
+"""
+
+import pytest
+from unittest.mock import patch, MagicMock
+from search import CaseSearchEngine, SearchCapabilities
+
+JUDGE = {"id": "judge-1", "tipo": "juiz"}
+
+
+@pytest.fixture
+def mock_db():
+    with patch("search.db_manager") as mock:
+        yield mock
+
+
+def engine_with(fulltext, trigram, limit=50):
+    engine = CaseSearchEngine(limit=limit)
+    engine._capabilities = SearchCapabilities(fulltext, trigram)
+    return engine
+
+
+def normalize(sql):
+    return " ".join(sql.split())
+
+
+def test_detect_capabilities(mock_db):
+    mock_db.execute_query.return_value = [{"fulltext": True, "trigram": False}]
+    caps = SearchCapabilities.detect()
+    assert caps.fulltext is True
+    assert caps.trigram is False
+
+
+def test_capability_detection_failure_falls_back(mock_db):
+    mock_db.execute_query.side_effect = Exception("no access")
+    engine = CaseSearchEngine()
+    assert engine.capabilities.fulltext is False
+    assert engine.capabilities.trigram is False
+
+
+def test_fallback_query_uses_ilike_only():
+    sql, params = engine_with(False, False).build_query("silva", JUDGE)
+    sql = normalize(sql)
+    assert "0 AS relevancia" in sql
+    assert "documento_busca" not in sql
+    assert "similarity" not in sql
+    assert "p.juiz_id = %s" in sql
+    assert params == ("%silva%", "%silva%", "%silva%", "judge-1", 50)
+
+
+def test_matches_are_a_union_of_indexed_branches():
+    sql, _ = engine_with(True, True).build_query("silva", JUDGE)
+    sql = normalize(sql)
+    assert "LEFT JOIN" not in sql
+    assert " OR " not in sql
+    assert (
+        "p.id IN (SELECT id FROM processos WHERE documento_busca @@ "
+        "websearch_to_tsquery('portuguese', %s) "
+        "UNION SELECT id FROM processos WHERE numero_processo ILIKE %s "
+        "UNION SELECT id FROM processos WHERE titulo ILIKE %s "
+        "UNION SELECT pp.processo_id FROM partes pa "
+        "JOIN partes_processo pp ON pp.parte_id = pa.id WHERE pa.nome ILIKE %s)"
+    ) in sql
+
+
+def test_full_query_ranks_and_limits():
+    sql, params = engine_with(True, True).build_query("silva", JUDGE, limit=10)
+    sql = normalize(sql)
+    assert "ts_rank(p.documento_busca" in sql
+    assert "similarity(p.numero_processo, %s)" in sql
+    assert "documento_busca @@ websearch_to_tsquery('portuguese', %s)" in sql
+    assert sql.endswith("ORDER BY relevancia DESC, p.data_distribuicao DESC LIMIT %s")
+    # placeholders and parameters must line up
+    assert sql.count("%s") == len(params)
+    assert params[-1] == 10
+
+
+def test_search_blank_term_skips_database(mock_db):
+    result = engine_with(True, True).search("   ", JUDGE)
+    assert not result and result.total == 0
+    mock_db.execute_query.assert_not_called()
+
+
+def test_partial_page_has_exact_total(mock_db):
+    mock_db.execute_query.return_value = [{"id": "c1"}]
+    result = engine_with(False, True).search(" silva ", JUDGE)
+    assert result.rows == [{"id": "c1"}]
+    assert result.total == 1 and not result.estimated
+    mock_db.execute_query.assert_called_once()
+    _, params = mock_db.execute_query.call_args[0]
+    assert "silva" in params
+
+
+def test_full_page_uses_planner_estimate(mock_db):
+    page = [{"id": "c1"}, {"id": "c2"}]
+    plan = [{"QUERY PLAN": [{"Plan": {"Plan Rows": 340}}]}]
+    mock_db.execute_query.side_effect = [page, plan]
+
+    result = engine_with(True, False, limit=2).search("silva", JUDGE)
+
+    assert len(result) == 2
+    assert result.total == 340 and result.estimated
+    explain_sql = mock_db.execute_query.call_args[0][0]
+    assert explain_sql.startswith("EXPLAIN (FORMAT JSON) SELECT 1 FROM processos p")
+    assert "LIMIT" not in explain_sql
+
+
+def test_estimate_never_below_page_size(mock_db):
+    page = [{"id": "c1"}, {"id": "c2"}]
+    mock_db.execute_query.side_effect = [page, Exception("explain failed")]
+    result = engine_with(False, False, limit=2).search("silva", JUDGE)
+    assert result.total == 2
+
+
+def test_index_answers_before_sql(mock_db):
+    index = MagicMock(ready=True)
+    index.lookup.return_value = {"c1", "c2", "c3"}
+    index.newest_first.return_value = ["c2"]
+    engine = engine_with(True, True, limit=1)
+    engine.index = index
+    mock_db.execute_query.return_value = [{"id": "c2"}]
+
+    with patch("search.case_access.visible_case_ids", return_value={"c1", "c2"}):
+        result = engine.search("silva", JUDGE)
+
+    # only visible matches count, and only the page is fetched
+    index.newest_first.assert_called_once_with({"c1", "c2"}, 1)
+    assert result.total == 2
+    sql, params = mock_db.execute_query.call_args[0]
+    assert "p.id = ANY(%s::uuid[])" in sql
+    assert params == (["c2"], "judge-1")
+
+
+def test_short_term_skips_index(mock_db):
+    index = MagicMock(ready=True)
+    index.lookup.return_value = None
+    engine = engine_with(False, False)
+    engine.index = index
+    mock_db.execute_query.return_value = []
+
+    engine.search("ab", JUDGE)
+
+    sql = mock_db.execute_query.call_args[0][0]
+    assert "ILIKE" in sql
+
+
+def test_case_number_is_an_exact_probe(mock_db):
+    mock_db.execute_query.return_value = [{"id": "c1"}]
+    engine = engine_with(True, True)
+    engine.index = MagicMock(ready=True)
+
+    result = engine.search("0001234-55.2024.8.26.0100", JUDGE)
+
+    engine.index.lookup.assert_not_called()
+    sql, params = mock_db.execute_query.call_args[0]
+    sql = normalize(sql)
+    assert "regexp_replace(p.numero_processo, '\\D', '', 'g') = %s" in sql
+    assert "ILIKE" not in sql and "documento_busca" not in sql
+    assert params == ("00012345520248260100", "judge-1", 50)
+    assert result.total == 1
+
+
+def test_party_document_is_an_exact_probe(mock_db):
+    mock_db.execute_query.return_value = []
+    engine_with(True, True).search("529.982.247-25", JUDGE)
+
+    sql, params = mock_db.execute_query.call_args[0]
+    sql = normalize(sql)
+    assert "regexp_replace(pa.cpf_cnpj, '\\D', '', 'g') = %s" in sql
+    assert "ILIKE" not in sql
+    assert params[0] == "52998224725"
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", "-s", __file__])
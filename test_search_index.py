@@ -0,0 +1,97 @@
+"""
+python -m pytest test_search_index.py -v -s
+"""
+
+import pytest
+from unittest.mock import patch
+from search_index import CaseTrigramIndex, fold, trigrams
+
+
+@pytest.fixture
+def mock_db():
+    # The index reads through database.ChangeFeed
+    with patch("database.db_manager") as mock:
+        yield mock
+
+
+def row(case_id, numero, titulo, partes, filed, updated, removido=False):
+    return {
+        "id": case_id,
+        "removido": removido,
+        "numero_processo": numero,
+        "titulo": titulo,
+        "partes": partes,
+        "data_distribuicao": filed,
+        "transacao": updated,
+    }
+
+
+@pytest.fixture
+def index(mock_db):
+    mock_db.fetch_changes.side_effect = lambda *args: [
+        row("c1", "0001234-55.2024.8.26.0100", "Cobrança indevida", "José Silva", "2024-01-10", 1),
+        row("c2", "0009876-11.2023.8.26.0100", "Dano moral", "Maria Souza", "2023-05-02", 2),
+    ] if args[1] is None else []
+    idx = CaseTrigramIndex()
+    idx.build()
+    mock_db.fetch_changes.side_effect = None
+    return idx
+
+
+def test_fold_and_trigrams():
+    assert fold("JOSÉ Cobrança") == "jose cobranca"
+    assert trigrams("abcd") == {"abc", "bcd"}
+    assert trigrams("ab") == set()
+
+
+def test_lookup_partial_case_number(index):
+    assert index.ready
+    assert index.lookup("1234-55") == {"c1"}
+    # digits-only form is indexed too
+    assert index.lookup("000123455") == {"c1"}
+
+
+def test_lookup_ignores_case_and_accents(index):
+    assert index.lookup("jose") == {"c1"}
+    assert index.lookup("COBRANCA") == {"c1"}
+    assert index.lookup("souza") == {"c2"}
+
+
+def test_lookup_does_not_match_across_fields(index):
+    # the title ends in "indevida" and the parties start with "jose"
+    assert index.lookup("indevidajos") == set()
+
+
+def test_short_terms_fall_back(index):
+    assert index.lookup("ab") is None
+
+
+def test_newest_first(index):
+    assert index.newest_first({"c1", "c2"}, 1) == ["c1"]
+
+
+def test_incremental_refresh_reads_change_feed(index, mock_db):
+    mock_db.fetch_changes.reset_mock()
+    mock_db.fetch_changes.return_value = [
+        row("c2", "0009876-11.2023.8.26.0100", "Dano material", "Maria Souza", "2023-05-02", 3),
+        row("c1", None, None, None, None, 4, removido=True),
+    ]
+    assert index.refresh(force=True) == 2
+
+    source, watermark = mock_db.fetch_changes.call_args.args[:2]
+    assert "processos_removidos" in source
+    assert watermark == (2, "c2")
+    assert index.lookup("material") == {"c2"}
+    assert index.lookup("moral") == set()
+    assert index.lookup("jose") == set()  # deleted case is gone
+    mock_db.save_watermark.assert_not_called()  # in-memory consumer
+
+
+def test_refresh_is_throttled(index, mock_db):
+    mock_db.fetch_changes.reset_mock()
+    assert index.refresh() == 0
+    mock_db.fetch_changes.assert_not_called()
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", "-s", __file__])
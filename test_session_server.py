@@ -0,0 +1,151 @@
+"""
+python -m pytest test_session_server.py -v -s
+"""
+
+import asyncio
+import contextvars
+import io
+import json
+import sys
+import pytest
+from contextlib import contextmanager
+from unittest.mock import MagicMock, patch
+import session_server
+from session_server import SessionCLI, SessionServer, _Router, _session
+
+
+class FakeSession:
+    def __init__(self, answers=()):
+        self.stdout = io.StringIO()
+        self.answers = list(answers)
+        self.asked = []
+        self.stdin = self
+
+    def readline(self, size=-1, secret=False):
+        self.asked.append("secret" if secret else "input")
+        return self.answers.pop(0) + "\n"
+
+
+@contextmanager
+def routed():
+    # Installed inside the test: pytest's capture swaps sys.stdout after fixtures
+    saved = sys.stdout, sys.stdin
+    fallback = io.StringIO()
+    sys.stdout = _Router("stdout", fallback)
+    sys.stdin = _Router("stdin", io.StringIO("local\n"))
+    try:
+        yield fallback
+    finally:
+        sys.stdout, sys.stdin = saved
+
+
+def test_router_follows_the_current_session():
+    first, second = FakeSession(["one"]), FakeSession(["two"])
+
+    def run(session, text):
+        _session.set(session)
+        print(text)
+        return sys.stdin.readline()
+
+    with routed() as server_out:
+        assert contextvars.copy_context().run(run, first, "to first") == "one\n"
+        assert contextvars.copy_context().run(run, second, "to second") == "two\n"
+        print("to server")
+        local_line = sys.stdin.readline()
+
+    assert first.stdout.getvalue() == "to first\n"
+    assert second.stdout.getvalue() == "to second\n"
+    assert server_out.getvalue() == "to server\n"
+    assert local_line == "local\n"
+
+
+def test_password_prompt_asks_for_secret_input():
+    session = FakeSession(["hunter2"])
+
+    def ask():
+        _session.set(session)
+        return session_server._session_getpass("Password: ")
+
+    assert contextvars.copy_context().run(ask) == "hunter2"
+    assert session.asked == ["secret"]
+    assert session.stdout.getvalue() == "Password: "
+
+
+def test_session_exit_keeps_shared_pool_open():
+    with patch("main.db_manager") as db, patch("main.console"):
+        cli = SessionCLI()
+        cli.running = True
+        cli.exit_app()
+
+    assert cli.running is False
+    db.close_all_connections.assert_not_called()
+
+
+def test_session_menu_leaves_out_live_search():
+    cli = SessionCLI()
+    cli.session.user = {"id": 1}
+    with patch("main.console"), patch("main.prefetcher"), patch(
+        "main.Prompt.ask", return_value="8"
+    ), patch("main.ExitCommand") as exit_command:
+        cli.main_menu()
+
+    names = [name for name, _ in cli.commands.values()]
+    assert "Live Search" not in names
+    assert cli.commands["8"] == ("Exit", exit_command)
+    exit_command.return_value.execute.assert_called_once()
+
+
+def test_server_runs_sessions_over_tcp():
+    """Two clients each get their own CLI, prompt and output"""
+
+    def fake_run(cli):
+        name = input("Name: ")
+        print(f"Hello {name}")
+
+    async def client(port, name):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        output = []
+        while True:
+            message = json.loads(await reader.readline())
+            if message["t"] == "out":
+                output.append(message["d"])
+            elif message["t"] == "input":
+                writer.write(f"{name}\n".encode())
+            elif message["t"] == "bye":
+                break
+        writer.close()
+        return "".join(output)
+
+    async def scenario():
+        server = SessionServer(port=0, max_sessions=2)
+        listener = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        async with listener:
+            return await asyncio.gather(client(port, "Ana"), client(port, "Rui"))
+
+    with patch.object(SessionCLI, "run", fake_run), patch("main.db_manager"):
+        with routed() as server_out:
+            ana, rui = asyncio.run(scenario())
+
+    assert ana == "Name: Hello Ana\n"
+    assert rui == "Name: Hello Rui\n"
+    assert server_out.getvalue() == ""
+
+
+def test_server_turns_away_sessions_over_limit():
+    server = SessionServer(max_sessions=1)
+    server.sessions = 1
+    writer = MagicMock()
+
+    async def scenario():
+        await server.handle(MagicMock(), writer)
+
+    asyncio.run(scenario())
+    sent = [json.loads(call.args[0]) for call in writer.write.call_args_list]
+    assert sent[-1] == {"t": "bye"}
+    assert "busy" in sent[0]["d"]
+    writer.close.assert_called_once()
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", "-s", __file__])
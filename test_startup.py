@@ -0,0 +1,65 @@
+"""
+python -m pytest test_startup.py -v -s
+"""
+
+import sys
+from unittest.mock import MagicMock
+from startup import LazyImport, StartupProfile, startup_profile
+
+
+def test_lazy_import_defers_until_first_use(monkeypatch):
+    monkeypatch.delitem(sys.modules, "normalization", raising=False)
+    digits = LazyImport("normalization", "digits_only")
+    assert "normalization" not in sys.modules
+    assert "deferred" in repr(digits)
+
+    assert digits("12.345-6") == "123456"
+    assert "normalization" in sys.modules
+    assert "loaded" in repr(digits)
+
+
+def test_lazy_import_forwards_attributes():
+    target = MagicMock(ready=False)
+    proxy = LazyImport("startup", "startup_profile")
+    proxy._target = target
+
+    proxy.ready = True
+    assert target.ready is True
+    assert proxy.ready is True
+
+
+def test_when_loaded_defers_until_import():
+    proxy = LazyImport("json", "dumps")
+    seen = []
+    proxy._module = "jec_not_imported_yet"
+    proxy.when_loaded(seen.append)
+    assert seen == []
+
+    proxy._module = "json"
+    proxy.resolve()
+    proxy.when_loaded(seen.append)
+    assert len(seen) == 2 and seen[0] is seen[1]
+
+
+def test_lazy_import_records_step():
+    steps = len(startup_profile.steps)
+    LazyImport("cache", "TTLCache").resolve()
+    assert startup_profile.steps[steps][0] == "import cache"
+
+
+def test_profile_reports_once_when_enabled():
+    profile = StartupProfile()
+    with profile.step("load config"):
+        pass
+    write = MagicMock()
+
+    profile.report_once(write)
+    write.assert_not_called()
+
+    profile.enabled = True
+    profile.report_once(write)
+    profile.report_once(write)
+    lines = [args[0] for args, _ in write.call_args_list]
+    assert lines[0].startswith("Startup: ")
+    assert any(line.endswith("load config") for line in lines)
+    assert lines[-1].endswith("(other)")
@@ -0,0 +1,98 @@
+"""
+python -m pytest test_tui.py -v -s
+"""
+
+import io
+import sys
+import pytest
+from rich.console import Console
+from tui import EchoInput, FullScreen, OutputBuffer
+
+
+@pytest.fixture
+def terminal():
+    return io.StringIO()
+
+
+@pytest.fixture
+def screen(terminal):
+    console = Console(
+        file=terminal, force_terminal=True, width=40, height=10, color_system=None
+    )
+    screen = FullScreen(console)
+    screen.set_menu({"1": "Login", "2": "List Processes"})
+    screen.set_status("Ready")
+    return screen
+
+
+def written(terminal):
+    data = terminal.getvalue()
+    terminal.seek(0)
+    terminal.truncate()
+    return data
+
+
+def test_first_paint_draws_every_region(screen, terminal):
+    screen.refresh()
+    frame = written(terminal)
+    assert "JEC System" in frame
+    assert "List Processes" in frame
+    assert "Ready" in frame
+
+
+def test_unchanged_screen_writes_no_rows(screen, terminal):
+    screen.refresh()
+    written(terminal)
+    assert screen.painter.paint() == 0
+    assert written(terminal) == ""
+
+
+def test_output_repaints_only_results_rows(screen, terminal):
+    screen.refresh()
+    written(terminal)
+
+    screen.output.write("Case 123\n")
+    screen.output.flush()
+    update = written(terminal)
+    assert "Case 123" in update
+    assert "List Processes" not in update
+    assert "Ready" not in update
+
+
+def test_status_change_repaints_one_row(screen, terminal):
+    screen.refresh()
+    screen.set_status("Search Cases - 12 ms")
+    assert screen.painter.paint() == 1
+
+
+def test_cursor_follows_pending_prompt(screen, terminal):
+    screen.output.write("Email: ")
+    screen.output.flush()
+    region = screen.painter.regions["results"]
+    # The last control sequence puts the cursor right after the prompt
+    assert written(terminal).endswith(f"\x1b[{region.y + 1};{len('Email: ') + 1}H")
+
+
+def test_results_keep_the_latest_lines(screen):
+    for number in range(30):
+        screen.output.write(f"line {number}\n")
+    screen.refresh()
+    assert screen._tail.cursor[1] == screen.painter.regions["results"].height - 1
+
+
+def test_echo_input_records_answers():
+    output = OutputBuffer(lambda: None)
+    stdin = EchoInput(io.StringIO("maria@jec\n"), output)
+    assert stdin.readline() == "maria@jec\n"
+    assert output.text().plain == "maria@jec\n"
+
+
+def test_session_routes_stdio_and_restores_it(screen):
+    original = sys.stdout
+    with screen.session():
+        assert sys.stdout is screen.output
+        print("inside")
+        with screen.suspended():
+            assert sys.stdout is original
+    assert sys.stdout is original
+    assert "inside" in screen.output.text().plain
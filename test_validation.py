@@ -0,0 +1,92 @@
+"""
+python -m pytest test_validation.py -v -s
+"""
+
+import pytest
+from decimal import Decimal
+from unittest.mock import patch
+from categories import CategoryTree
+from validation import ValorCausaValidator
+
+ROWS = [
+    {"id": "civel", "categoria_pai_id": None, "nome": "Cível", "valor_maximo": 40000},
+    {
+        "id": "consumo",
+        "categoria_pai_id": "civel",
+        "nome": "Consumo",
+        "valor_maximo": None,
+    },
+    {
+        "id": "banco",
+        "categoria_pai_id": "consumo",
+        "nome": "Banco",
+        "valor_maximo": 20000,
+    },
+    {"id": "outros", "categoria_pai_id": None, "nome": "Outros", "valor_maximo": None},
+]
+
+
+@pytest.fixture
+def tree():
+    tree = CategoryTree(check_interval=3600)
+    tree.build(ROWS, version=1)
+    with patch("validation.category_tree", tree):
+        yield tree
+
+
+@pytest.fixture
+def mock_db():
+    with patch("validation.db_manager") as mock:
+        yield mock
+
+
+def test_limits_are_inherited_and_tightened(tree):
+    assert ValorCausaValidator().limits() == {
+        "civel": 40000,
+        "consumo": 40000,
+        "banco": 20000,
+    }
+
+
+def test_violations_stream_one_join_against_limits(tree, mock_db):
+    mock_db.iter_query.return_value = iter([{"id": "c1", "limite": Decimal(20000)}])
+
+    rows = list(ValorCausaValidator().violations(case_ids=["c1", "c2"]))
+
+    assert rows == [{"id": "c1", "limite": Decimal(20000)}]
+    sql, params = mock_db.iter_query.call_args.args
+    assert "FROM processos p" in sql
+    assert sql.count("unnest(%s::uuid[], %s::numeric[])") == 2
+    assert "p.id = ANY(%s::uuid[])" in sql
+    assert params[0] == ["civel", "consumo", "banco"]
+    assert params[1] == ["40000", "40000", "20000"]
+    assert params[4] == ["c1", "c2"]
+
+
+def test_violations_against_staging_table(tree, mock_db):
+    mock_db.iter_query.return_value = iter([])
+    list(ValorCausaValidator().violations(source="importacao_processos"))
+    assert "FROM importacao_processos p" in mock_db.iter_query.call_args.args[0]
+
+    with pytest.raises(ValueError):
+        ValorCausaValidator().query("processos; DROP TABLE processos")
+
+
+def test_no_limits_means_no_query(mock_db):
+    with patch("validation.category_tree") as empty_tree:
+        empty_tree.walk.return_value = []
+        assert list(ValorCausaValidator().violations()) == []
+    mock_db.iter_query.assert_not_called()
+
+
+def test_set_enforced_toggles_trigger(mock_db):
+    ValorCausaValidator.set_enforced(True)
+    mock_db.execute_query.assert_called_with(
+        "ALTER TABLE processos ENABLE TRIGGER trg_valida_valor_causa"
+    )
+    ValorCausaValidator.set_enforced(False)
+    assert "DISABLE" in mock_db.execute_query.call_args.args[0]
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", "-s", __file__])
@@ -0,0 +1,238 @@
+"""
+Full-screen terminal mode for JEC System
+
+`python main.py --fullscreen` runs the menu on the terminal's alternate
+screen, split into a Rich Layout of four regions:
+- header: screen title and logged-in user
+- menu: the options for the current role
+- results: output of the last command, ending with the next prompt
+- status: last command and how long it took
+
+Rich's Live repaints the whole frame on every refresh, which floods slow
+SSH links. ScreenPainter instead renders the Layout, compares each screen
+row with what it last wrote, and sends only the rows that differ, each
+prefixed with a cursor move. Choosing a command therefore rewrites the
+results rows and the status line, while the header and menu stay as they are.
+
+Commands keep printing through their own Console and Prompt. During a
+session sys.stdout and sys.stderr point at OutputBuffer, which collects that
+output for the results region. sys.stdin is wrapped so typed answers show
+up in the transcript as well.
+"""
+
+import io
+import sys
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+from rich.console import Console
+from rich.control import Control
+from rich.layout import Layout
+from rich.panel import Panel
+from rich.segment import Segment, Segments
+from rich.text import Text
+
+
+class ScreenPainter:
+    """Paint a Layout row by row, skipping rows unchanged since the last paint"""
+
+    def __init__(self, layout: Layout, console: Console):
+        self.layout = layout
+        self.console = console
+        self.regions = {}
+        self._rows: Dict[Tuple[int, int], List[Segment]] = {}
+        self._size = None
+
+    def invalidate(self):
+        """Forget what is on screen, e.g. after something else drew over it"""
+        self._rows.clear()
+
+    def paint(self) -> int:
+        """Write the rows that changed and return how many were written"""
+        size = self.console.size
+        if size != self._size:
+            self._size = size
+            self._rows.clear()
+            self.console.clear()
+        options = self.console.options.update_dimensions(size.width, size.height)
+        render_map = self.layout.render(self.console, options)
+
+        segments: List[Segment] = []
+        written = 0
+        for layout, (region, lines) in render_map.items():
+            self.regions[layout.name] = region
+            for offset, line in enumerate(lines):
+                position = (region.x, region.y + offset)
+                if self._rows.get(position) == line:
+                    continue
+                self._rows[position] = line
+                segments.append(Control.move_to(*position).segment)
+                segments.extend(line)
+                written += 1
+        if segments:
+            self.console.print(Segments(segments), end="", crop=False)
+        return written
+
+
+class OutputTail:
+    """Renders the last lines of a transcript that fit, tracking where it ends"""
+
+    def __init__(self, text: Text):
+        self.text = text
+        self.cursor = (0, 0)
+
+    def __rich_console__(self, console, options):
+        lines = console.render_lines(
+            self.text, options.update(height=None), pad=False, new_lines=False
+        )
+        height = options.height or len(lines)
+        visible = lines[-height:]
+        if visible:
+            self.cursor = (Segment.get_line_length(visible[-1]), len(visible) - 1)
+        else:
+            self.cursor = (0, 0)
+        for line in visible:
+            yield from line
+            yield Segment.line()
+
+
+class OutputBuffer(io.TextIOBase):
+    """File object collecting command output for the results region"""
+
+    def __init__(self, on_flush):
+        super().__init__()
+        self._chunks: List[str] = []
+        self._on_flush = on_flush
+
+    def write(self, text: str) -> int:
+        self._chunks.append(text)
+        return len(text)
+
+    def flush(self):
+        self._on_flush()
+
+    def isatty(self) -> bool:
+        # Consoles writing here keep their colours and markup
+        return True
+
+    def writable(self) -> bool:
+        return True
+
+    def clear(self):
+        self._chunks.clear()
+
+    def text(self) -> Text:
+        return Text.from_ansi("".join(self._chunks))
+
+
+class EchoInput(io.TextIOBase):
+    """sys.stdin wrapper copying each answer into the transcript"""
+
+    def __init__(self, stream, output: OutputBuffer):
+        super().__init__()
+        self._stream = stream
+        self._output = output
+
+    def readable(self) -> bool:
+        return True
+
+    def readline(self, size: int = -1) -> str:
+        line = self._stream.readline(size)
+        self._output.write(line)
+        self._output.flush()
+        return line
+
+
+class FullScreen:
+    """Alternate-screen session with header, menu, results and status regions"""
+
+    def __init__(self, console: Optional[Console] = None):
+        # Bound to the real terminal; sys.stdout is rerouted during a session
+        self.console = console or Console(file=sys.stdout)
+        self.layout = Layout(name="root")
+        self.layout.split_column(
+            Layout(name="header", size=1),
+            Layout(name="menu", size=3),
+            Layout(name="results"),
+            Layout(name="status", size=1),
+        )
+        self.output = OutputBuffer(self.refresh)
+        self.painter = ScreenPainter(self.layout, self.console)
+        self._menu = Text()
+        self._tail = OutputTail(Text())
+        self._stdio = None
+        self.layout["results"].update(self._tail)
+        self.set_header("JEC System")
+        self.set_status("")
+
+    def set_header(self, title: str, user: str = ""):
+        header = Text(f" {title}", style="bold white on blue")
+        if user:
+            header.append(f"  {user}", style="white on blue")
+        self.layout["header"].update(header)
+
+    def set_menu(self, options: Dict[str, str]):
+        menu = Text()
+        for key, description in options.items():
+            if menu:
+                menu.append("   ")
+            menu.append(key, style="green")
+            menu.append(f". {description}")
+        self._menu = menu
+        self.layout["menu"].update(Panel(menu, border_style="blue"))
+
+    def set_status(self, status: str):
+        self.layout["status"].update(Text(f" {status}", style="black on white"))
+
+    def begin_output(self):
+        """Start a new transcript in the results region"""
+        self.output.clear()
+
+    def refresh(self):
+        """Repaint changed rows and leave the cursor after the last output"""
+        width = self.console.size.width
+        menu_rows = len(self._menu.wrap(self.console, max(width - 4, 1))) + 2
+        self.layout["menu"].size = max(menu_rows, 3)
+        self._tail = OutputTail(self.output.text())
+        self.layout["results"].update(self._tail)
+        # Render once to learn where the transcript ends, then place the cursor
+        self.painter.paint()
+        region = self.painter.regions.get("results")
+        if region is not None:
+            column, row = self._tail.cursor
+            self.console.control(
+                Control.move_to(
+                    region.x + min(column, region.width - 1), region.y + row
+                )
+            )
+
+    @contextmanager
+    def session(self):
+        """Switch to the alternate screen and route stdio through the regions"""
+        self._stdio = sys.stdout, sys.stderr, sys.stdin
+        self.console.set_alt_screen(True)
+        self.painter.invalidate()
+        sys.stdout = sys.stderr = self.output
+        sys.stdin = EchoInput(self._stdio[2], self.output)
+        try:
+            yield self
+        finally:
+            sys.stdout, sys.stderr, sys.stdin = self._stdio
+            self._stdio = None
+            self.console.set_alt_screen(False)
+
+    @contextmanager
+    def suspended(self):
+        """Hand the real terminal to code that draws it itself (e.g. Live)"""
+        if self._stdio is None:
+            yield
+            return
+        routed = sys.stdout, sys.stderr, sys.stdin
+        sys.stdout, sys.stderr, sys.stdin = self._stdio
+        self.console.clear()
+        try:
+            yield
+        finally:
+            sys.stdout, sys.stderr, sys.stdin = routed
+            self.console.clear()
+            self.painter.invalidate()
+            self.refresh()
@@ -0,0 +1,114 @@
+"""
+Claim value validation for JEC System
+
+categorias_causas.valor_maximo caps processos.valor_causa. A limit set on a
+category applies to its whole subtree, so a case's effective limit is the
+lowest valor_maximo on the paths of its categoria and subcategoria.
+
+Effective limits are derived from the cached category tree and sent to the
+server as two arrays. One join against them checks any number of cases:
+a whole table, a list of new case IDs, or an import staging table. Violations
+are streamed through a server-side cursor rather than fetched at once.
+
+Migration 0008 also installs a deferrable constraint trigger applying the
+same rule row by row. It ships disabled; set_enforced(True) turns it on.
+"""
+
+import argparse
+import re
+from decimal import Decimal
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+from categories import category_tree
+from database import db_manager
+
+_IDENTIFIER = re.compile(r"^[a-z_][a-z0-9_]*(\.[a-z_][a-z0-9_]*)?$")
+
+_VIOLATIONS_QUERY = """SELECT p.id, p.numero_processo, p.valor_causa,
+        LEAST(lc.valor_maximo, ls.valor_maximo) AS limite,
+        p.categoria_id, p.subcategoria_id
+    FROM {source} p
+    LEFT JOIN unnest(%s::uuid[], %s::numeric[]) AS lc(categoria_id, valor_maximo)
+        ON lc.categoria_id = p.categoria_id
+    LEFT JOIN unnest(%s::uuid[], %s::numeric[]) AS ls(categoria_id, valor_maximo)
+        ON ls.categoria_id = p.subcategoria_id
+    WHERE p.valor_causa > LEAST(lc.valor_maximo, ls.valor_maximo){extra}"""
+
+
+class ValorCausaValidator:
+    """Bulk check of valor_causa against category limits"""
+
+    def limits(self) -> Dict[object, Decimal]:
+        """Effective limit per category that has one, inherited down the tree"""
+        limits = {}
+        for category, _ in category_tree.walk():
+            caps = [
+                node["valor_maximo"]
+                for node in category_tree.path(category["id"])
+                if node.get("valor_maximo") is not None
+            ]
+            if caps:
+                limits[category["id"]] = min(caps)
+        return limits
+
+    def query(
+        self, source: str = "processos", case_ids: Optional[Iterable] = None
+    ) -> Tuple[str, tuple]:
+        """SQL and params listing the violations in `source`"""
+        if not _IDENTIFIER.match(source):
+            raise ValueError(f"Invalid table name: {source}")
+        limits = self.limits()
+        ids = [str(cid) for cid in limits]
+        caps = [str(cap) for cap in limits.values()]
+        params = (ids, caps, ids, caps)
+        extra = ""
+        if case_ids is not None:
+            extra = " AND p.id = ANY(%s::uuid[])"
+            params += ([str(cid) for cid in case_ids],)
+        return _VIOLATIONS_QUERY.format(source=source, extra=extra), params
+
+    def violations(
+        self,
+        source: str = "processos",
+        case_ids: Optional[Iterable] = None,
+        batch_size: int = 5000,
+    ) -> Iterator[Dict]:
+        """Stream the rows of `source` whose valor_causa exceeds the limit
+
+        `source` may be processos or any table with the same id, numero_processo,
+        valor_causa, categoria_id and subcategoria_id columns (e.g. staging).
+        """
+        sql, params = self.query(source, case_ids)
+        if not params[0]:
+            return iter(())  # no category has a limit
+        return db_manager.iter_query(sql, params, batch_size=batch_size)
+
+    @staticmethod
+    def set_enforced(enabled: bool):
+        """Enable or disable the row-level constraint trigger (migration 0008)"""
+        action = "ENABLE" if enabled else "DISABLE"
+        db_manager.execute_query(
+            f"ALTER TABLE processos {action} TRIGGER trg_valida_valor_causa"
+        )
+
+
+# Singleton instance
+valor_causa_validator = ValorCausaValidator()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check valor_causa limits")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--enforce", action="store_true", help="Enable the trigger")
+    group.add_argument("--relax", action="store_true", help="Disable the trigger")
+    args = parser.parse_args()
+
+    if args.enforce or args.relax:
+        valor_causa_validator.set_enforced(args.enforce)
+    count = 0
+    for violation in valor_causa_validator.violations():
+        count += 1
+        print(
+            f"{violation['numero_processo']}: {violation['valor_causa']}"
+            f" > {violation['limite']}"
+        )
+    print(f"{count} violation(s)")